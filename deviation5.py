@@ -1,1460 +1,5132 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.svm import SVR
-from sklearn.linear_model import LinearRegression
-from sklearn.neural_network import MLPRegressor
-from sklearn.metrics import mean_squared_error, r2_score
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import base64
-from io import BytesIO
-
-# Initialiser l'état de session pour le suivi de l'entraînement des modèles
-if 'model_trained' not in st.session_state:
-    st.session_state.model_trained = False
-if 'model_azimuth' not in st.session_state:
-    st.session_state.model_azimuth = None
-if 'model_inclinaison' not in st.session_state:
-    st.session_state.model_inclinaison = None
-if 'df' not in st.session_state:
-    st.session_state.df = None
-if 'raw_df' not in st.session_state:
-    st.session_state.raw_df = None
-if 'columns_mapped' not in st.session_state:
-    st.session_state.columns_mapped = False
-
-# Configuration de la page
-st.set_page_config(
-    page_title="Prédiction de Déviation des Forages Miniers",
-    page_icon="🔍",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# CSS personnalisé pour un look moderne
-st.markdown("""
-<style>
-    /* Couleurs personnalisées */
-    :root {
-        --primary: #4F8BF9;
-        --secondary: #1E293B;
-        --accent: #FF4B4B;
-        --background: #F8F9FA;
-        --text: #1E293B;
-        --light-text: #64748B;
-        --card: white;
-        --success: #0CCE6B;
-    }
-    
-    /* Corps du document */
-    .main {
-        background-color: var(--background);
-        color: var(--text);
-        font-family: 'Roboto', sans-serif;
-    }
-    
-    /* En-têtes */
-    h1, h2, h3, h4 {
-        color: var(--secondary);
-        font-weight: 700;
-    }
-    
-    h1 {
-        font-size: 2.5rem;
-        margin-bottom: 1.5rem;
-        padding-bottom: 1rem;
-        border-bottom: 2px solid #f0f0f0;
-    }
-    
-    h2 {
-        font-size: 1.8rem;
-        margin-top: 2rem;
-        margin-bottom: 1rem;
-        padding-bottom: 0.5rem;
-        border-bottom: 1px solid #f0f0f0;
-    }
-    
-    h3 {
-        font-size: 1.4rem;
-        margin-top: 1.5rem;
-    }
-    
-    /* Cards */
-    .stDataFrame, .css-1r6slb0, div[data-testid="stBlock"] {
-        background-color: var(--card);
-        border-radius: 10px;
-        padding: 1rem;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.05);
-        margin-bottom: 1.5rem;
-    }
-    
-    /* Widgets */
-    .stButton>button {
-        background-color: var(--primary);
-        color: white;
-        border-radius: 6px;
-        padding: 0.5rem 1.5rem;
-        font-weight: 600;
-        border: none;
-        transition: all 0.3s ease;
-    }
-    
-    .stButton>button:hover {
-        background-color: #3A7BD5;
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-    }
-
-    .stSidebar .stButton>button {
-        width: 100%;
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 12px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        height: 40px;
-        border-radius: 6px 6px 0 0;
-        padding: 0 20px;
-        font-weight: 500;
-    }
-    
-    /* Sidebar */
-    .css-1d391kg, .css-1wrcr25 {
-        background-color: var(--secondary);
-    }
-    
-    .css-1d391kg .css-163ttbj, .css-1wrcr25 .css-163ttbj {
-        color: white;
-    }
-    
-    .css-1d391kg label, .css-1wrcr25 label {
-        color: #E2E8F0;
-    }
-    
-    /* Metrics */
-    [data-testid="stMetricValue"] {
-        font-size: 2rem !important;
-        font-weight: 700 !important;
-        color: var(--primary) !important;
-    }
-    
-    /* Author Banner */
-    .author-banner {
-        background-color: var(--secondary);
-        color: white;
-        padding: 1rem;
-        border-radius: 8px;
-        margin-bottom: 2rem;
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-    }
-    
-    .author-info {
-        display: flex;
-        flex-direction: column;
-    }
-    
-    .author-name {
-        font-size: 1.2rem;
-        font-weight: 600;
-    }
-    
-    .author-title {
-        font-size: 0.9rem;
-        opacity: 0.8;
-    }
-    
-    /* Status indicators */
-    .status-indicator {
-        display: inline-block;
-        width: 10px;
-        height: 10px;
-        border-radius: 50%;
-        margin-right: 6px;
-    }
-    
-    .status-trained {
-        background-color: var(--success);
-    }
-    
-    .status-untrained {
-        background-color: var(--accent);
-    }
-    
-    /* Info boxes */
-    .info-box {
-        background-color: #E6F0FF;
-        border-left: 4px solid var(--primary);
-        padding: 1rem;
-        border-radius: 4px;
-        margin-bottom: 1rem;
-    }
-    
-    /* Progress bar */
-    .stProgress .st-bo {
-        background-color: var(--primary);
-    }
-    
-    /* Plot styling */
-    .js-plotly-plot {
-        border-radius: 8px;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.05);
-        background-color: white;
-        padding: 1rem;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Titre et auteur
-st.markdown("""
-<div class="author-banner">
-    <div class="author-info">
-        <span class="author-name">Prédiction de Déviation des Forages Miniers</span>
-        <span class="author-title">Application de machine learning pour anticiper les déviations</span>
-    </div>
-    <div class="author-info" style="text-align: right;">
-        <span class="author-name">Didier Ouedraogo, P.Geo.</span>
-        <span class="author-title">Géologue & Data Scientist</span>
-    </div>
-</div>
-""", unsafe_allow_html=True)
-
-# Fonction pour créer un icône
-def get_icon_html(icon_name, color="white", size=24):
-    return f'<i class="material-icons" style="color: {color}; font-size: {size}px;">{icon_name}</i>'
-
-# Fonction pour charger les données
-@st.cache_data
-def load_data(file):
-    df = pd.read_csv(file)
-    return df
-
-# Sidebar pour les options
-with st.sidebar:
-    st.markdown(f"""
-    <div style="display: flex; align-items: center; margin-bottom: 1rem;">
-        <h3 style="margin: 0; color: white;">Configuration</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Statut du modèle
-    model_status = "trained" if st.session_state.model_trained else "untrained"
-    columns_status = "mapped" if st.session_state.columns_mapped else "unmapped"
-    
-    st.markdown(f"""
-    <div style="display: flex; align-items: center; margin-bottom: 1.5rem; background-color: #2D3748; padding: 0.8rem; border-radius: 6px;">
-        <span class="status-indicator status-{model_status}"></span>
-        <span style="color: white; font-size: 0.9rem;">Statut du modèle: {'Entraîné' if st.session_state.model_trained else 'Non entraîné'}</span>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Option pour uploader les données ou utiliser des données de démonstration
-    st.markdown('<p style="color: #E2E8F0; font-weight: 600; margin-bottom: 0.5rem;">Source des données</p>', unsafe_allow_html=True)
-    data_option = st.radio(
-        "",
-        ["Charger mes données", "Utiliser données démo"],
-        label_visibility="collapsed"
-    )
-    
-    if data_option == "Charger mes données":
-        uploaded_file = st.file_uploader("Choisir un fichier CSV", type="csv")
-        
-        if uploaded_file is not None and st.session_state.raw_df is None:
-            # Charger les données brutes
-            st.session_state.raw_df = load_data(uploaded_file)
-            st.session_state.columns_mapped = False
-    
-    # Séparateur visuel
-    st.markdown('<hr style="margin: 1.5rem 0; border-color: #4A5568;">', unsafe_allow_html=True)
-    
-    # Sélection du modèle
-    st.markdown('<p style="color: #E2E8F0; font-weight: 600; margin-bottom: 0.5rem;">Modèle de machine learning</p>', unsafe_allow_html=True)
-    model_option = st.selectbox(
-        "",
-        ["Random Forest", "SVM", "Régression Linéaire", "Réseau de Neurones"],
-        label_visibility="collapsed"
-    )
-    
-    # Bouton d'entraînement
-    train_button = st.button("Entraîner le modèle")
-
-# Initialisation des données
-df = None
-
-if data_option == "Charger mes données" and st.session_state.raw_df is not None and not st.session_state.columns_mapped:
-    st.markdown("## Mappage des colonnes")
-    st.markdown("""
-    <div class="info-box">
-        <b>Mappage requis</b>: Veuillez associer les colonnes de votre fichier CSV aux colonnes attendues par l'application.
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Afficher un aperçu des données brutes
-    st.markdown("### Aperçu de vos données")
-    st.dataframe(st.session_state.raw_df.head(), use_container_width=True)
-    
-    # Colonnes requises par l'application
-    required_columns = {
-        'profondeur_finale': 'Profondeur finale du forage (mètres)',
-        'azimuth_initial': 'Azimuth initial du forage (degrés)',
-        'inclinaison_initiale': 'Inclinaison initiale du forage (degrés)',
-        'lithologie': 'Type de roche traversée',
-        'vitesse_rotation': 'Vitesse de rotation de la tige (tr/min)',
-        'deviation_azimuth': 'Déviation mesurée en azimuth (degrés)',
-        'deviation_inclinaison': 'Déviation mesurée en inclinaison (degrés)'
-    }
-    
-    st.markdown("### Associer les colonnes")
-    st.markdown("""
-    <p>Pour chaque paramètre requis, sélectionnez la colonne correspondante dans votre fichier CSV.</p>
-    """, unsafe_allow_html=True)
-    
-    # Créer un dictionnaire pour stocker les mappages
-    column_mapping = {}
-    
-    # Créer une liste des colonnes disponibles dans le CSV
-    available_columns = st.session_state.raw_df.columns.tolist()
-    
-    # Ajouter une option "Non disponible" pour les colonnes facultatives
-    available_columns_with_na = ['Non disponible'] + available_columns
-    
-    # Créer des sélecteurs pour chaque colonne requise
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        for i, (required_col, description) in enumerate(list(required_columns.items())[:4]):
-            # Suggérer une correspondance basée sur des mots-clés
-            suggested_index = 0  # Par défaut "Non disponible"
-            for j, col in enumerate(available_columns):
-                if required_col.lower() in col.lower() or any(word in col.lower() for word in required_col.split('_')):
-                    suggested_index = j + 1  # +1 car nous avons ajouté "Non disponible" en première position
-                    break
-            
-            column_mapping[required_col] = st.selectbox(
-                f"{description}",
-                available_columns_with_na,
-                index=suggested_index,
-                help=f"Sélectionnez la colonne de votre CSV qui correspond à '{required_col}'"
-            )
-    
-    with col2:
-        for i, (required_col, description) in enumerate(list(required_columns.items())[4:]):
-            # Suggérer une correspondance basée sur des mots-clés
-            suggested_index = 0  # Par défaut "Non disponible"
-            for j, col in enumerate(available_columns):
-                if required_col.lower() in col.lower() or any(word in col.lower() for word in required_col.split('_')):
-                    suggested_index = j + 1  # +1 car nous avons ajouté "Non disponible" en première position
-                    break
-            
-            column_mapping[required_col] = st.selectbox(
-                f"{description}",
-                available_columns_with_na,
-                index=suggested_index,
-                help=f"Sélectionnez la colonne de votre CSV qui correspond à '{required_col}'"
-            )
-    
-    # Vérifier si toutes les colonnes obligatoires sont mappées
-    missing_required = [col for col, mapped in column_mapping.items() 
-                       if mapped == 'Non disponible' and col not in ['lithologie']]
-    
-    if len(missing_required) > 0:
-        st.warning(f"⚠️ Certaines colonnes obligatoires n'ont pas été mappées: {', '.join(missing_required)}")
-        can_proceed = False
-    else:
-        can_proceed = True
-    
-    # Bouton pour valider le mappage
-    mapping_col1, mapping_col2, mapping_col3 = st.columns([1, 2, 1])
-    with mapping_col2:
-        if st.button("Valider le mappage", disabled=not can_proceed, use_container_width=True):
-            # Créer un nouveau DataFrame avec les colonnes mappées
-            mapped_df = pd.DataFrame()
-            
-            for required_col, source_col in column_mapping.items():
-                if source_col != 'Non disponible':
-                    mapped_df[required_col] = st.session_state.raw_df[source_col]
-                else:
-                    # Si la colonne est facultative, on peut générer des valeurs par défaut
-                    if required_col == 'lithologie':
-                        mapped_df[required_col] = 'Inconnu'  # Valeur par défaut pour la lithologie
-            
-            # Stocker le DataFrame mappé dans la session
-            st.session_state.df = mapped_df
-            st.session_state.columns_mapped = True
-            st.success("✅ Mappage validé! Vous pouvez maintenant explorer et modéliser vos données.")
-            st.experimental_rerun()
-
-elif data_option == "Charger mes données" and st.session_state.columns_mapped:
-    # Utiliser le DataFrame déjà mappé
-    df = st.session_state.df
-    
-elif data_option == "Utiliser données démo":
-    # Données de démonstration
-    st.markdown("""
-    <div class="info-box">
-        <b>Mode démo</b>: Utilisation de données synthétiques pour illustrer le fonctionnement de l'application.
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Créer des données synthétiques pour la démonstration
-    np.random.seed(42)
-    n_samples = 1000
-    
-    prof_finale = np.random.uniform(100, 1000, n_samples)
-    azimuth_initial = np.random.uniform(0, 360, n_samples)
-    inclinaison_initiale = np.random.uniform(-90, 0, n_samples)
-    vitesse_rotation = np.random.uniform(50, 200, n_samples)
-    
-    # Lithologies possibles
-    lithologies = ['Granite', 'Schiste', 'Gneiss', 'Calcaire', 'Basalte']
-    lithologie = np.random.choice(lithologies, n_samples)
-    
-    # Créer une relation entre les entrées et les déviations (simplifiée)
-    azimuth_deviation = (
-        0.05 * prof_finale 
-        + 0.02 * azimuth_initial 
-        + 0.1 * inclinaison_initiale 
-        + 0.03 * vitesse_rotation 
-        + np.random.normal(0, 10, n_samples)
-    )
-    
-    inclinaison_deviation = (
-        0.03 * prof_finale 
-        - 0.01 * azimuth_initial 
-        + 0.05 * inclinaison_initiale 
-        + 0.02 * vitesse_rotation 
-        + np.random.normal(0, 5, n_samples)
-    )
-    
-    # Ajouter un effet de la lithologie (différent pour chaque type)
-    lithology_effect = {
-        'Granite': (2.0, 1.0),
-        'Schiste': (-1.5, 3.0),
-        'Gneiss': (0.5, -2.0),
-        'Calcaire': (-1.0, -1.5),
-        'Basalte': (3.0, 2.5)
-    }
-    
-    for i, lith in enumerate(lithologie):
-        effect_az, effect_inc = lithology_effect[lith]
-        azimuth_deviation[i] += effect_az
-        inclinaison_deviation[i] += effect_inc
-    
-    # Créer le DataFrame
-    df = pd.DataFrame({
-        'profondeur_finale': prof_finale,
-        'azimuth_initial': azimuth_initial,
-        'inclinaison_initiale': inclinaison_initiale,
-        'lithologie': lithologie,
-        'vitesse_rotation': vitesse_rotation,
-        'deviation_azimuth': azimuth_deviation,
-        'deviation_inclinaison': inclinaison_deviation
-    })
-    
-    # Stocker dans la session state
-    st.session_state.df = df
-    st.session_state.columns_mapped = True
-
-# Si des données sont disponibles, afficher l'application principale
-if df is not None:
-    # Onglets pour les différentes sections
-    tabs = st.tabs(["📊 Exploration", "🧠 Modélisation", "🔮 Prédiction"])
-    
-    with tabs[0]:  # Exploration des données
-        st.markdown("## Exploration des données")
-        
-        # Affichage des données en deux colonnes
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            st.markdown("### Aperçu des données")
-            st.dataframe(df.head(), use_container_width=True)
-        
-        with col2:
-            st.markdown("### Statistiques descriptives")
-            st.dataframe(df.describe().style.highlight_max(axis=0), use_container_width=True)
-        
-        # Distribution des lithologies et métriques globales
-        col1, col2 = st.columns([3, 2])
-        
-        with col1:
-            st.markdown("### Distribution des lithologies")
-            fig_litho = px.histogram(df, x='lithologie', color='lithologie', 
-                                    color_discrete_sequence=px.colors.qualitative.Bold,
-                                    template="plotly_white")
-            fig_litho.update_layout(
-                xaxis_title="Lithologie",
-                yaxis_title="Nombre de forages",
-                showlegend=False,
-                margin=dict(l=20, r=20, t=40, b=20),
-            )
-            st.plotly_chart(fig_litho, use_container_width=True)
-            
-        with col2:
-            st.markdown("### Métriques globales")
-            
-            # Calculer des métriques intéressantes
-            mean_az_dev = df['deviation_azimuth'].abs().mean()
-            max_az_dev = df['deviation_azimuth'].abs().max()
-            mean_inc_dev = df['deviation_inclinaison'].abs().mean()
-            max_inc_dev = df['deviation_inclinaison'].abs().max()
-            
-            # Afficher les métriques
-            c1, c2 = st.columns(2)
-            c1.metric("Déviation moyenne d'azimuth", f"{mean_az_dev:.2f}°")
-            c2.metric("Déviation max. d'azimuth", f"{max_az_dev:.2f}°")
-            
-            c1, c2 = st.columns(2)
-            c1.metric("Déviation moyenne d'inclinaison", f"{mean_inc_dev:.2f}°")
-            c2.metric("Déviation max. d'inclinaison", f"{max_inc_dev:.2f}°")
-            
-            # Calculer la lithologie avec la déviation la plus importante
-            lithology_deviation = df.groupby('lithologie')[['deviation_azimuth', 'deviation_inclinaison']].apply(
-                lambda x: (x['deviation_azimuth']**2 + x['deviation_inclinaison']**2).mean()**0.5
-            ).sort_values(ascending=False)
-            
-            most_deviated = lithology_deviation.index[0]
-            deviation_value = lithology_deviation.iloc[0]
-            
-            # Définir la couleur pour la lithologie la plus déviée
-            lithology_colors = {
-                'Granite': '#FF6B6B', 
-                'Schiste': '#4ECDC4', 
-                'Gneiss': '#45B7D1', 
-                'Calcaire': '#FFBE0B', 
-                'Basalte': '#9F84BD'
-            }
-            color = lithology_colors.get(most_deviated, '#4F8BF9')
-            
-            st.markdown(f"""
-            <div style="margin-top: 1rem; background-color: #F8F9FA; padding: 1rem; border-radius: 6px; border-left: 4px solid {color};">
-                <p style="margin: 0; font-size: 0.9rem;">Lithologie avec le plus de déviation :</p>
-                <p style="margin: 0; font-weight: 600; font-size: 1.1rem;">{most_deviated} ({deviation_value:.2f}°)</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Analyse exploratoire détaillée
-        st.markdown("### Analyse exploratoire approfondie")
-        
-        explore_tabs = st.tabs(["Corrélations", "Déviations par lithologie", "Relations"])
-        
-        with explore_tabs[0]:
-            # Matrice de corrélation
-            numeric_cols = df.select_dtypes(include=np.number).columns
-            corr_matrix = df[numeric_cols].corr()
-            
-            fig_corr = px.imshow(corr_matrix, 
-                                text_auto=True, 
-                                color_continuous_scale='RdBu_r',
-                                title="Matrice de corrélation",
-                                template="plotly_white")
-            fig_corr.update_layout(
-                margin=dict(l=20, r=20, t=50, b=20),
-            )
-            st.plotly_chart(fig_corr, use_container_width=True)
-            
-            # Interprétation automatique des corrélations
-            strong_correlations = []
-            
-            for i in range(len(corr_matrix.columns)):
-                for j in range(i):
-                    if abs(corr_matrix.iloc[i, j]) > 0.3:  # Seuil de corrélation
-                        strong_correlations.append({
-                            'var1': corr_matrix.columns[i],
-                            'var2': corr_matrix.columns[j],
-                            'corr': corr_matrix.iloc[i, j]
-                        })
-            
-            if strong_correlations:
-                st.markdown("#### Corrélations significatives")
-                for corr in sorted(strong_correlations, key=lambda x: abs(x['corr']), reverse=True):
-                    relation = "positive" if corr['corr'] > 0 else "négative"
-                    strength = "forte" if abs(corr['corr']) > 0.7 else "modérée"
-                    st.markdown(f"- Corrélation {strength} {relation} ({corr['corr']:.2f}) entre **{corr['var1']}** et **{corr['var2']}**")
-        
-        with explore_tabs[1]:
-            # Déviations par lithologie
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                fig_box1 = px.box(df, x='lithologie', y='deviation_azimuth', 
-                                title="Déviation d'azimuth par lithologie", 
-                                color='lithologie',
-                                color_discrete_sequence=px.colors.qualitative.Bold,
-                                template="plotly_white")
-                fig_box1.update_layout(
-                    xaxis_title="Lithologie",
-                    yaxis_title="Déviation d'azimuth (°)",
-                    showlegend=False,
-                    margin=dict(l=20, r=20, t=50, b=20),
-                )
-                st.plotly_chart(fig_box1, use_container_width=True)
-            
-            with col2:
-                fig_box2 = px.box(df, x='lithologie', y='deviation_inclinaison', 
-                                title="Déviation d'inclinaison par lithologie", 
-                                color='lithologie',
-                                color_discrete_sequence=px.colors.qualitative.Bold,
-                                template="plotly_white")
-                fig_box2.update_layout(
-                    xaxis_title="Lithologie",
-                    yaxis_title="Déviation d'inclinaison (°)",
-                    showlegend=False,
-                    margin=dict(l=20, r=20, t=50, b=20),
-                )
-                st.plotly_chart(fig_box2, use_container_width=True)
-            
-            # Résumé statistique par lithologie
-            st.markdown("#### Résumé statistique par lithologie")
-            
-            litho_stats = df.groupby('lithologie')[['deviation_azimuth', 'deviation_inclinaison']].agg(
-                ['mean', 'std', 'min', 'max']
-            ).round(2)
-            
-            litho_stats.columns = ['Azimuth Moy', 'Azimuth Std', 'Azimuth Min', 'Azimuth Max', 
-                                   'Inclinaison Moy', 'Inclinaison Std', 'Inclinaison Min', 'Inclinaison Max']
-            
-            st.dataframe(litho_stats, use_container_width=True)
-        
-        with explore_tabs[2]:
-            # Relations entre paramètres et déviations
-            features = ['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'vitesse_rotation']
-            
-            selected_feature = st.selectbox(
-                "Sélectionner un paramètre pour explorer sa relation avec les déviations",
-                features
-            )
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                fig_scatter1 = px.scatter(df, x=selected_feature, y='deviation_azimuth', 
-                                        color='lithologie', opacity=0.7,
-                                        title=f"Déviation d'azimuth vs {selected_feature}",
-                                        color_discrete_sequence=px.colors.qualitative.Bold,
-                                        trendline="ols",
-                                        template="plotly_white")
-                fig_scatter1.update_layout(
-                    xaxis_title=selected_feature,
-                    yaxis_title="Déviation d'azimuth (°)",
-                    margin=dict(l=20, r=20, t=50, b=20),
-                )
-                st.plotly_chart(fig_scatter1, use_container_width=True)
-            
-            with col2:
-                fig_scatter2 = px.scatter(df, x=selected_feature, y='deviation_inclinaison', 
-                                        color='lithologie', opacity=0.7,
-                                        title=f"Déviation d'inclinaison vs {selected_feature}",
-                                        color_discrete_sequence=px.colors.qualitative.Bold,
-                                        trendline="ols",
-                                        template="plotly_white")
-                fig_scatter2.update_layout(
-                    xaxis_title=selected_feature,
-                    yaxis_title="Déviation d'inclinaison (°)",
-                    margin=dict(l=20, r=20, t=50, b=20),
-                )
-                st.plotly_chart(fig_scatter2, use_container_width=True)
-            
-            # Distribution du paramètre sélectionné
-            fig_hist = px.histogram(df, x=selected_feature, color='lithologie',
-                                   title=f"Distribution de {selected_feature}",
-                                   color_discrete_sequence=px.colors.qualitative.Bold,
-                                   marginal="box",
-                                   template="plotly_white")
-            fig_hist.update_layout(
-                xaxis_title=selected_feature,
-                yaxis_title="Nombre de forages",
-                margin=dict(l=20, r=20, t=50, b=20),
-            )
-            st.plotly_chart(fig_hist, use_container_width=True)
-    
-    with tabs[1]:  # Modélisation
-        st.markdown("## Modélisation des déviations")
-        
-        # Définir les caractéristiques et cibles
-        X = df[['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'lithologie', 'vitesse_rotation']]
-        y_azimuth = df['deviation_azimuth']
-        y_inclinaison = df['deviation_inclinaison']
-        
-        # Préparation pour la modélisation
-        numeric_features = ['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'vitesse_rotation']
-        categorical_features = ['lithologie']
-        
-        # Préprocesseurs
-        numeric_transformer = Pipeline(steps=[
-            ('scaler', StandardScaler())
-        ])
-        
-        categorical_transformer = Pipeline(steps=[
-            ('onehot', OneHotEncoder(handle_unknown='ignore'))
-        ])
-        
-        preprocessor = ColumnTransformer(
-            transformers=[
-                ('num', numeric_transformer, numeric_features),
-                ('cat', categorical_transformer, categorical_features)
-            ])
-        
-        # Choix du modèle
-        if model_option == "Random Forest":
-            model_azimuth = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', RandomForestRegressor(n_estimators=100, random_state=42))
-            ])
-            
-            model_inclinaison = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', RandomForestRegressor(n_estimators=100, random_state=42))
-            ])
-            
-        elif model_option == "SVM":
-            model_azimuth = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', SVR())
-            ])
-            
-            model_inclinaison = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', SVR())
-            ])
-            
-        elif model_option == "Régression Linéaire":
-            model_azimuth = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', LinearRegression())
-            ])
-            
-            model_inclinaison = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', LinearRegression())
-            ])
-            
-        else:  # Réseau de Neurones
-            model_azimuth = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', MLPRegressor(hidden_layer_sizes=(100,50), max_iter=1000, random_state=42))
-            ])
-            
-            model_inclinaison = Pipeline(steps=[
-                ('preprocessor', preprocessor),
-                ('regressor', MLPRegressor(hidden_layer_sizes=(100,50), max_iter=1000, random_state=42))
-            ])
-        
-        # Diviser les données
-        X_train, X_test, y_azimuth_train, y_azimuth_test, y_inclinaison_train, y_inclinaison_test = train_test_split(
-            X, y_azimuth, y_inclinaison, test_size=0.2, random_state=42
-        )
-        
-        # Description du modèle sélectionné
-        model_descriptions = {
-            "Random Forest": """
-                **Random Forest** est un algorithme d'ensemble qui utilise plusieurs arbres de décision pour améliorer 
-                la précision et réduire le surapprentissage. Il est efficace pour capturer les relations non linéaires 
-                dans les données.
-                
-                **Avantages**:
-                - Bonne performance sur les données complexes
-                - Gère bien les valeurs manquantes
-                - Fournit des mesures d'importance des variables
-                
-                **Complexité du modèle**: Moyenne à élevée
-            """,
-            "SVM": """
-                **Support Vector Machine (SVM)** est un algorithme qui trouve un hyperplan optimal pour séparer les données.
-                Dans sa version régression (SVR), il cherche à trouver une fonction qui s'écarte le moins possible des points.
-                
-                **Avantages**:
-                - Efficace dans les espaces de grande dimension
-                - Polyvalent grâce aux différents noyaux
-                - Bonne capacité de généralisation
-                
-                **Complexité du modèle**: Moyenne
-            """,
-            "Régression Linéaire": """
-                **Régression Linéaire** est un modèle simple qui établit une relation linéaire entre les variables 
-                d'entrée et la sortie. Il est facile à interpréter mais limité pour capturer des relations complexes.
-                
-                **Avantages**:
-                - Simple et interprétable
-                - Rapide à entraîner
-                - Faible variance
-                
-                **Complexité du modèle**: Faible
-            """,
-            "Réseau de Neurones": """
-                **Réseau de Neurones** est un modèle inspiré du cerveau humain, composé de couches de neurones artificiels.
-                Il peut modéliser des relations très complexes et non linéaires.
-                
-                **Avantages**:
-                - Capacité à modéliser des relations très complexes
-                - Peut apprendre des représentations hiérarchiques
-                - Très flexible
-                
-                **Complexité du modèle**: Élevée
-            """
-        }
-        
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            st.markdown(f"### Modèle sélectionné: {model_option}")
-            st.markdown(model_descriptions[model_option])
-        
-        with col2:
-            st.markdown("### Configuration")
-            st.markdown(f"""
-            <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; margin-bottom: 1rem;">
-                <p style="margin: 0; font-weight: 600;">Répartition des données</p>
-                <p style="margin: 0;">80% Entraînement / 20% Test</p>
-            </div>
-            
-            <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px;">
-                <p style="margin: 0; font-weight: 600;">Variables d'entrée</p>
-                <p style="margin: 0;">- Profondeur finale</p>
-                <p style="margin: 0;">- Azimuth initial</p>
-                <p style="margin: 0;">- Inclinaison initiale</p>
-                <p style="margin: 0;">- Lithologie</p>
-                <p style="margin: 0;">- Vitesse de rotation</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Entraîner les modèles si l'utilisateur clique sur le bouton
-        if train_button:
-            st.markdown("### Entraînement en cours...")
-            
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Étape 1: Préparation des données
-            status_text.text("Préparation des données...")
-            progress_bar.progress(20)
-            
-            # Étape 2: Entraînement du modèle d'azimuth
-            status_text.text("Entraînement du modèle pour la déviation d'azimuth...")
-            model_azimuth.fit(X_train, y_azimuth_train)
-            y_azimuth_pred = model_azimuth.predict(X_test)
-            progress_bar.progress(50)
-            
-            # Étape 3: Entraînement du modèle d'inclinaison
-            status_text.text("Entraînement du modèle pour la déviation d'inclinaison...")
-            model_inclinaison.fit(X_train, y_inclinaison_train)
-            y_inclinaison_pred = model_inclinaison.predict(X_test)
-            progress_bar.progress(80)
-            
-            # Étape 4: Évaluation des performances
-            status_text.text("Évaluation des performances...")
-            azimuth_rmse = np.sqrt(mean_squared_error(y_azimuth_test, y_azimuth_pred))
-            azimuth_r2 = r2_score(y_azimuth_test, y_azimuth_pred)
-            
-            inclinaison_rmse = np.sqrt(mean_squared_error(y_inclinaison_test, y_inclinaison_pred))
-            inclinaison_r2 = r2_score(y_inclinaison_test, y_inclinaison_pred)
-            progress_bar.progress(100)
-            
-            # Stocker les modèles dans la session state
-            st.session_state.model_azimuth = model_azimuth
-            st.session_state.model_inclinaison = model_inclinaison
-            st.session_state.model_trained = True
-            
-            status_text.text("Entraînement terminé!")
-            
-            # Affichage des résultats
-            st.markdown("### Résultats de l'entraînement")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("#### Déviation d'azimuth")
-                
-                # Métrique avec évaluation de la performance
-                r2_color = '#0CCE6B' if azimuth_r2 > 0.7 else ('#FFA500' if azimuth_r2 > 0.5 else '#FF4B4B')
-                
-                st.markdown(f"""
-                <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
-                    <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
-                        <p style="margin: 0; font-size: 0.9rem;">RMSE</p>
-                        <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: #4F8BF9;">{azimuth_rmse:.4f}°</p>
-                    </div>
-                    <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
-                        <p style="margin: 0; font-size: 0.9rem;">R²</p>
-                        <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: {r2_color};">{azimuth_r2:.4f}</p>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Graphique des prédictions vs réelles
-                fig_pred_az = px.scatter(x=y_azimuth_test, y=y_azimuth_pred, 
-                                        labels={'x': 'Valeurs réelles (°)', 'y': 'Prédictions (°)'},
-                                        title="Prédictions vs Réelles - Déviation d'azimuth",
-                                        template="plotly_white")
-                fig_pred_az.add_shape(type='line', line=dict(dash='dash', color='rgba(0,0,0,0.3)'),
-                                    x0=y_azimuth_test.min(), y0=y_azimuth_test.min(),
-                                    x1=y_azimuth_test.max(), y1=y_azimuth_test.max())
-                fig_pred_az.update_layout(
-                    margin=dict(l=20, r=20, t=50, b=20),
-                )
-                st.plotly_chart(fig_pred_az, use_container_width=True)
-            
-            with col2:
-                st.markdown("#### Déviation d'inclinaison")
-                
-                # Métrique avec évaluation de la performance
-                r2_color = '#0CCE6B' if inclinaison_r2 > 0.7 else ('#FFA500' if inclinaison_r2 > 0.5 else '#FF4B4B')
-                
-                st.markdown(f"""
-                <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
-                    <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
-                        <p style="margin: 0; font-size: 0.9rem;">RMSE</p>
-                        <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: #4F8BF9;">{inclinaison_rmse:.4f}°</p>
-                    </div>
-                    <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
-                        <p style="margin: 0; font-size: 0.9rem;">R²</p>
-                        <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: {r2_color};">{inclinaison_r2:.4f}</p>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Graphique des prédictions vs réelles
-                fig_pred_inc = px.scatter(x=y_inclinaison_test, y=y_inclinaison_pred, 
-                                        labels={'x': 'Valeurs réelles (°)', 'y': 'Prédictions (°)'},
-                                        title="Prédictions vs Réelles - Déviation d'inclinaison",
-                                        template="plotly_white")
-                fig_pred_inc.add_shape(type='line', line=dict(dash='dash', color='rgba(0,0,0,0.3)'),
-                                    x0=y_inclinaison_test.min(), y0=y_inclinaison_test.min(),
-                                    x1=y_inclinaison_test.max(), y1=y_inclinaison_test.max())
-                fig_pred_inc.update_layout(
-                    margin=dict(l=20, r=20, t=50, b=20),
-                )
-                st.plotly_chart(fig_pred_inc, use_container_width=True)
-            
-            # Interprétation des résultats
-            st.markdown("### Interprétation des résultats")
-            
-            # Calculer la performance moyenne
-            avg_r2 = (azimuth_r2 + inclinaison_r2) / 2
-            
-            if avg_r2 > 0.8:
-                performance_text = "excellente"
-                performance_detail = """
-                    Le modèle capture très bien les facteurs influençant les déviations. Vous pouvez utiliser ces prédictions 
-                    avec un haut niveau de confiance pour la planification des forages.
-                """
-            elif avg_r2 > 0.7:
-                performance_text = "bonne"
-                performance_detail = """
-                    Le modèle capture bien les tendances principales des déviations. Les prédictions sont fiables pour
-                    la plupart des conditions de forage.
-                """
-            elif avg_r2 > 0.5:
-                performance_text = "modérée"
-                performance_detail = """
-                    Le modèle capture les tendances générales mais manque de précision dans certains cas. Utilisez les 
-                    prédictions comme indicateurs mais prévoyez des marges de sécurité.
-                """
-            else:
-                performance_text = "limitée"
-                performance_detail = """
-                    Le modèle a du mal à capturer la complexité des facteurs influençant les déviations. Les prédictions
-                    doivent être utilisées avec prudence et des facteurs supplémentaires pourraient être nécessaires.
-                """
-            
-            st.markdown(f"""
-            <div style="background-color: #F8F9FA; padding: 1.5rem; border-radius: 8px; margin: 1rem 0;">
-                <h4 style="margin-top: 0;">Performance globale: {performance_text.capitalize()}</h4>
-                <p>{performance_detail}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Si Random Forest, afficher l'importance des caractéristiques
-            if model_option == "Random Forest":
-                st.markdown("### Importance des caractéristiques")
-                
-                # Extraire l'importance des caractéristiques pour l'azimuth
-                rf_azimuth = model_azimuth.named_steps['regressor']
-                preprocessor_azimuth = model_azimuth.named_steps['preprocessor']
-                
-                # Obtenir les noms des caractéristiques après transformation
-                cat_features = preprocessor_azimuth.transformers_[1][1].named_steps['onehot'].get_feature_names_out(categorical_features)
-                feature_names = np.concatenate([numeric_features, cat_features])
-                
-                # Obtenir l'importance des caractéristiques
-                feature_importance_azimuth = rf_azimuth.feature_importances_
-                
-                # Pour l'inclinaison
-                rf_inclinaison = model_inclinaison.named_steps['regressor']
-                feature_importance_inclinaison = rf_inclinaison.feature_importances_
-                
-                # Créer un DataFrame pour l'affichage
-                importance_df = pd.DataFrame({
-                    'Feature': feature_names,
-                    'Importance_Azimuth': feature_importance_azimuth,
-                    'Importance_Inclinaison': feature_importance_inclinaison
-                })
-                
-                # Afficher sous forme de graphique
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    fig_imp_az = px.bar(
-                        importance_df.sort_values('Importance_Azimuth', ascending=False),
-                        y='Feature', x='Importance_Azimuth',
-                        title="Importance des facteurs - Déviation d'azimuth",
-                        template="plotly_white"
-                    )
-                    fig_imp_az.update_layout(
-                        yaxis_title="",
-                        xaxis_title="Importance relative",
-                        margin=dict(l=20, r=20, t=50, b=20),
-                    )
-                    st.plotly_chart(fig_imp_az, use_container_width=True)
-                
-                with col2:
-                    fig_imp_inc = px.bar(
-                        importance_df.sort_values('Importance_Inclinaison', ascending=False),
-                        y='Feature', x='Importance_Inclinaison',
-                        title="Importance des facteurs - Déviation d'inclinaison",
-                        template="plotly_white"
-                    )
-                    fig_imp_inc.update_layout(
-                        yaxis_title="",
-                        xaxis_title="Importance relative",
-                        margin=dict(l=20, r=20, t=50, b=20),
-                    )
-                    st.plotly_chart(fig_imp_inc, use_container_width=True)
-    
-    with tabs[2]:  # Prédiction
-        st.markdown("## Prédiction pour un nouveau forage")
-        
-        # Vérification si un modèle est entraîné
-        if not st.session_state.model_trained:
-            st.markdown("""
-            <div style="background-color: #FEF2F2; border-left: 4px solid #FF4B4B; padding: 1rem; border-radius: 4px; margin-bottom: 1.5rem;">
-                <p style="margin: 0; color: #7F1D1D; font-weight: 600;">Modèle non entraîné</p>
-                <p style="margin: 0; color: #7F1D1D;">Veuillez d'abord entraîner un modèle depuis l'onglet "Modélisation" ou la barre latérale.</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Formulaire de prédiction
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("### Paramètres du forage")
-            
-            prof_finale_input = st.number_input("Profondeur finale (m)", min_value=50.0, max_value=2000.0, value=500.0, step=50.0)
-            azimuth_initial_input = st.number_input("Azimuth initial (degrés)", min_value=0.0, max_value=360.0, value=90.0, step=5.0)
-            inclinaison_initiale_input = st.number_input("Inclinaison initiale (degrés)", min_value=-90.0, max_value=0.0, value=-45.0, step=5.0)
-            
-            lithologies_uniques = df['lithologie'].unique().tolist()
-            lithologie_input = st.selectbox("Lithologie", lithologies_uniques)
-            
-            vitesse_rotation_input = st.number_input("Vitesse de rotation (tr/min)", min_value=20.0, max_value=300.0, value=120.0, step=10.0)
-        
-        with col2:
-            st.markdown("### Illustration schématique")
-            
-            # Visualisation schématique du forage initial
-            def generate_drill_illustration(azimuth, inclination):
-                fig = go.Figure()
-                
-                # Calculer les coordonnées pour une représentation simple
-                depth = 100
-                x = depth * np.cos(np.radians(inclination)) * np.sin(np.radians(azimuth))
-                y = depth * np.cos(np.radians(inclination)) * np.cos(np.radians(azimuth))
-                z = depth * np.sin(np.radians(inclination))
-                
-                # Surface (grille)
-                x_surface = np.linspace(-100, 100, 5)
-                y_surface = np.linspace(-100, 100, 5)
-                z_surface = np.zeros((5, 5))
-                
-                fig.add_trace(go.Surface(x=x_surface, y=y_surface, z=z_surface, 
-                                        colorscale=[[0, 'lightgreen'], [1, 'lightgreen']],
-                                        showscale=False, opacity=0.3))
-                
-                # Point de départ du forage
-                fig.add_trace(go.Scatter3d(
-                    x=[0], y=[0], z=[0],
-                    mode='markers',
-                    marker=dict(size=10, color='green'),
-                    name='Départ'
-                ))
-                
-                # Direction initiale
-                fig.add_trace(go.Scatter3d(
-                    x=[0, x], y=[0, y], z=[0, z],
-                    mode='lines',
-                    line=dict(color='blue', width=5),
-                    name='Direction initiale'
-                ))
-                
-                # Paramètres de visualisation
-                fig.update_layout(
-                    title=f"Orientation initiale: Azimuth {azimuth:.1f}°, Inclinaison {inclination:.1f}°",
-                    scene = dict(
-                        xaxis_title='Est (m)',
-                        yaxis_title='Nord (m)',
-                        zaxis_title='Profondeur (m)',
-                        aspectmode='manual',
-                        aspectratio=dict(x=1, y=1, z=1),
-                        camera=dict(
-                            eye=dict(x=1.5, y=1.5, z=1.2)
-                        ),
-                    ),
-                    margin=dict(l=0, r=0, t=30, b=0),
-                    template="plotly_white",
-                    height=300
-                )
-                
-                return fig
-            
-            drill_fig = generate_drill_illustration(azimuth_initial_input, inclinaison_initiale_input)
-            st.plotly_chart(drill_fig, use_container_width=True)
-            
-            # Informations supplémentaires sur la lithologie
-            lithology_info = {
-                'Granite': "Roche ignée à grains grossiers, abrasive et résistante.",
-                'Schiste': "Roche métamorphique feuilletée de dureté moyenne.",
-                'Gneiss': "Roche métamorphique à bandes alternées, dure et résistante.",
-                'Calcaire': "Roche sédimentaire tendre à moyennement dure.",
-                'Basalte': "Roche volcanique dense, dure et abrasive."
-            }
-            
-            st.markdown(f"""
-            <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; margin-top: 1rem;">
-                <p style="margin: 0; font-weight: 600;">Lithologie sélectionnée: {lithologie_input}</p>
-                <p style="margin: 0;">{lithology_info.get(lithologie_input, "")}</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # Bouton de prédiction
-        predict_col1, predict_col2, predict_col3 = st.columns([1, 2, 1])
-        
-        with predict_col2:
-            predict_button = st.button("⚡ Prédire les déviations", use_container_width=True, type="primary", disabled=not st.session_state.model_trained)
-        
-        # Faire la prédiction
-        if predict_button and st.session_state.model_trained:
-            # Créer un dataframe avec les données d'entrée
-            input_data = pd.DataFrame({
-                'profondeur_finale': [prof_finale_input],
-                'azimuth_initial': [azimuth_initial_input],
-                'inclinaison_initiale': [inclinaison_initiale_input],
-                'lithologie': [lithologie_input],
-                'vitesse_rotation': [vitesse_rotation_input]
-            })
-            
-            # Faire les prédictions avec les modèles stockés dans session_state
-            predicted_azimuth = st.session_state.model_azimuth.predict(input_data)[0]
-            predicted_inclinaison = st.session_state.model_inclinaison.predict(input_data)[0]
-            
-            # Calculer les valeurs finales
-            azimuth_final = azimuth_initial_input + predicted_azimuth
-            inclinaison_final = inclinaison_initiale_input + predicted_inclinaison
-            
-            # Normalization pour azimuth (0-360°)
-            azimuth_final = azimuth_final % 360
-            
-            # Contraindre l'inclinaison entre -90 et 0
-            inclinaison_final = max(-90, min(0, inclinaison_final))
-            
-            # Afficher les résultats
-            st.markdown("### Résultats de la prédiction")
-            
-            # Créer un cadre moderne pour les résultats
-            st.markdown("""
-            <div style="background-color: white; border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.05); padding: 1.5rem; margin: 1.5rem 0;">
-                <h4 style="margin-top: 0; text-align: center; margin-bottom: 1.5rem;">Déviations prédites</h4>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.metric("Déviation d'azimuth", f"{predicted_azimuth:.2f}°")
-                st.metric("Azimuth final", f"{azimuth_final:.2f}°")
-            
-            with col2:
-                st.metric("Déviation d'inclinaison", f"{predicted_inclinaison:.2f}°")
-                st.metric("Inclinaison finale", f"{inclinaison_final:.2f}°")
-            
-            # Calcul de l'intensité de la déviation pour le texte d'interprétation
-            deviation_magnitude = (predicted_azimuth**2 + predicted_inclinaison**2)**0.5
-            
-            if deviation_magnitude < 5:
-                deviation_text = "faible"
-                deviation_impact = "minime"
-            elif deviation_magnitude < 15:
-                deviation_text = "modérée"
-                deviation_impact = "à considérer"
-            else:
-                deviation_text = "importante"
-                deviation_impact = "significatif"
-            
-            st.markdown(f"""
-                <p style="text-align: center; margin: 1rem 0; padding-top: 1rem; border-top: 1px solid #f0f0f0;">
-                    La déviation prédite est <strong>{deviation_text}</strong>, avec un impact <strong>{deviation_impact}</strong> sur la position finale du forage.
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Visualisation 3D de la trajectoire du forage
-            st.markdown("### Visualisation de la trajectoire")
-            
-            # Conversion des coordonnées polaires en coordonnées cartésiennes
-            def sph_to_cart(depth, azimuth, inclination):
-                # Conversion des degrés en radians
-                azimuth_rad = np.radians(azimuth)
-                inclination_rad = np.radians(inclination)
-                
-                # x pointe vers l'est, y vers le nord, z vers le haut
-                x = depth * np.cos(inclination_rad) * np.sin(azimuth_rad)
-                y = depth * np.cos(inclination_rad) * np.cos(azimuth_rad)
-                z = depth * np.sin(inclination_rad)  # z est négatif car inclination est négative
-                
-                return x, y, z
-            
-            # Calculer plusieurs points le long de la trajectoire
-            num_points = 100
-            depths = np.linspace(0, prof_finale_input, num_points)
-            
-            # Interpolation linéaire entre les angles initiaux et finaux
-            azimuth_interp = np.linspace(azimuth_initial_input, azimuth_final, num_points)
-            inclination_interp = np.linspace(inclinaison_initiale_input, inclinaison_final, num_points)
-            
-            # Calculer les coordonnées cartésiennes pour chaque point
-            x_coords, y_coords, z_coords = [], [], []
-            for i in range(num_points):
-                x, y, z = sph_to_cart(depths[i], azimuth_interp[i], inclination_interp[i])
-                x_coords.append(x)
-                y_coords.append(y)
-                z_coords.append(z)
-            
-            # Surface (grille)
-            x_surface = np.linspace(min(x_coords)-50, max(x_coords)+50, 10)
-            y_surface = np.linspace(min(y_coords)-50, max(y_coords)+50, 10)
-            x_surface_grid, y_surface_grid = np.meshgrid(x_surface, y_surface)
-            z_surface_grid = np.zeros_like(x_surface_grid)
-            
-            # Créer la visualisation 3D
-            fig = go.Figure()
-            
-            # Ajouter la surface
-            fig.add_trace(go.Surface(
-                x=x_surface_grid,
-                y=y_surface_grid,
-                z=z_surface_grid,
-                colorscale=[[0, 'lightgreen'], [1, 'lightgreen']],
-                showscale=False,
-                opacity=0.3
-            ))
-            
-            # Ajouter la trajectoire
-            fig.add_trace(go.Scatter3d(
-                x=x_coords,
-                y=y_coords,
-                z=z_coords,
-                mode='lines',
-                line=dict(
-                    color='blue',
-                    width=6
-                ),
-                name='Trajectoire prédite'
-            ))
-            
-            # Ajouter la position de départ
-            fig.add_trace(go.Scatter3d(
-                x=[0],
-                y=[0],
-                z=[0],
-                mode='markers',
-                marker=dict(
-                    size=8,
-                    color='green'
-                ),
-                name='Départ'
-            ))
-            
-            # Ajouter la position finale
-            fig.add_trace(go.Scatter3d(
-                x=[x_coords[-1]],
-                y=[y_coords[-1]],
-                z=[z_coords[-1]],
-                mode='markers',
-                marker=dict(
-                    size=8,
-                    color='red'
-                ),
-                name='Arrivée'
-            ))
-            
-            # Ajouter la trajectoire idéale (ligne droite) avec une meilleure visibilité
-            x_ideal, y_ideal, z_ideal = sph_to_cart(prof_finale_input, azimuth_initial_input, inclinaison_initiale_input)
-            
-            fig.add_trace(go.Scatter3d(
-                x=[0, x_ideal],
-                y=[0, y_ideal],
-                z=[0, z_ideal],
-                mode='lines',
-                line=dict(
-                    color='rgba(255, 0, 0, 0.6)',  # Rouge plus visible
-                    width=4,                        # Ligne plus épaisse
-                    dash='dash'                     # Conserver le style tiret
-                ),
-                name='Trajectoire idéale'
-            ))
-            
-            # Calculer l'écart final en mètres
-            final_deviation = ((x_coords[-1] - x_ideal)**2 + (y_coords[-1] - y_ideal)**2 + (z_coords[-1] - z_ideal)**2)**0.5
-            
-            fig.update_layout(
-                title=f"Trajectoire du forage (Écart final: {final_deviation:.2f} m)",
-                scene=dict(
-                    xaxis_title='Est (m)',
-                    yaxis_title='Nord (m)',
-                    zaxis_title='Profondeur (m)',
-                    aspectmode='data'
-                ),
-                template="plotly_white",
-                height=700,
-                margin=dict(l=0, r=0, t=50, b=0)
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Ajouter une section d'interprétation et de recommandation
-            st.markdown("### Interprétation et recommandations")
-            
-            # Déterminer les recommandations basées sur la déviation
-            if deviation_magnitude < 5:
-                recommendations = """
-                - La déviation prédite est faible et ne devrait pas nécessiter d'ajustements particuliers.
-                - Procéder au forage selon les paramètres planifiés.
-                - Surveiller régulièrement l'orientation pendant l'opération.
-                """
-            elif deviation_magnitude < 15:
-                recommendations = """
-                - Une déviation modérée est anticipée, des ajustements préventifs peuvent être envisagés.
-                - Considérer une légère compensation de l'orientation initiale.
-                - Prévoir des mesures de contrôle plus fréquentes pendant le forage.
-                - Réduire la vitesse de rotation dans les zones critiques.
-                """
-            else:
-                recommendations = """
-                - Une déviation importante est prévue, des mesures correctives sont nécessaires.
-                - Ajuster significativement l'orientation initiale pour compenser la déviation.
-                - Utiliser des stabilisateurs supplémentaires pour maintenir la trajectoire.
-                - Envisager des techniques de forage dirigé si disponibles.
-                - Effectuer des mesures de contrôle très fréquentes.
-                """
-            
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.markdown(f"""
-                <div style="background-color: white; border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.05); padding: 1.5rem; height: 100%;">
-                    <h4 style="margin-top: 0;">Recommandations</h4>
-                    <p>{recommendations}</p>
-                    <p style="margin-top: 1rem; font-style: italic;">Note: Ces recommandations sont basées sur les prédictions du modèle et doivent être adaptées aux conditions spécifiques du site.</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                # Créer une jauge pour visualiser l'intensité de la déviation
-                gauge_fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=deviation_magnitude,
-                    title={'text': "Intensité de la déviation (°)"},
-                    gauge={
-                        'axis': {'range': [None, 30], 'tickwidth': 1},
-                        'bar': {'color': "rgba(0,0,0,0)"},
-                        'steps': [
-                            {'range': [0, 5], 'color': "lightgreen"},
-                            {'range': [5, 15], 'color': "orange"},
-                            {'range': [15, 30], 'color': "salmon"}
-                        ],
-                        'threshold': {
-                            'line': {'color': "red", 'width': 4},
-                            'thickness': 0.75,
-                            'value': deviation_magnitude
-                        }
-                    }
-                ))
-                
-                gauge_fig.update_layout(
-                    height=300,
-                    margin=dict(l=20, r=20, t=50, b=20),
-                    template="plotly_white"
-                )
-                
-                st.plotly_chart(gauge_fig, use_container_width=True)
-            
-            # Ajouter une option pour télécharger le rapport
-            st.markdown("### Télécharger le rapport")
-            
-            # Créer un rapport PDF (simulé avec un texte formaté)
-            report_text = f"""
-            Rapport de prédiction de déviation de forage
-            Date: {pd.Timestamp.now().strftime('%d/%m/%Y')}
-            
-            Paramètres du forage:
-            - Profondeur finale: {prof_finale_input} m
-            - Azimuth initial: {azimuth_initial_input}°
-            - Inclinaison initiale: {inclinaison_initiale_input}°
-            - Lithologie: {lithologie_input}
-            - Vitesse de rotation: {vitesse_rotation_input} tr/min
-            
-            Résultats de la prédiction:
-            - Déviation d'azimuth: {predicted_azimuth:.2f}°
-            - Déviation d'inclinaison: {predicted_inclinaison:.2f}°
-            - Azimuth final prévu: {azimuth_final:.2f}°
-            - Inclinaison finale prévue: {inclinaison_final:.2f}°
-            - Écart final estimé: {final_deviation:.2f} m
-            
-            Recommandations:
-            {recommendations}
-            
-            Rapport généré par l'application "Prédiction de Déviation des Forages Miniers"
-            Auteur: Didier Ouedraogo, P.Geo.
-            """
-            
-            # Créer un bouton de téléchargement
-            st.download_button(
-                label="📄 Télécharger le rapport",
-                data=report_text,
-                file_name=f"rapport_deviation_forage_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                mime="text/plain"
-            )
-
-else:
-    # Message pour guider l'utilisateur si aucune donnée n'est encore chargée
-    if data_option == "Charger mes données" and not st.session_state.columns_mapped and st.session_state.raw_df is None:
-        st.markdown("""
-        <div style="display: flex; flex-direction: column; justify-content: center; align-items: center; height: 70vh; text-align: center;">
-            <div style="font-size: 3rem; margin-bottom: 1rem; color: #E2E8F0;">
-                📊
-            </div>
-            <h2>Bienvenue dans l'application de prédiction de déviation des forages miniers</h2>
-            <p style="max-width: 600px; margin: 1rem auto;">
-                Veuillez charger un fichier CSV depuis la barre latérale pour commencer l'analyse et la modélisation.
-            </p>
-            <div style="background-color: #EBF5FF; padding: 1rem; border-radius: 6px; max-width: 600px; margin-top: 1rem;">
-                <p style="margin: 0; color: #1A56DB;">
-                    <strong>Format attendu</strong>: Un fichier CSV contenant des données sur les paramètres de forage et les déviations mesurées.
-                    Vous pourrez mapper vos colonnes aux données requises par l'application après le chargement.
-                </p>
-            </div>
-            <p style="margin-top: 2rem; color: #718096;">
-                ou sélectionnez "Utiliser données démo" pour explorer l'application avec des données synthétiques.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+import streamlit as st
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.svm import SVR, LinearSVR
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LinearRegression, SGDRegressor
+from sklearn.neural_network import MLPRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from scipy import sparse
+from scipy.interpolate import RegularGridInterpolator
+from scipy.spatial import cKDTree
+from scipy.stats import kstwobign
+import base64
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO, TextIOWrapper
+import joblib
+from joblib import Memory, Parallel, delayed
+import pyarrow as pa
+import pyarrow.parquet as pq
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Initialiser l'état de session pour le suivi de l'entraînement des modèles
+if 'model_trained' not in st.session_state:
+    st.session_state.model_trained = False
+if 'model_azimuth' not in st.session_state:
+    st.session_state.model_azimuth = None
+if 'model_inclinaison' not in st.session_state:
+    st.session_state.model_inclinaison = None
+if 'df' not in st.session_state:
+    st.session_state.df = None
+if 'raw_df' not in st.session_state:
+    st.session_state.raw_df = None
+if 'columns_mapped' not in st.session_state:
+    st.session_state.columns_mapped = False
+
+# Mesures de performance de l'exécution courante (remises à zéro à chaque exécution du script ou d'un fragment)
+st.session_state.mesures_etapes = []
+st.session_state.id_execution = uuid.uuid4().hex[:8]
+debut_execution = time.perf_counter()
+
+# Suivi mémoire optionnel, réglage du serveur (tracemalloc ralentit l'exécution et couvre tout le processus)
+SUIVI_MEMOIRE = os.environ.get('DEVIATION5_SUIVI_MEMOIRE', '0') == '1'
+if SUIVI_MEMOIRE and not tracemalloc.is_tracing():
+    tracemalloc.start()
+if 'residus' not in st.session_state:
+    st.session_state.residus = None
+if 'reference_distribution' not in st.session_state:
+    st.session_state.reference_distribution = None
+if 'forages_planifies' not in st.session_state:
+    st.session_state.forages_planifies = None
+if 'archive_campagne' not in st.session_state:
+    st.session_state.archive_campagne = None
+if 'export_trajectoires' not in st.session_state:
+    st.session_state.export_trajectoires = None
+if 'projet_df' not in st.session_state:
+    st.session_state.projet_df = None
+if 'campagne_active' not in st.session_state:
+    st.session_state.campagne_active = None
+if 'nom_campagne_active' not in st.session_state:
+    st.session_state.nom_campagne_active = None
+if 'modele_actif_id' not in st.session_state:
+    st.session_state.modele_actif_id = None
+# Numéro du modèle actif, incrémenté à chaque changement de modèle (clé stable des résultats qui en dépendent)
+if 'version_modele' not in st.session_state:
+    st.session_state.version_modele = 0
+if 'references_partagees' not in st.session_state:
+    st.session_state.references_partagees = {}
+if 'tache_entrainement' not in st.session_state:
+    st.session_state.tache_entrainement = None
+if 'resultats_entrainement' not in st.session_state:
+    st.session_state.resultats_entrainement = None
+if 'mapping_colonnes' not in st.session_state:
+    st.session_state.mapping_colonnes = None
+if 'comparaison_modeles' not in st.session_state:
+    st.session_state.comparaison_modeles = None
+if 'evaluations_comparaison' not in st.session_state:
+    st.session_state.evaluations_comparaison = {}
+if 'explication_modele' not in st.session_state:
+    st.session_state.explication_modele = None
+if 'grilles_sensibilite' not in st.session_state:
+    st.session_state.grilles_sensibilite = {}
+if 'suivi_direct' not in st.session_state:
+    st.session_state.suivi_direct = None
+if 'raw_leves' not in st.session_state:
+    st.session_state.raw_leves = None
+if 'leves_mapped' not in st.session_state:
+    st.session_state.leves_mapped = False
+if 'leves_desurveyes' not in st.session_state:
+    st.session_state.leves_desurveyes = None
+if 'cibles_leves' not in st.session_state:
+    st.session_state.cibles_leves = None
+if 'raw_intervalles' not in st.session_state:
+    st.session_state.raw_intervalles = None
+if 'intervalles' not in st.session_state:
+    st.session_state.intervalles = None
+if 'segments' not in st.session_state:
+    st.session_state.segments = None
+
+# Configuration de la page
+st.set_page_config(
+    page_title="Prédiction de Déviation des Forages Miniers",
+    page_icon="🔍",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# CSS personnalisé pour un look moderne
+st.markdown("""
+<style>
+    /* Couleurs personnalisées */
+    :root {
+        --primary: #4F8BF9;
+        --secondary: #1E293B;
+        --accent: #FF4B4B;
+        --background: #F8F9FA;
+        --text: #1E293B;
+        --light-text: #64748B;
+        --card: white;
+        --success: #0CCE6B;
+    }
+    
+    /* Corps du document */
+    .main {
+        background-color: var(--background);
+        color: var(--text);
+        font-family: 'Roboto', sans-serif;
+    }
+    
+    /* En-têtes */
+    h1, h2, h3, h4 {
+        color: var(--secondary);
+        font-weight: 700;
+    }
+    
+    h1 {
+        font-size: 2.5rem;
+        margin-bottom: 1.5rem;
+        padding-bottom: 1rem;
+        border-bottom: 2px solid #f0f0f0;
+    }
+    
+    h2 {
+        font-size: 1.8rem;
+        margin-top: 2rem;
+        margin-bottom: 1rem;
+        padding-bottom: 0.5rem;
+        border-bottom: 1px solid #f0f0f0;
+    }
+    
+    h3 {
+        font-size: 1.4rem;
+        margin-top: 1.5rem;
+    }
+    
+    /* Cards */
+    .stDataFrame, .css-1r6slb0, div[data-testid="stBlock"] {
+        background-color: var(--card);
+        border-radius: 10px;
+        padding: 1rem;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.05);
+        margin-bottom: 1.5rem;
+    }
+    
+    /* Widgets */
+    .stButton>button {
+        background-color: var(--primary);
+        color: white;
+        border-radius: 6px;
+        padding: 0.5rem 1.5rem;
+        font-weight: 600;
+        border: none;
+        transition: all 0.3s ease;
+    }
+    
+    .stButton>button:hover {
+        background-color: #3A7BD5;
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
+    }
+
+    .stSidebar .stButton>button {
+        width: 100%;
+    }
+    
+    /* Tabs */
+    .stTabs [data-baseweb="tab-list"] {
+        gap: 12px;
+    }
+    
+    .stTabs [data-baseweb="tab"] {
+        height: 40px;
+        border-radius: 6px 6px 0 0;
+        padding: 0 20px;
+        font-weight: 500;
+    }
+    
+    /* Sidebar */
+    .css-1d391kg, .css-1wrcr25 {
+        background-color: var(--secondary);
+    }
+    
+    .css-1d391kg .css-163ttbj, .css-1wrcr25 .css-163ttbj {
+        color: white;
+    }
+    
+    .css-1d391kg label, .css-1wrcr25 label {
+        color: #E2E8F0;
+    }
+    
+    /* Metrics */
+    [data-testid="stMetricValue"] {
+        font-size: 2rem !important;
+        font-weight: 700 !important;
+        color: var(--primary) !important;
+    }
+    
+    /* Author Banner */
+    .author-banner {
+        background-color: var(--secondary);
+        color: white;
+        padding: 1rem;
+        border-radius: 8px;
+        margin-bottom: 2rem;
+        display: flex;
+        align-items: center;
+        justify-content: space-between;
+    }
+    
+    .author-info {
+        display: flex;
+        flex-direction: column;
+    }
+    
+    .author-name {
+        font-size: 1.2rem;
+        font-weight: 600;
+    }
+    
+    .author-title {
+        font-size: 0.9rem;
+        opacity: 0.8;
+    }
+    
+    /* Status indicators */
+    .status-indicator {
+        display: inline-block;
+        width: 10px;
+        height: 10px;
+        border-radius: 50%;
+        margin-right: 6px;
+    }
+    
+    .status-trained {
+        background-color: var(--success);
+    }
+    
+    .status-untrained {
+        background-color: var(--accent);
+    }
+    
+    /* Info boxes */
+    .info-box {
+        background-color: #E6F0FF;
+        border-left: 4px solid var(--primary);
+        padding: 1rem;
+        border-radius: 4px;
+        margin-bottom: 1rem;
+    }
+    
+    /* Progress bar */
+    .stProgress .st-bo {
+        background-color: var(--primary);
+    }
+    
+    /* Plot styling */
+    .js-plotly-plot {
+        border-radius: 8px;
+        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.05);
+        background-color: white;
+        padding: 1rem;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+# Titre et auteur
+st.markdown("""
+<div class="author-banner">
+    <div class="author-info">
+        <span class="author-name">Prédiction de Déviation des Forages Miniers</span>
+        <span class="author-title">Application de machine learning pour anticiper les déviations</span>
+    </div>
+    <div class="author-info" style="text-align: right;">
+        <span class="author-name">Didier Ouedraogo, P.Geo.</span>
+        <span class="author-title">Géologue & Data Scientist</span>
+    </div>
+</div>
+""", unsafe_allow_html=True)
+
+# Fonction pour créer un icône
+def get_icon_html(icon_name, color="white", size=24):
+    return f'<i class="material-icons" style="color: {color}; font-size: {size}px;">{icon_name}</i>'
+
+# Fonction pour charger les données
+@st.cache_data
+def load_data(file):
+    df = pd.read_csv(file)
+    return df
+
+# Journal structuré (une ligne JSON par étape mesurée)
+journal = logging.getLogger("deviation5")
+if not journal.handlers:
+    gestionnaire_journal = logging.StreamHandler()
+    gestionnaire_journal.setFormatter(logging.Formatter("%(message)s"))
+    journal.addHandler(gestionnaire_journal)
+    journal.setLevel(logging.INFO)
+    journal.propagate = False
+
+# Étapes mesurées en cours dans tout le processus et pic mémoire déjà observé pour chacune: tracemalloc est global,
+# chaque remise à zéro du pic le reporte d'abord sur toutes les étapes en cours (étapes imbriquées, autres sessions)
+_verrou_pics = threading.Lock()
+_pics_etapes = {}
+
+# Fonction pour mesurer la durée (et optionnellement le pic mémoire) d'une étape de l'application
+@contextmanager
+def mesurer_etape(nom, **contexte):
+    jeton = object()
+    suivi_memoire = tracemalloc.is_tracing()
+    if suivi_memoire:
+        with _verrou_pics:
+            memoire_debut, pic = tracemalloc.get_traced_memory()
+            for etape in _pics_etapes:
+                _pics_etapes[etape] = max(_pics_etapes[etape], pic)
+            tracemalloc.reset_peak()
+            _pics_etapes[jeton] = memoire_debut
+    debut = time.perf_counter()
+    
+    try:
+        yield
+    finally:
+        duree = time.perf_counter() - debut
+        
+        mesure = {
+            'execution': st.session_state.get('id_execution'),
+            'etape': nom,
+            'duree_ms': round(duree * 1000, 2),
+            **contexte
+        }
+        
+        if suivi_memoire:
+            # Pic du processus pendant l'étape (sous-étapes et activité simultanée des autres sessions comprises)
+            with _verrou_pics:
+                pic = max(tracemalloc.get_traced_memory()[1], _pics_etapes.pop(jeton))
+            mesure['memoire_pic_mo'] = round(max(pic - memoire_debut, 0) / 1e6, 2)
+        
+        mesures = st.session_state.get('mesures_etapes')
+        if mesures is not None:
+            mesures.append(mesure)
+        journal.info(json.dumps(mesure, ensure_ascii=False, default=str))
+
+# Fonction pour démarrer les mesures d'une exécution de fragment (le script n'est pas relancé: sans cela, les
+# mesures relancées chaque seconde s'accumuleraient sous l'identifiant de la dernière exécution complète)
+def debuter_mesures_fragment():
+    st.session_state.mesures_etapes = []
+    st.session_state.id_execution = uuid.uuid4().hex[:8]
+
+# Cache disque partagé pour le prétraitement des données de modélisation (entrées les moins récemment utilisées
+# supprimées au-delà de la taille maximale)
+TAILLE_MAX_CACHE_PRETRAITEMENT = 2 * 1024 ** 3  # octets
+memoire_pretraitement = Memory(location=os.path.join(tempfile.gettempdir(), "deviation5_cache"), verbose=0)
+
+# Jeton de référence d'une session vers un objet du magasin partagé (sa destruction libère la référence)
+class JetonPartage:
+    __slots__ = ('cle', '__weakref__')
+
+    def __init__(self, cle):
+        self.cle = cle
+
+# Fonction pour estimer l'empreinte mémoire d'un objet partagé
+def taille_en_memoire(objet):
+    if isinstance(objet, pd.DataFrame):
+        return int(objet.memory_usage(index=True, deep=True).sum())
+    if isinstance(objet, np.ndarray):
+        return objet.nbytes
+    if isinstance(objet, (tuple, list)):
+        return sum(taille_en_memoire(element) for element in objet)
+    return len(pickle.dumps(objet, protocol=pickle.HIGHEST_PROTOCOL))
+
+# Magasin partagé entre sessions: jeux de données et modèles dédupliqués par clé de contenu, comptage de références
+class MagasinPartage:
+    def __init__(self):
+        self._verrou = threading.RLock()
+        self._entrees = {}
+
+    # Retourne l'objet partagé et un jeton de référence; fabrique() n'est appelée que si aucune session ne le détient
+    def acquerir(self, cle, fabrique):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                entree['references'] += 1
+
+        if entree is None:
+            # Construction hors verrou: les autres sessions ne sont pas bloquées (la première instance déposée l'emporte)
+            objet = fabrique()
+            taille = taille_en_memoire(objet)
+            with self._verrou:
+                entree = self._entrees.setdefault(cle, {'objet': objet, 'references': 0, 'taille': taille})
+                entree['references'] += 1
+
+        jeton = JetonPartage(cle)
+        weakref.finalize(jeton, self._liberer, cle)
+        return entree['objet'], jeton
+
+    # Libère une référence; l'objet est évincé lorsque plus aucune session ne le détient
+    def _liberer(self, cle):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                entree['references'] -= 1
+                if entree['references'] <= 0:
+                    del self._entrees[cle]
+
+    # Retourne l'objet partagé sans prendre de référence (None s'il n'est détenu par aucune session)
+    def obtenir(self, cle):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            return None if entree is None else entree['objet']
+
+    def statistiques(self):
+        with self._verrou:
+            return pd.DataFrame(
+                [(cle, entree['references'], entree['taille'] / 1e6) for cle, entree in self._entrees.items()],
+                columns=['cle', 'references', 'taille_mo']
+            )
+
+# Fonction pour obtenir le magasin partagé (un seul par processus serveur)
+@st.cache_resource
+def magasin_partage():
+    return MagasinPartage()
+
+# Fonction pour obtenir l'instance partagée d'un objet pour un emplacement de la session courante
+# (les objets partagés sont en lecture seule: toute modification se fait sur une copie)
+def partager(emplacement, cle, fabrique):
+    references = st.session_state.references_partagees
+    actuel = references.get(emplacement)
+    if actuel is None or actuel[0] != cle:
+        # Remplacer l'entrée détruit l'ancien jeton, ce qui libère la référence précédente
+        objet, jeton = magasin_partage().acquerir(cle, fabrique)
+        references[emplacement] = (cle, objet, jeton)
+    return references[emplacement][1]
+
+# Variables utilisées par les modèles
+numeric_features = ['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'vitesse_rotation']
+categorical_features = ['lithologie']
+input_features = ['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'lithologie', 'vitesse_rotation']
+
+# Fonction pour calculer l'empreinte (hash de contenu) d'un DataFrame
+def empreinte_dataframe(df):
+    empreinte = hashlib.sha1()
+    empreinte.update(str(list(df.columns)).encode())
+    empreinte.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return empreinte.hexdigest()[:16]
+
+# Variables de voisinage: déviations des K forages d'entraînement les plus proches du collet,
+# moyennées avec un poids inverse de la distance, et distance moyenne à ces voisins
+K_VOISINS = 8
+COLONNES_COLLETS = ['id_forage', 'collet_est', 'collet_nord']
+VARIABLES_VOISINAGE = ['voisins_deviation_azimuth', 'voisins_deviation_inclinaison', 'voisins_distance']
+
+# Transformateur ajoutant les variables de voisinage (arbre k-d des collets d'entraînement, première étape des pipelines).
+# Un forage n'est jamais son propre voisin (exclusion par id_forage): sa déviation ne fuit pas dans ses variables.
+# Sans collet (ou sans voisin valide), les variables prennent leur moyenne sur l'entraînement.
+class VoisinageForages(BaseEstimator, TransformerMixin):
+    def __init__(self, k=K_VOISINS):
+        self.k = k
+
+    # y: déviations d'azimuth et d'inclinaison des forages d'entraînement (deux colonnes)
+    def fit(self, X, y):
+        self.arbre_ = cKDTree(X[['collet_est', 'collet_nord']].to_numpy(dtype=float))
+        self.ids_ = X['id_forage'].astype(str).to_numpy()
+        self.deviations_ = np.asarray(y, dtype=float)
+        self.moyennes_ = np.nanmean(self._variables(X), axis=0)
+        return self
+
+    def _variables(self, X):
+        variables = np.full((len(X), len(VARIABLES_VOISINAGE)), np.nan)
+        if not {'collet_est', 'collet_nord'} <= set(X.columns):
+            return variables
+        coordonnees = X[['collet_est', 'collet_nord']].to_numpy(dtype=float)
+        lignes = np.isfinite(coordonnees).all(axis=1)
+        
+        # Un voisin de plus que nécessaire: celui qui remplace le forage lui-même s'il fait partie de l'entraînement
+        k = min(self.k + 1, self.arbre_.n)
+        distances, indices = self.arbre_.query(coordonnees[lignes], k=k, workers=-1)
+        distances, indices = distances.reshape(-1, k), indices.reshape(-1, k)
+        valides = np.ones_like(distances, dtype=bool)
+        if 'id_forage' in X.columns:
+            valides &= self.ids_[indices] != X['id_forage'].astype(str).to_numpy()[lignes, None]
+        valides &= np.cumsum(valides, axis=1) <= self.k
+        
+        poids = np.where(valides, 1.0 / np.maximum(distances, 1.0), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variables[lignes, :2] = np.einsum('ij,ijc->ic', poids, self.deviations_[indices]) / poids.sum(axis=1)[:, None]
+            variables[lignes, 2] = np.where(valides, distances, 0.0).sum(axis=1) / valides.sum(axis=1)
+        return variables
+
+    def transform(self, X):
+        variables = self._variables(X)
+        variables = np.where(np.isnan(variables), self.moyennes_, variables)
+        return X.assign(**{nom: variables[:, i] for i, nom in enumerate(VARIABLES_VOISINAGE)})
+
+    # Le script redéfinit la classe à chaque exécution: sérialiser avec la définition courante
+    # (sinon pickle refuse les instances créées lors d'une exécution précédente, ex. modèles en cache)
+    def __reduce__(self):
+        return sys.modules[__name__].reconstruire_voisinage, (self.__getstate__(),)
+
+# Fonction pour recréer un transformateur de voisinage sérialisé avec la définition courante de la classe
+def reconstruire_voisinage(etat):
+    classe = sys.modules[__name__].VoisinageForages
+    voisinage = classe.__new__(classe)
+    voisinage.__setstate__(etat)
+    return voisinage
+
+# Fonction pour indiquer si les collets permettent des variables de voisinage (coordonnées présentes et distinctes)
+def voisinage_disponible(df):
+    return all(colonne in df.columns for colonne in COLONNES_COLLETS) and \
+        len(df[['collet_est', 'collet_nord']].drop_duplicates()) > K_VOISINS
+
+# Fonction pour créer le préprocesseur des modèles
+# ('onehot': variables standardisées et lithologie one-hot; 'ordinal': variables brutes et lithologie codée en entiers
+# pour les modèles à arbres qui gèrent nativement les catégories)
+def creer_preprocesseur(encodage='onehot', variables_numeriques=None):
+    variables_numeriques = numeric_features if variables_numeriques is None else variables_numeriques
+    if encodage == 'ordinal':
+        return ColumnTransformer(
+            transformers=[
+                ('num', 'passthrough', variables_numeriques),
+                ('cat', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan), categorical_features)
+            ])
+    
+    numeric_transformer = Pipeline(steps=[
+        ('scaler', StandardScaler())
+    ])
+    
+    categorical_transformer = Pipeline(steps=[
+        ('onehot', OneHotEncoder(handle_unknown='ignore'))
+    ])
+    
+    return ColumnTransformer(
+        transformers=[
+            ('num', numeric_transformer, variables_numeriques),
+            ('cat', categorical_transformer, categorical_features)
+        ])
+
+# Fonction pour découper les données et ajuster le préprocesseur (mémoïsée sur disque par empreinte, graine et encodage)
+def _preparer_donnees_modele(empreinte, graine, df, encodage='onehot', voisinage=False):
+    X = df[input_features + (COLONNES_COLLETS if voisinage else [])]
+    X_train, X_test, y_azimuth_train, y_azimuth_test, y_inclinaison_train, y_inclinaison_test = train_test_split(
+        X, df['deviation_azimuth'], df['deviation_inclinaison'], test_size=0.2, random_state=graine
+    )
+    
+    # Voisinage construit sur l'entraînement seul: les forages de test n'apportent jamais leur déviation
+    transformateur_voisinage, Xv_train, Xv_test = None, X_train, X_test
+    if voisinage:
+        transformateur_voisinage = VoisinageForages().fit(X_train, np.column_stack([y_azimuth_train, y_inclinaison_train]))
+        Xv_train, Xv_test = transformateur_voisinage.transform(X_train), transformateur_voisinage.transform(X_test)
+    
+    preprocesseur = creer_preprocesseur(encodage, numeric_features + (VARIABLES_VOISINAGE if voisinage else []))
+    Xt_train = preprocesseur.fit_transform(Xv_train)
+    Xt_test = preprocesseur.transform(Xv_test)
+    
+    return {
+        'X_train': X_train, 'X_test': X_test,
+        'y_azimuth_train': y_azimuth_train, 'y_azimuth_test': y_azimuth_test,
+        'y_inclinaison_train': y_inclinaison_train, 'y_inclinaison_test': y_inclinaison_test,
+        'voisinage': transformateur_voisinage, 'preprocesseur': preprocesseur,
+        'Xt_train': Xt_train, 'Xt_test': Xt_test,
+    }
+
+_preparer_donnees_modele_disque = memoire_pretraitement.cache(_preparer_donnees_modele, ignore=['df'])
+
+# Fonction pour obtenir les données prétraitées (cache mémoire au-dessus du cache disque)
+@st.cache_resource(max_entries=8, show_spinner=False)
+def preparer_donnees_modele(empreinte, graine, _df, encodage='onehot', voisinage=False):
+    donnees = _preparer_donnees_modele_disque(empreinte, graine, _df, encodage, voisinage)
+    memoire_pretraitement.reduce_size(bytes_limit=TAILLE_MAX_CACHE_PRETRAITEMENT)
+    return donnees
+
+# Familles de modèles proposées (sélection unitaire et comparaison)
+MODELES_DISPONIBLES = ["Random Forest", "Gradient Boosting", "SVM", "Régression Linéaire", "Réseau de Neurones"]
+
+# Encodage des variables attendu par chaque famille (one-hot par défaut)
+ENCODAGE_MODELES = {"Gradient Boosting": 'ordinal'}
+
+# Fonction pour obtenir l'encodage des variables d'une famille de modèles
+def encodage_modele(model_option):
+    return ENCODAGE_MODELES.get(model_option, 'onehot')
+
+# SVR à noyau approché (Nyström + SVR linéaire) au-delà de ce nombre de lignes d'entraînement:
+# le coût du SVR exact croît de façon quadratique à cubique avec le nombre de lignes
+SEUIL_SVR_APPROCHE = 20000
+COMPOSANTES_NYSTROEM = 300
+ECHANTILLON_CONTROLE_SVR = 5000
+
+# Fonction pour calculer le gamma 'scale' du SVR (1 / (n_variables * variance)), aussi pour les matrices creuses
+def gamma_echelle(X):
+    variance = (X.multiply(X)).mean() - X.mean() ** 2 if sparse.issparse(X) else X.var()
+    return 1.0 / (X.shape[1] * variance) if variance != 0 else 1.0
+
+# Fonction pour créer un SVR à noyau RBF approché (même gamma, C et epsilon que SVR() par défaut)
+def creer_svr_approche(X):
+    return Pipeline(steps=[
+        ('nystroem', Nystroem(kernel='rbf', gamma=gamma_echelle(X), n_components=min(COMPOSANTES_NYSTROEM, X.shape[0]),
+                              random_state=42)),
+        ('svr', LinearSVR(C=1.0, epsilon=0.1, loss='epsilon_insensitive', dual=True, max_iter=5000, random_state=42))
+    ])
+
+# Fonction pour indiquer si le SVM doit être approché pour un jeu d'entraînement de cette taille
+def svr_approche(nombre_lignes):
+    return nombre_lignes > SEUIL_SVR_APPROCHE
+
+# Fonction pour comparer SVR exact et approché sur un sous-échantillon (mêmes lignes d'entraînement et de test)
+def controler_svr_approche(X_train, y_train, X_test, y_test, graine=42):
+    rng = np.random.default_rng(graine)
+    lignes_train = rng.choice(X_train.shape[0], min(ECHANTILLON_CONTROLE_SVR, X_train.shape[0]), replace=False)
+    lignes_test = rng.choice(X_test.shape[0], min(ECHANTILLON_CONTROLE_SVR // 2, X_test.shape[0]), replace=False)
+    Xs_train, ys_train = X_train[lignes_train], np.asarray(y_train)[lignes_train]
+    Xs_test, ys_test = X_test[lignes_test], np.asarray(y_test)[lignes_test]
+    
+    rmse = {}
+    for mode, regresseur in [('exact', SVR()), ('approche', creer_svr_approche(Xs_train))]:
+        regresseur.fit(Xs_train, ys_train)
+        rmse[mode] = np.sqrt(mean_squared_error(ys_test, regresseur.predict(Xs_test)))
+    return {'lignes': len(lignes_train), 'rmse_exact': rmse['exact'], 'rmse_approche': rmse['approche'],
+            'rapport': rmse['approche'] / rmse['exact']}
+
+# Fonction pour créer le régresseur correspondant au modèle choisi
+# (X: matrice d'entraînement, pour les choix qui dépendent de sa taille)
+def creer_regresseur(model_option, X=None):
+    if model_option == "Random Forest":
+        return RandomForestRegressor(n_estimators=100, random_state=42)
+    elif model_option == "Gradient Boosting":
+        # Histogrammes: lithologie (dernières colonnes du préprocesseur ordinal) traitée comme catégorielle,
+        # arrêt anticipé sur 10% des données d'entraînement, arbres construits sur tous les cœurs (OpenMP)
+        n_colonnes = X.shape[1] if X is not None else len(numeric_features) + len(categorical_features)
+        return HistGradientBoostingRegressor(
+            max_iter=500, early_stopping=True, validation_fraction=0.1, n_iter_no_change=10,
+            categorical_features=list(range(n_colonnes - len(categorical_features), n_colonnes)),
+            random_state=42
+        )
+    elif model_option == "SVM":
+        return creer_svr_approche(X) if X is not None and svr_approche(X.shape[0]) else SVR()
+    elif model_option == "Régression Linéaire":
+        return LinearRegression()
+    else:  # Réseau de Neurones
+        return MLPRegressor(hidden_layer_sizes=(100,50), max_iter=1000, random_state=42)
+
+# Règles de contrôle qualité: description et action appliquée lorsque les corrections sont actives
+REGLES_QUALITE = {
+    'valeur_manquante': ("Valeur manquante ou non numérique", "Ligne exclue"),
+    'profondeur_invalide': ("Profondeur finale nulle ou négative", "Ligne exclue"),
+    'azimuth_hors_plage': ("Azimuth initial hors de [0, 360[", "Ramené dans [0, 360["),
+    'inclinaison_positive': ("Inclinaison positive (convention de pendage inversée)", "Signe inversé"),
+    'inclinaison_invalide': ("Inclinaison hors de [-90, 90]", "Ligne exclue"),
+    'vitesse_invalide': ("Vitesse de rotation nulle ou négative", "Ligne exclue"),
+    'deviation_azimuth_hors_plage': ("Déviation d'azimuth hors de [-180, 180[", "Ramenée dans [-180, 180["),
+    'doublon': ("Identifiant de forage en double", "Ligne exclue (première occurrence conservée)"),
+    'aberrant': ("Déviation aberrante pour la lithologie (score robuste > 3.5)", "Ligne exclue"),
+}
+
+# Règles dont les lignes sont exclues du jeu corrigé
+REGLES_EXCLUSION = ['valeur_manquante', 'profondeur_invalide', 'inclinaison_invalide', 'vitesse_invalide', 'doublon']
+
+# Fonction pour calculer un score robuste d'écart à la médiane de chaque groupe (médiane et MAD par groupe)
+def score_robuste_par_groupe(valeurs, groupes):
+    serie = pd.Series(valeurs)
+    ecarts = (serie - serie.groupby(groupes).transform('median')).abs()
+    mad = ecarts.groupby(groupes).transform('median').to_numpy() * 1.4826
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(mad > 0, ecarts.to_numpy() / mad, 0.0)
+
+# Fonction pour contrôler la qualité d'un jeu de forages en une passe vectorisée (masques par règle et corrections)
+def valider_forages(df, corriger=True, exclure_aberrants=False, seuil_aberrant=3.5):
+    colonnes_numeriques = numeric_features + ['deviation_azimuth', 'deviation_inclinaison']
+    valeurs = {colonne: pd.to_numeric(df[colonne], errors='coerce').to_numpy(dtype=float) for colonne in colonnes_numeriques}
+    profondeur, azimuth, inclinaison = valeurs['profondeur_finale'], valeurs['azimuth_initial'], valeurs['inclinaison_initiale']
+    lithologie = df['lithologie'].to_numpy()
+
+    masques = pd.DataFrame({
+        'valeur_manquante': np.isnan(np.column_stack(list(valeurs.values()))).any(axis=1) | pd.isna(lithologie),
+        'profondeur_invalide': profondeur <= 0,
+        'azimuth_hors_plage': (azimuth < 0) | (azimuth >= 360),
+        'inclinaison_positive': (inclinaison > 0) & (inclinaison <= 90),
+        'inclinaison_invalide': np.abs(inclinaison) > 90,
+        'vitesse_invalide': valeurs['vitesse_rotation'] <= 0,
+        'deviation_azimuth_hors_plage': (valeurs['deviation_azimuth'] < -180) | (valeurs['deviation_azimuth'] >= 180),
+        'doublon': df['id_forage'].duplicated().to_numpy(),
+    }, index=df.index)
+
+    # Conventions corrigées avant la détection des valeurs aberrantes
+    azimuth = np.mod(azimuth, 360)
+    inclinaison = np.where(masques['inclinaison_positive'].to_numpy(), -inclinaison, inclinaison)
+    deviation_azimuth = np.where(masques['deviation_azimuth_hors_plage'].to_numpy(),
+                                 np.mod(valeurs['deviation_azimuth'] + 180, 360) - 180, valeurs['deviation_azimuth'])
+
+    # Valeurs aberrantes par lithologie: score robuste (médiane / MAD) sur chacune des deux déviations
+    masques['aberrant'] = np.fmax(
+        score_robuste_par_groupe(deviation_azimuth, lithologie),
+        score_robuste_par_groupe(valeurs['deviation_inclinaison'], lithologie)
+    ) > seuil_aberrant
+
+    regles_exclues = REGLES_EXCLUSION + (['aberrant'] if exclure_aberrants else [])
+    rapport = pd.DataFrame({
+        'Règle': [REGLES_QUALITE[regle][0] for regle in masques.columns],
+        'Lignes concernées': masques.sum().to_numpy(),
+        '% des lignes': (masques.mean().to_numpy() * 100).round(2) if len(masques) else 0.0,
+        'Action': [REGLES_QUALITE[regle][1] if corriger and (regle not in ['aberrant'] or exclure_aberrants) else "Signalé"
+                   for regle in masques.columns],
+    }, index=masques.columns)
+
+    if not corriger:
+        return df, masques, rapport
+
+    donnees = df.assign(
+        profondeur_finale=profondeur,
+        azimuth_initial=azimuth,
+        inclinaison_initiale=inclinaison,
+        vitesse_rotation=valeurs['vitesse_rotation'],
+        deviation_azimuth=deviation_azimuth,
+        deviation_inclinaison=valeurs['deviation_inclinaison'],
+    )
+    return donnees[~masques[regles_exclues].any(axis=1).to_numpy()], masques, rapport
+
+# Fonction pour contrôler la qualité (résultat et empreinte du jeu corrigé calculés une fois pour toutes les sessions)
+def controler_qualite(df, corriger, exclure_aberrants):
+    donnees, masques, rapport = valider_forages(df, corriger, exclure_aberrants)
+    return donnees, masques, rapport, empreinte_dataframe(donnees)
+
+# Exception levée dans une tâche d'entraînement annulée
+class EntrainementAnnule(Exception):
+    pass
+
+# Tâche d'entraînement en arrière-plan (progression et annulation partagées avec la session qui l'a soumise)
+class TacheEntrainement:
+    def __init__(self, model_option, empreinte, donnees_modele, nombre_forages):
+        self.id = uuid.uuid4().hex[:8]
+        self.model_option = model_option
+        self.empreinte = empreinte
+        self.donnees_modele = donnees_modele
+        self.nombre_forages = nombre_forages
+        self.progression = 0.0
+        self.etape = "En attente d'un travailleur"
+        self.detail = ""
+        self.annulation = threading.Event()
+        self.future = None
+        self.debut = time.perf_counter()
+        self.duree_ajustement = None
+        self.controle_svr = None
+        self.source_flux = None
+        self.recuperee = False
+
+    def annuler(self):
+        self.annulation.set()
+
+    @property
+    def terminee(self):
+        return self.future is not None and self.future.done()
+
+    # Clé partagée du régresseur d'une cible (même clé que le magasin partagé entre sessions)
+    def cle_regresseur(self, cible):
+        variante = ":voisinage" if self.donnees_modele is not None and self.donnees_modele.get('voisinage') is not None else ""
+        return f"regresseur:{self.empreinte}:{self.model_option}{variante}:{cible}"
+
+# Fonction pour obtenir la file d'entraînement en arrière-plan (partagée par toutes les sessions)
+@st.cache_resource
+def file_entrainement():
+    # Les arbres de scikit-learn libèrent le GIL: des threads suffisent et évitent de copier les données
+    return ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2), thread_name_prefix="entrainement")
+
+# Fonction pour ajuster un régresseur par incréments (arbres ou époques) en rapportant la progression
+def ajuster_par_increments(regresseur, X, y, rapporter, annulation, pas_arbres=10, pas_iterations=50):
+    if isinstance(regresseur, RandomForestRegressor):
+        # warm_start ajoute des arbres sans refaire les précédents (même forêt qu'un ajustement en une fois)
+        total = regresseur.n_estimators
+        regresseur.set_params(warm_start=True)
+        for n_arbres in list(range(pas_arbres, total, pas_arbres)) + [total]:
+            if annulation.is_set():
+                raise EntrainementAnnule()
+            regresseur.set_params(n_estimators=n_arbres).fit(X, y)
+            rapporter(n_arbres / total, f"{n_arbres}/{total} arbres")
+        return regresseur.set_params(warm_start=False)
+
+    if isinstance(regresseur, HistGradientBoostingRegressor):
+        # Itérations de boosting ajoutées par paquets (même modèle qu'un ajustement en une fois, arrêt anticipé compris)
+        total = regresseur.max_iter
+        regresseur.set_params(warm_start=True)
+        for n_iterations in list(range(pas_iterations, total, pas_iterations)) + [total]:
+            if annulation.is_set():
+                raise EntrainementAnnule()
+            regresseur.set_params(max_iter=n_iterations).fit(X, y)
+            if regresseur.n_iter_ < n_iterations:
+                rapporter(1.0, f"arrêt anticipé après {regresseur.n_iter_} itérations")
+                break
+            rapporter(n_iterations / total, f"{n_iterations}/{total} itérations")
+        return regresseur.set_params(warm_start=False)
+
+    if isinstance(regresseur, MLPRegressor):
+        # Une époque par appel à partial_fit, avec le même critère d'arrêt que fit (tol, n_iter_no_change)
+        meilleure_perte, sans_amelioration = np.inf, 0
+        for epoque in range(1, regresseur.max_iter + 1):
+            if annulation.is_set():
+                raise EntrainementAnnule()
+            regresseur.partial_fit(X, y)
+            sans_amelioration = sans_amelioration + 1 if regresseur.loss_ > meilleure_perte - regresseur.tol else 0
+            meilleure_perte = min(meilleure_perte, regresseur.loss_)
+            rapporter(epoque / regresseur.max_iter, f"époque {epoque}, perte {regresseur.loss_:.4f}")
+            if sans_amelioration > regresseur.n_iter_no_change:
+                break
+        return regresseur
+
+    # Modèles sans ajustement incrémental: une seule étape
+    if annulation.is_set():
+        raise EntrainementAnnule()
+    regresseur.fit(X, y)
+    rapporter(1.0, "terminé")
+    return regresseur
+
+# Fonction exécutée en arrière-plan: ajuste les régresseurs d'azimuth et d'inclinaison
+def executer_entrainement(tache):
+    donnees_modele = tache.donnees_modele
+    regresseurs = {}
+    debut_ajustement = time.perf_counter()
+    for i, (cible, libelle) in enumerate([('azimuth', "d'azimuth"), ('inclinaison', "d'inclinaison")]):
+        tache.etape = f"Entraînement du modèle pour la déviation {libelle}"
+
+        def rapporter(fraction, detail, i=i):
+            tache.progression = (i + fraction) / 2
+            tache.detail = detail
+
+        debut = time.perf_counter()
+        regresseurs[cible] = ajuster_par_increments(
+            creer_regresseur(tache.model_option, donnees_modele['Xt_train']), donnees_modele['Xt_train'],
+            donnees_modele[f'y_{cible}_train'], rapporter, tache.annulation
+        )
+        journal.info(json.dumps({
+            'tache': tache.id, 'etape': "Entraînement", 'cible': cible, 'modele': tache.model_option,
+            'duree_ms': round((time.perf_counter() - debut) * 1000, 2)
+        }, ensure_ascii=False))
+    tache.duree_ajustement = time.perf_counter() - debut_ajustement
+    
+    # SVR approché: mesurer l'écart de précision avec le SVR exact sur un sous-échantillon
+    if tache.model_option == "SVM" and svr_approche(donnees_modele['Xt_train'].shape[0]):
+        tache.etape, tache.detail = "Contrôle du SVR approché", f"SVR exact sur {ECHANTILLON_CONTROLE_SVR} lignes"
+        tache.controle_svr = {}
+        for cible in ['azimuth', 'inclinaison']:
+            if tache.annulation.is_set():
+                raise EntrainementAnnule()
+            tache.controle_svr[cible] = controler_svr_approche(
+                donnees_modele['Xt_train'], donnees_modele[f'y_{cible}_train'],
+                donnees_modele['Xt_test'], donnees_modele[f'y_{cible}_test']
+            )
+    tache.etape = "Évaluation des performances"
+    return regresseurs
+
+# Entraînement en flux: la source est relue bloc par bloc, la mémoire reste bornée quelle que soit sa taille
+TAILLE_BLOC_FLUX = 100_000
+EPOQUES_FLUX = 5
+PROPORTION_TEST_FLUX = 0.2
+ECHANTILLON_TEST_FLUX = 5000
+MODELES_INCREMENTAUX = ["Régression Linéaire", "Réseau de Neurones"]
+# Seuls les fichiers de ce dossier du serveur peuvent être lus en flux (le chemin saisi est relatif à ce dossier)
+DOSSIER_DONNEES_FLUX = os.environ.get(
+    'DEVIATION5_DOSSIER_DONNEES',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'donnees')
+)
+
+# Fonction pour résoudre un chemin saisi dans un dossier autorisé du serveur (None s'il en sort ou n'est pas un fichier)
+def resoudre_chemin_autorise(dossier, chemin):
+    dossier = os.path.realpath(dossier)
+    chemin = os.path.realpath(os.path.join(dossier, chemin))
+    if os.path.commonpath([dossier, chemin]) != dossier or not os.path.isfile(chemin):
+        return None
+    return chemin
+
+# Fonction pour créer un régresseur ajustable par blocs (partial_fit) pour une famille incrémentale
+def creer_regresseur_incremental(model_option):
+    if model_option == "Régression Linéaire":
+        # Moindres carrés par descente de gradient stochastique
+        return SGDRegressor(random_state=42)
+    return MLPRegressor(hidden_layer_sizes=(100,50), random_state=42)
+
+# Fonction pour calculer l'empreinte d'une source en flux (sans la lire: chemin, taille, date ou contenu de la campagne)
+def empreinte_source_flux(source):
+    empreinte = hashlib.sha1(json.dumps(source, sort_keys=True, default=str).encode())
+    if source['type'] == 'csv':
+        etat = os.stat(source['chemin'])
+        empreinte.update(f"{etat.st_size}:{etat.st_mtime_ns}".encode())
+    else:
+        with connexion_projets(source['chemin']) as connexion:
+            empreinte.update(str(connexion.execute(
+                "SELECT COUNT(*), MAX(date_import) FROM forages WHERE campagne_id = ?", (source['campagne_id'],)
+            ).fetchone()).encode())
+    return "flux-" + empreinte.hexdigest()[:16]
+
+# Fonction pour lire une source en flux par blocs de colonnes de l'application, avec l'avancement dans la source
+# (mêmes conversions que le chargement en mémoire: valeurs non numériques et lignes incomplètes écartées)
+def lire_blocs_flux(source, taille_bloc):
+    colonnes = input_features + ['deviation_azimuth', 'deviation_inclinaison']
+    colonnes_numeriques = numeric_features + ['deviation_azimuth', 'deviation_inclinaison']
+    
+    def nettoyer(bloc):
+        if 'lithologie' not in bloc.columns:
+            bloc['lithologie'] = 'Inconnu'
+        for colonne in colonnes_numeriques:
+            bloc[colonne] = pd.to_numeric(bloc[colonne], errors='coerce')
+        bloc[colonnes_numeriques] = bloc[colonnes_numeriques].replace([np.inf, -np.inf], np.nan)
+        bloc = bloc.dropna(subset=colonnes)
+        bloc['lithologie'] = bloc['lithologie'].astype(str)
+        return bloc
+    
+    if source['type'] == 'csv':
+        # Mappage validé pour le fichier chargé (colonne attendue -> colonne source), sinon noms de l'application
+        renommage = {colonne_source: colonne for colonne, colonne_source in (source.get('mapping') or {}).items()
+                     if colonne_source != 'Non disponible'}
+        taille = max(os.path.getsize(source['chemin']), 1)
+        with open(source['chemin'], 'rb') as fichier:
+            blocs = pd.read_csv(fichier, chunksize=taille_bloc,
+                                usecols=lambda colonne: renommage.get(colonne, colonne) in colonnes + ['id_forage'])
+            for bloc in blocs:
+                # Avancement approché par la position de lecture dans le fichier
+                yield nettoyer(bloc.rename(columns=renommage)), min(fichier.tell() / taille, 1.0)
+    else:
+        with connexion_projets(source['chemin']) as connexion:
+            total = connexion.execute("SELECT COUNT(*) FROM forages WHERE campagne_id = ?",
+                                      (source['campagne_id'],)).fetchone()[0] or 1
+            lues = 0
+            for bloc in pd.read_sql_query(
+                f"SELECT id_forage, {', '.join(colonnes)} FROM forages WHERE campagne_id = ?",
+                connexion, params=(source['campagne_id'],), chunksize=taille_bloc
+            ):
+                lues += len(bloc)
+                yield nettoyer(bloc), min(lues / total, 1.0)
+
+# Fonction pour désigner les lignes de test d'un bloc par hachage (identifiant du forage, sinon contenu de la ligne):
+# la même ligne tombe toujours du même côté, quel que soit le découpage en blocs
+def masque_test_flux(bloc):
+    cle = bloc['id_forage'].astype(str) if 'id_forage' in bloc.columns else bloc[input_features]
+    return (pd.util.hash_pandas_object(cle, index=False).to_numpy() % 1000) < PROPORTION_TEST_FLUX * 1000
+
+# Fonction pour construire le préprocesseur à partir des statistiques cumulées (moyennes/variances et lithologies)
+def creer_preprocesseur_flux(echelle, vocabulaire, echantillon):
+    preprocesseur = ColumnTransformer(
+        transformers=[
+            ('num', Pipeline(steps=[('scaler', StandardScaler())]), numeric_features),
+            ('cat', Pipeline(steps=[('onehot', OneHotEncoder(categories=[vocabulaire], handle_unknown='ignore'))]),
+             categorical_features)
+        ])
+    # Ajusté sur un échantillon pour la structure, puis statistiques remplacées par celles de toute la source
+    preprocesseur.fit(echantillon)
+    scaler = preprocesseur.named_transformers_['num'].named_steps['scaler']
+    for attribut in ['mean_', 'var_', 'scale_', 'n_samples_seen_']:
+        setattr(scaler, attribut, getattr(echelle, attribut))
+    return preprocesseur
+
+# Fonction exécutée en arrière-plan: entraînement en flux (statistiques, époques par blocs, évaluation sur le test haché)
+def executer_entrainement_flux(tache):
+    source, taille_bloc = tache.source_flux, tache.source_flux['taille_bloc']
+    nombre_passes = EPOQUES_FLUX + 2
+    
+    def parcourir(passe, libelle):
+        lignes = 0
+        for bloc, avancement in lire_blocs_flux(source, taille_bloc):
+            if tache.annulation.is_set():
+                raise EntrainementAnnule()
+            test = masque_test_flux(bloc)
+            yield bloc[~test], bloc[test]
+            lignes += len(bloc)
+            tache.progression = (passe + avancement) / nombre_passes
+            tache.detail = f"{libelle}: {lignes:,} lignes".replace(",", " ")
+    
+    # Passe 1: moyennes/variances cumulées des variables numériques et vocabulaire des lithologies (entraînement seul)
+    tache.etape = "Lecture en flux: statistiques et lithologies"
+    echelle, vocabulaire, echantillon = StandardScaler(), set(), None
+    n_train = n_test = 0
+    # Référence de dérive: bornes et comptes exacts, échantillon uniforme borné (plus petites clés aléatoires)
+    bornes, comptes_lithologies, reservoir = {}, pd.Series(dtype=float), None
+    rng_reference = np.random.default_rng(0)
+    for train, test in parcourir(0, "statistiques"):
+        if len(train):
+            echelle.partial_fit(train[numeric_features])
+            vocabulaire.update(train['lithologie'].unique())
+            echantillon = train.head(100) if echantillon is None else echantillon
+            for variable in numeric_features:
+                minimum, maximum = bornes.get(variable, (np.inf, -np.inf))
+                bornes[variable] = (min(minimum, train[variable].min()), max(maximum, train[variable].max()))
+            comptes_lithologies = comptes_lithologies.add(train['lithologie'].value_counts(), fill_value=0)
+            tirage = train[input_features].assign(_cle=rng_reference.random(len(train)))
+            reservoir = tirage if reservoir is None else pd.concat([reservoir, tirage])
+            reservoir = reservoir.nsmallest(ECHANTILLON_REFERENCE, '_cle')
+        n_train, n_test = n_train + len(train), n_test + len(test)
+    if n_train == 0 or n_test == 0:
+        raise ValueError("la source ne contient pas assez de lignes complètes pour un entraînement")
+    tache.nombre_forages = n_train + n_test
+    preprocesseur = creer_preprocesseur_flux(echelle, sorted(vocabulaire), echantillon)
+    reference = creer_reference_distribution(reservoir, tache.empreinte, bornes, {'lithologie': comptes_lithologies})
+    reference['n'] = n_train
+    
+    # Passes suivantes: une époque par relecture, lignes mélangées dans chaque bloc
+    regresseurs = {cible: creer_regresseur_incremental(tache.model_option) for cible in ['azimuth', 'inclinaison']}
+    rng = np.random.default_rng(42)
+    debut_ajustement = time.perf_counter()
+    for epoque in range(1, EPOQUES_FLUX + 1):
+        tache.etape = f"Entraînement en flux: époque {epoque}/{EPOQUES_FLUX}"
+        for train, _ in parcourir(epoque, f"époque {epoque}"):
+            if len(train) == 0:
+                continue
+            ordre = rng.permutation(len(train))
+            Xt = preprocesseur.transform(train.iloc[ordre][input_features])
+            for cible, regresseur in regresseurs.items():
+                regresseur.partial_fit(Xt, train[f'deviation_{cible}'].to_numpy()[ordre])
+    tache.duree_ajustement = time.perf_counter() - debut_ajustement
+    
+    # Dernière passe: métriques cumulées sur tout le test haché, échantillon borné pour graphiques et résidus
+    tache.etape = "Évaluation en flux"
+    sommes = {cible: np.zeros(4) for cible in regresseurs}  # n, somme des carrés des erreurs, somme y, somme y²
+    # Échantillon uniforme sur tout le test haché (plus petites clés aléatoires), pas seulement les premiers blocs
+    echantillon_test, forage_exemple = None, None
+    rng_echantillon = np.random.default_rng(1)
+    for _, test in parcourir(EPOQUES_FLUX + 1, "évaluation"):
+        if len(test) == 0:
+            continue
+        forage_exemple = test[input_features].head(1) if forage_exemple is None else forage_exemple
+        Xt = preprocesseur.transform(test[input_features])
+        predictions = {}
+        for cible, regresseur in regresseurs.items():
+            y, predictions[cible] = test[f'deviation_{cible}'].to_numpy(), regresseur.predict(Xt)
+            sommes[cible] += [len(y), np.sum((y - predictions[cible]) ** 2), y.sum(), np.sum(y ** 2)]
+        tirage = pd.DataFrame({
+            **{variable: test[variable].to_numpy() for variable in input_features},
+            **{f'y_{cible}_test': test[f'deviation_{cible}'].to_numpy() for cible in regresseurs},
+            **{f'y_{cible}_pred': predictions[cible] for cible in regresseurs},
+            '_cle': rng_echantillon.random(len(test)),
+        })
+        echantillon_test = tirage if echantillon_test is None else pd.concat([echantillon_test, tirage])
+        echantillon_test = echantillon_test.nsmallest(ECHANTILLON_TEST_FLUX, '_cle')
+    
+    metriques = {}
+    for cible, (n, sce, somme, somme_carres) in sommes.items():
+        metriques[f'{cible}_rmse'] = np.sqrt(sce / n)
+        metriques[f'{cible}_r2'] = 1 - sce / (somme_carres - somme ** 2 / n)
+    
+    return {
+        'regresseurs': regresseurs, 'preprocesseur': preprocesseur, 'metriques': metriques,
+        'echantillon_test': echantillon_test.drop(columns='_cle').reset_index(drop=True), 'forage_exemple': forage_exemple,
+        'n_train': n_train, 'n_test': n_test, 'reference': reference,
+    }
+
+# Fonction pour soumettre un entraînement en flux (source: dict type/chemin/mapping ou campagne, taille_bloc)
+def soumettre_entrainement_flux(model_option, source):
+    tache = TacheEntrainement(model_option, empreinte_source_flux(source), None, None)
+    tache.source_flux = source
+    tache.future = file_entrainement().submit(executer_entrainement_flux, tache)
+    return tache
+
+# Fonction pour évaluer un entraînement en flux terminé (métriques déjà cumulées sur tout le test haché)
+def evaluer_entrainement_flux(tache):
+    resultat = tache.future.result()
+    regresseur_azimuth = partager('regresseur_azimuth', tache.cle_regresseur('azimuth'), lambda: resultat['regresseurs']['azimuth'])
+    regresseur_inclinaison = partager('regresseur_inclinaison', tache.cle_regresseur('inclinaison'), lambda: resultat['regresseurs']['inclinaison'])
+    
+    model_azimuth = Pipeline(steps=[('preprocessor', resultat['preprocesseur']), ('regressor', regresseur_azimuth)])
+    model_inclinaison = Pipeline(steps=[('preprocessor', resultat['preprocesseur']), ('regressor', regresseur_inclinaison)])
+    
+    # Latence d'une prédiction unitaire sur données brutes, médiane de 5 appels
+    echantillon = resultat['echantillon_test']
+    durees = []
+    for _ in range(5):
+        debut = time.perf_counter()
+        model_azimuth.predict(resultat['forage_exemple'])
+        model_inclinaison.predict(resultat['forage_exemple'])
+        durees.append(time.perf_counter() - debut)
+    
+    return {
+        'model_option': tache.model_option,
+        'empreinte': tache.empreinte,
+        'nombre_forages': tache.nombre_forages,
+        'model_azimuth': model_azimuth, 'model_inclinaison': model_inclinaison,
+        'X_test': echantillon[input_features],
+        'reference': resultat['reference'],
+        'y_azimuth_test': echantillon['y_azimuth_test'], 'y_azimuth_pred': echantillon['y_azimuth_pred'].to_numpy(),
+        'y_inclinaison_test': echantillon['y_inclinaison_test'], 'y_inclinaison_pred': echantillon['y_inclinaison_pred'].to_numpy(),
+        'residus': pd.DataFrame({
+            'lithologie': echantillon['lithologie'],
+            'residu_azimuth': echantillon['y_azimuth_test'] - echantillon['y_azimuth_pred'],
+            'residu_inclinaison': echantillon['y_inclinaison_test'] - echantillon['y_inclinaison_pred']
+        }),
+        'metriques': resultat['metriques'],
+        'duree_ajustement_s': tache.duree_ajustement,
+        'controle_svr': None,
+        'flux': {'n_train': resultat['n_train'], 'n_test': resultat['n_test'], 'taille_bloc': tache.source_flux['taille_bloc']},
+        'latence_ms': float(np.median(durees)) * 1000,
+        'taille_mo': taille_en_memoire((regresseur_azimuth, regresseur_inclinaison)) / 1e6,
+    }
+
+# Fonction pour soumettre un entraînement (réutilise les régresseurs déjà ajustés par une autre session)
+def soumettre_entrainement(model_option, empreinte, donnees_modele, nombre_forages):
+    tache = TacheEntrainement(model_option, empreinte, donnees_modele, nombre_forages)
+    deja_ajustes = {cible: magasin_partage().obtenir(tache.cle_regresseur(cible)) for cible in ['azimuth', 'inclinaison']}
+    if all(regresseur is not None for regresseur in deja_ajustes.values()):
+        tache.future = Future()
+        tache.future.set_result(deja_ajustes)
+        tache.progression, tache.etape = 1.0, "Modèle déjà entraîné par une autre session"
+    else:
+        tache.future = file_entrainement().submit(executer_entrainement, tache)
+    return tache
+
+# Fonction pour évaluer un entraînement terminé sur le jeu de test (pipelines, métriques, latence, taille)
+def evaluer_entrainement(tache, emplacement='regresseur'):
+    regresseurs = tache.future.result()
+    donnees_modele = tache.donnees_modele
+    
+    # Les régresseurs rejoignent le magasin partagé (une instance déjà détenue par une autre session l'emporte)
+    regresseur_azimuth = partager(f'{emplacement}_azimuth', tache.cle_regresseur('azimuth'), lambda: regresseurs['azimuth'])
+    regresseur_inclinaison = partager(f'{emplacement}_inclinaison', tache.cle_regresseur('inclinaison'), lambda: regresseurs['inclinaison'])
+    
+    with mesurer_etape("Prédiction", jeu="test", modele=tache.model_option):
+        y_azimuth_pred = regresseur_azimuth.predict(donnees_modele['Xt_test'])
+        y_inclinaison_pred = regresseur_inclinaison.predict(donnees_modele['Xt_test'])
+    y_azimuth_test, y_inclinaison_test = donnees_modele['y_azimuth_test'], donnees_modele['y_inclinaison_test']
+    
+    # Pipelines complets (voisinage et préprocesseur déjà ajustés) pour les prédictions sur données brutes
+    etapes = [('voisinage', donnees_modele['voisinage'])] if donnees_modele['voisinage'] is not None else []
+    model_azimuth = Pipeline(steps=etapes + [
+        ('preprocessor', donnees_modele['preprocesseur']),
+        ('regressor', regresseur_azimuth)
+    ])
+    model_inclinaison = Pipeline(steps=etapes + [
+        ('preprocessor', donnees_modele['preprocesseur']),
+        ('regressor', regresseur_inclinaison)
+    ])
+    
+    with mesurer_etape("Évaluation", modele=tache.model_option):
+        metriques = {
+            'azimuth_rmse': np.sqrt(mean_squared_error(y_azimuth_test, y_azimuth_pred)),
+            'azimuth_r2': r2_score(y_azimuth_test, y_azimuth_pred),
+            'inclinaison_rmse': np.sqrt(mean_squared_error(y_inclinaison_test, y_inclinaison_pred)),
+            'inclinaison_r2': r2_score(y_inclinaison_test, y_inclinaison_pred),
+        }
+        
+        # Latence d'une prédiction unitaire sur données brutes (comme la section Prédiction), médiane de 5 appels
+        forage = donnees_modele['X_test'].iloc[:1]
+        durees = []
+        for _ in range(5):
+            debut = time.perf_counter()
+            model_azimuth.predict(forage)
+            model_inclinaison.predict(forage)
+            durees.append(time.perf_counter() - debut)
+    
+    return {
+        'model_option': tache.model_option,
+        'empreinte': tache.empreinte,
+        'nombre_forages': tache.nombre_forages,
+        'model_azimuth': model_azimuth, 'model_inclinaison': model_inclinaison,
+        'X_test': donnees_modele['X_test'],
+        'reference': creer_reference_distribution(donnees_modele['X_train'], tache.empreinte),
+        'y_azimuth_test': y_azimuth_test, 'y_azimuth_pred': y_azimuth_pred,
+        'y_inclinaison_test': y_inclinaison_test, 'y_inclinaison_pred': y_inclinaison_pred,
+        'residus': pd.DataFrame({
+            'lithologie': donnees_modele['X_test']['lithologie'].values,
+            'residu_azimuth': y_azimuth_test.values - y_azimuth_pred,
+            'residu_inclinaison': y_inclinaison_test.values - y_inclinaison_pred
+        }),
+        'metriques': metriques,
+        'duree_ajustement_s': tache.duree_ajustement,
+        'controle_svr': tache.controle_svr,
+        'latence_ms': float(np.median(durees)) * 1000,
+        'taille_mo': taille_en_memoire((regresseur_azimuth, regresseur_inclinaison)) / 1e6,
+    }
+
+# Fonction pour faire d'un modèle évalué le modèle actif de la session (prédictions, Monte Carlo, projet)
+def activer_modele(evaluation):
+    # Stocker les modèles dans la session state
+    st.session_state.model_azimuth = evaluation['model_azimuth']
+    st.session_state.model_inclinaison = evaluation['model_inclinaison']
+    st.session_state.model_trained = True
+    st.session_state.version_modele += 1
+    
+    # Conserver les résidus de test par lithologie pour les simulations Monte Carlo
+    st.session_state.residus = evaluation['residus']
+    
+    # Distribution d'entraînement de référence pour la surveillance de dérive des nouveaux lots
+    st.session_state.reference_distribution = evaluation['reference']
+    
+    # Enregistrer le modèle dans la campagne active (métadonnées, pipelines et résidus)
+    st.session_state.modele_actif_id = None
+    if st.session_state.campagne_active is not None and chemin_projets:
+        with mesurer_etape("Projet", operation="enregistrement du modèle"):
+            st.session_state.modele_actif_id = enregistrer_modele(
+                chemin_projets, st.session_state.campagne_active, evaluation['model_option'], evaluation['empreinte'],
+                evaluation['nombre_forages'], evaluation['metriques'],
+                {'azimuth': evaluation['model_azimuth'], 'inclinaison': evaluation['model_inclinaison'],
+                 'residus': evaluation['residus'], 'reference': evaluation['reference']}
+            )
+    
+    st.session_state.resultats_entrainement = {
+        'model_option': evaluation['model_option'],
+        'X_test': evaluation['X_test'],
+        'y_azimuth_test': evaluation['y_azimuth_test'], 'y_azimuth_pred': evaluation['y_azimuth_pred'],
+        'y_inclinaison_test': evaluation['y_inclinaison_test'], 'y_inclinaison_pred': evaluation['y_inclinaison_pred'],
+        'controle_svr': evaluation['controle_svr'],
+        'flux': evaluation.get('flux'),
+        **evaluation['metriques'],
+    }
+
+# Fonction pour intégrer un entraînement terminé dans la session (modèles, résidus, métriques, projet)
+def recuperer_entrainement(tache):
+    tache.recuperee = True
+    erreur = tache.future.exception()
+    if isinstance(erreur, EntrainementAnnule):
+        st.toast("Entraînement annulé.")
+        return
+    if erreur is not None:
+        st.error(f"❌ L'entraînement a échoué: {erreur}")
+        return
+    
+    activer_modele(evaluer_entrainement_flux(tache) if tache.source_flux is not None else evaluer_entrainement(tache))
+
+# Fonction pour lancer la comparaison de tous les modèles sur le même découpage (tâches concurrentes)
+def soumettre_comparaison(empreinte, df, voisinage=False):
+    return {
+        model_option: soumettre_entrainement(
+            model_option, empreinte, preparer_donnees_modele(empreinte, 42, df, encodage_modele(model_option), voisinage),
+            len(df)
+        )
+        for model_option in MODELES_DISPONIBLES
+    }
+
+# Fonction pour intégrer les modèles terminés d'une comparaison et mettre à jour le classement
+def recuperer_comparaison(comparaison):
+    evaluations = st.session_state.evaluations_comparaison
+    for model_option, tache in comparaison.items():
+        if not tache.terminee or tache.recuperee:
+            continue
+        tache.recuperee = True
+        erreur = tache.future.exception()
+        if erreur is None:
+            evaluations[model_option] = evaluer_entrainement(tache, emplacement=f'comparaison_{model_option}')
+        else:
+            evaluations[model_option] = {'model_option': model_option,
+                                         'erreur': "annulé" if isinstance(erreur, EntrainementAnnule) else str(erreur)}
+
+# Fonction pour construire le tableau de classement des modèles comparés (meilleur R² moyen en tête)
+def classement_modeles(evaluations):
+    lignes = []
+    for model_option, evaluation in evaluations.items():
+        if 'erreur' in evaluation:
+            lignes.append({'Modèle': model_option, 'Statut': evaluation['erreur']})
+            continue
+        metriques = evaluation['metriques']
+        lignes.append({
+            'Modèle': model_option,
+            'RMSE azimuth (°)': metriques['azimuth_rmse'],
+            'R² azimuth': metriques['azimuth_r2'],
+            'RMSE inclinaison (°)': metriques['inclinaison_rmse'],
+            'R² inclinaison': metriques['inclinaison_r2'],
+            'R² moyen': (metriques['azimuth_r2'] + metriques['inclinaison_r2']) / 2,
+            'Ajustement (s)': evaluation['duree_ajustement_s'],
+            'Latence (ms)': evaluation['latence_ms'],
+            'Taille (Mo)': evaluation['taille_mo'],
+            'Statut': "terminé (Nyström)" if evaluation['controle_svr'] else "terminé",
+        })
+    classement = pd.DataFrame(lignes)
+    if 'R² moyen' in classement.columns:
+        classement = classement.sort_values('R² moyen', ascending=False, na_position='last')
+    return classement.reset_index(drop=True)
+
+# Explications indépendantes de la famille: importance par permutation et dépendance partielle sur les variables brutes
+ECHANTILLON_EXPLICATION = 2000
+REPETITIONS_PERMUTATION = 5
+POINTS_DEPENDANCE = 20
+LIGNES_PAR_LOT_EXPLICATION = 20000
+
+# Fonction pour regrouper les colonnes brutes permutées ensemble (la lithologie reste une seule variable)
+def groupes_explication(X):
+    groupes = {variable: [variable] for variable in input_features}
+    if set(COLONNES_COLLETS[1:]) <= set(X.columns):
+        groupes['position du collet'] = COLONNES_COLLETS[1:]
+    return groupes
+
+# Fonction pour prédire un grand lot de lignes brutes en parallèle (découpé par cible et par tranche de lignes)
+def predire_par_lots(modeles, X):
+    tranches = [X.iloc[debut:debut + LIGNES_PAR_LOT_EXPLICATION] for debut in range(0, len(X), LIGNES_PAR_LOT_EXPLICATION)]
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        futures = {cible: [pool.submit(modele.predict, tranche) for tranche in tranches] for cible, modele in modeles.items()}
+        return {cible: np.concatenate([future.result() for future in liste]) for cible, liste in futures.items()}
+
+# Fonction pour calculer la hausse de RMSE quand chaque groupe de variables est permuté (une seule prédiction groupée)
+def importance_permutation(modeles, X, y, repetitions=REPETITIONS_PERMUTATION, graine=42):
+    rng = np.random.default_rng(graine)
+    groupes = groupes_explication(X)
+    copies = [X]
+    for colonnes in groupes.values():
+        for _ in range(repetitions):
+            copie = X.copy()
+            copie[colonnes] = X[colonnes].to_numpy()[rng.permutation(len(X))]
+            copies.append(copie)
+    predictions = predire_par_lots(modeles, pd.concat(copies, ignore_index=True))
+
+    lignes = []
+    for cible, prediction in predictions.items():
+        erreurs = prediction.reshape(len(copies), len(X)) - np.asarray(y[cible])[None, :]
+        rmse = np.sqrt((erreurs ** 2).mean(axis=1))
+        hausses = (rmse[1:] - rmse[0]).reshape(len(groupes), repetitions)
+        for variable, hausse in zip(groupes, hausses):
+            lignes.append({'cible': cible, 'variable': variable, 'hausse_rmse': hausse.mean(), 'ecart_type': hausse.std()})
+    return pd.DataFrame(lignes)
+
+# Fonction pour calculer la dépendance partielle de chaque variable (moyenne des prédictions à valeur imposée)
+def dependance_partielle(modeles, X, points=POINTS_DEPENDANCE):
+    copies, grille = [], []
+    for variable in input_features:
+        if variable in categorical_features:
+            valeurs = sorted(X[variable].unique())
+        else:
+            valeurs = np.unique(np.quantile(X[variable], np.linspace(0.05, 0.95, points)))
+        for valeur in valeurs:
+            copies.append(X.assign(**{variable: valeur}))
+            grille.append((variable, valeur))
+    predictions = predire_par_lots(modeles, pd.concat(copies, ignore_index=True))
+
+    dependance = pd.DataFrame(grille, columns=['variable', 'valeur'])
+    for cible, prediction in predictions.items():
+        dependance[cible] = prediction.reshape(len(copies), len(X)).mean(axis=1)
+    return dependance
+
+# Fonction pour expliquer un modèle sur un échantillon borné de son jeu de test
+def expliquer_modele(modeles, X_test, y_test, graine=42):
+    rng = np.random.default_rng(graine)
+    lignes = np.sort(rng.choice(len(X_test), min(ECHANTILLON_EXPLICATION, len(X_test)), replace=False))
+    X = X_test.iloc[lignes].reset_index(drop=True)
+    y = {cible: np.asarray(valeurs)[lignes] for cible, valeurs in y_test.items()}
+    return {
+        'importance': importance_permutation(modeles, X, y, graine=graine),
+        'dependance': dependance_partielle(modeles, X),
+        'nombre_lignes': len(X),
+    }
+
+# Surveillance de dérive: distribution de référence des variables d'entraînement comparée aux nouveaux lots
+QUANTILES_REFERENCE = np.linspace(0, 1, 101)
+ECHANTILLON_REFERENCE = 20000
+ECHANTILLON_KS = 50000
+SEUILS_PSI = (0.1, 0.25)  # dérive modérée, dérive forte
+SEUIL_P_KS = 0.01
+TOLERANCE_DOMAINE = 0.05  # marge autour des bornes d'entraînement, en part de l'étendue
+PART_HORS_DOMAINE_FORTE = 0.01
+
+# Fonction pour résumer la distribution d'entraînement (quantiles, déciles, bornes et proportions des catégories)
+def creer_reference_distribution(X, empreinte=None, bornes=None, comptes_categories=None):
+    reference = {'empreinte': empreinte, 'n': len(X), 'numeriques': {}, 'categories': {}}
+    for variable in numeric_features:
+        valeurs = X[variable].to_numpy(dtype=float)
+        quantiles = np.quantile(valeurs, QUANTILES_REFERENCE)
+        bords = np.unique(quantiles[10:100:10])
+        minimum, maximum = (bornes or {}).get(variable, (quantiles[0], quantiles[-1]))
+        marge = TOLERANCE_DOMAINE * (maximum - minimum)
+        reference['numeriques'][variable] = {
+            'quantiles': quantiles, 'bords': bords, 'min': float(minimum), 'max': float(maximum),
+            'min_tolere': float(minimum - marge), 'max_tolere': float(maximum + marge),
+            'proportions': np.bincount(np.searchsorted(bords, valeurs, side='right'), minlength=len(bords) + 1) / len(valeurs),
+        }
+    for variable in categorical_features:
+        comptes = (comptes_categories or {}).get(variable)
+        comptes = pd.Series(comptes) if comptes is not None else X[variable].value_counts()
+        reference['categories'][variable] = (comptes / comptes.sum()).to_dict()
+    return reference
+
+# Fonction pour calculer l'indice de stabilité de population entre deux jeux de proportions
+def indice_stabilite(proportions_reference, proportions_lot, plancher=1e-4):
+    reference, lot = np.maximum(proportions_reference, plancher), np.maximum(proportions_lot, plancher)
+    return float(np.sum((lot - reference) * np.log(lot / reference)))
+
+# Fonction pour calculer la statistique de Kolmogorov-Smirnov contre la fonction de répartition de référence
+def statistique_ks(quantiles_reference, n_reference, valeurs, graine=42):
+    if len(valeurs) > ECHANTILLON_KS:
+        valeurs = np.random.default_rng(graine).choice(valeurs, ECHANTILLON_KS, replace=False)
+    valeurs = np.sort(valeurs)
+    repartition = np.interp(valeurs, quantiles_reference, QUANTILES_REFERENCE)
+    n = len(valeurs)
+    d = max(np.max(np.arange(1, n + 1) / n - repartition), np.max(repartition - np.arange(n) / n))
+    n_effectif = n * n_reference / (n + n_reference)
+    return float(d), float(kstwobign.sf(d * np.sqrt(n_effectif)))
+
+# Fonction pour mesurer la dérive d'un lot par variable (PSI, KS, hors plage et catégories inconnues)
+def rapport_derive(reference, X):
+    lignes = []
+    for variable, ref in reference['numeriques'].items():
+        valeurs = X[variable].dropna().to_numpy(dtype=float)
+        if len(valeurs) == 0:
+            continue
+        proportions = np.bincount(np.searchsorted(ref['bords'], valeurs, side='right'), minlength=len(ref['bords']) + 1) / len(valeurs)
+        ks, p_valeur = statistique_ks(ref['quantiles'], reference['n'], valeurs)
+        lignes.append({
+            'variable': variable, 'psi': indice_stabilite(ref['proportions'], proportions), 'ks': ks, 'p_ks': p_valeur,
+            'hors_plage': float(np.mean((valeurs < ref['min_tolere']) | (valeurs > ref['max_tolere']))),
+            'min_lot': valeurs.min(), 'max_lot': valeurs.max(),
+            'min_entrainement': ref['min'], 'max_entrainement': ref['max'], 'inconnues': "",
+        })
+    for variable, ref in reference['categories'].items():
+        comptes = X[variable].value_counts(normalize=True)
+        categories = sorted(set(ref) | set(comptes.index))
+        inconnues = [categorie for categorie in comptes.index if categorie not in ref]
+        lignes.append({
+            'variable': variable,
+            'psi': indice_stabilite(np.array([ref.get(c, 0.0) for c in categories]), comptes.reindex(categories, fill_value=0.0).to_numpy()),
+            'hors_plage': float(comptes[inconnues].sum()), 'inconnues': ", ".join(map(str, inconnues)),
+        })
+    rapport = pd.DataFrame(lignes)
+    # Une catégorie jamais vue est toujours une dérive forte; quelques valeurs hors domaine, une dérive modérée
+    rapport['statut'] = np.select(
+        [(rapport['inconnues'] != "") | (rapport['hors_plage'] >= PART_HORS_DOMAINE_FORTE) | (rapport['psi'] >= SEUILS_PSI[1]),
+         (rapport['hors_plage'] > 0) | (rapport['psi'] >= SEUILS_PSI[0]) | (rapport['p_ks'].fillna(1.0) < SEUIL_P_KS)],
+        ["forte", "modérée"], "stable"
+    )
+    return rapport
+
+# Fonction pour signaler, ligne par ligne, les valeurs hors du domaine couvert par l'entraînement (marge comprise)
+def signaler_hors_distribution(reference, X):
+    alertes = pd.Series("", index=X.index)
+    for variable, ref in reference['numeriques'].items():
+        valeurs = X[variable]
+        alertes = alertes.mask(valeurs < ref['min_tolere'], alertes + f"{variable} < {ref['min']:.4g}; ")
+        alertes = alertes.mask(valeurs > ref['max_tolere'], alertes + f"{variable} > {ref['max']:.4g}; ")
+    for variable, ref in reference['categories'].items():
+        alertes = alertes.mask(~X[variable].isin(list(ref)), alertes + f"{variable} inconnue; ")
+    return alertes.str.rstrip("; ")
+
+# Fonction pour mesurer la dérive d'un lot une seule fois par couple (référence, lot)
+@st.cache_data(max_entries=32, show_spinner=False)
+def rapport_derive_lot(empreinte_lot, reference, _X):
+    return rapport_derive(reference, _X)
+
+# Analyse de sensibilité: prédictions précalculées sur une grille régulière par lithologie, lues par interpolation
+VARIABLES_SENSIBILITE = ['vitesse_rotation', 'profondeur_finale', 'inclinaison_initiale']
+POINTS_GRILLE_SENSIBILITE = 15
+RESOLUTION_SURFACE = 60
+
+# Fonction pour borner les axes de la grille (domaine d'entraînement du modèle, sinon étendue des données)
+def bornes_sensibilite(df, reference=None):
+    bornes = {}
+    for variable in VARIABLES_SENSIBILITE:
+        if reference is not None:
+            minimum, maximum = reference['numeriques'][variable]['min'], reference['numeriques'][variable]['max']
+        else:
+            minimum, maximum = float(df[variable].min()), float(df[variable].max())
+        bornes[variable] = (minimum, maximum if maximum > minimum else minimum + 1.0)
+    return bornes
+
+# Fonction pour prédire toute la grille de sensibilité en un seul appel groupé (autres variables fixées)
+def calculer_grille_sensibilite(modeles, lithologies, bornes, fixes, points=POINTS_GRILLE_SENSIBILITE):
+    axes = [np.linspace(*bornes[variable], points) for variable in VARIABLES_SENSIBILITE]
+    maillage = pd.DataFrame({variable: valeurs.ravel()
+                             for variable, valeurs in zip(VARIABLES_SENSIBILITE, np.meshgrid(*axes, indexing='ij'))})
+    X = pd.concat([maillage.assign(lithologie=lithologie, **fixes) for lithologie in lithologies], ignore_index=True)
+    predictions = predire_par_lots(modeles, X)
+    forme = (len(lithologies),) + (points,) * len(VARIABLES_SENSIBILITE)
+    return {'axes': axes, 'lithologies': list(lithologies),
+            'valeurs': {cible: prediction.reshape(forme) for cible, prediction in predictions.items()}}
+
+# Fonction pour lire la grille de sensibilité en des points quelconques (interpolation multilinéaire)
+def interpoler_sensibilite(grille, cible, lithologie, points):
+    valeurs = grille['valeurs'][cible][grille['lithologies'].index(lithologie)]
+    return RegularGridInterpolator(grille['axes'], valeurs, bounds_error=False, fill_value=None)(points)
+
+# Fonction pour afficher un rapport de dérive (résumé des variables touchées et tableau par variable)
+def afficher_rapport_derive(rapport):
+    fortes = rapport.loc[rapport['statut'] == "forte", 'variable'].tolist()
+    moderees = rapport.loc[rapport['statut'] == "modérée", 'variable'].tolist()
+    if fortes:
+        st.warning(f"⚠️ Dérive forte par rapport aux données d'entraînement: {', '.join(fortes)}. "
+                   "Les prédictions sur ces valeurs sont des extrapolations.")
+    elif moderees:
+        st.info(f"ℹ️ Dérive modérée par rapport aux données d'entraînement: {', '.join(moderees)}.")
+    else:
+        st.success("✅ Distribution conforme aux données d'entraînement.")
+    st.dataframe(
+        rapport.rename(columns={
+            'variable': 'Variable', 'psi': 'PSI', 'ks': 'KS', 'p_ks': 'p-valeur KS', 'hors_plage': 'Part hors domaine',
+            'min_lot': 'Min lot', 'max_lot': 'Max lot', 'min_entrainement': 'Min entraînement',
+            'max_entrainement': 'Max entraînement', 'inconnues': 'Catégories inconnues', 'statut': 'Statut'
+        }).round(3),
+        use_container_width=True
+    )
+
+# Fonction pour calculer des trajectoires en bloc (une ligne par forage ou par simulation)
+def calculer_trajectoires(prof_finale, azimuth_initial, inclinaison_initiale, azimuth_final, inclinaison_final, num_points=100):
+    # Tous les paramètres sont diffusés en colonnes: on obtient des tableaux 2-D (n_trajectoires x num_points)
+    prof_finale = np.atleast_1d(np.asarray(prof_finale, dtype=float))[:, None]
+    azimuth_initial = np.atleast_1d(np.asarray(azimuth_initial, dtype=float))[:, None]
+    inclinaison_initiale = np.atleast_1d(np.asarray(inclinaison_initiale, dtype=float))[:, None]
+    azimuth_final = np.atleast_1d(np.asarray(azimuth_final, dtype=float))[:, None]
+    inclinaison_final = np.atleast_1d(np.asarray(inclinaison_final, dtype=float))[:, None]
+
+    # Interpolation linéaire entre les angles initiaux et finaux
+    t = np.linspace(0, 1, num_points)[None, :]
+    depths = prof_finale * t
+    azimuth_rad = np.radians(azimuth_initial + (azimuth_final - azimuth_initial) * t)
+    inclination_rad = np.radians(inclinaison_initiale + (inclinaison_final - inclinaison_initiale) * t)
+
+    # x pointe vers l'est, y vers le nord, z vers le haut (z négatif car l'inclinaison est négative)
+    x = depths * np.cos(inclination_rad) * np.sin(azimuth_rad)
+    y = depths * np.cos(inclination_rad) * np.cos(azimuth_rad)
+    z = depths * np.sin(inclination_rad)
+
+    return np.broadcast_to(depths, x.shape), x, y, z
+
+# Fonction pour simuler l'enveloppe d'incertitude d'une trajectoire (Monte Carlo)
+@st.cache_data(max_entries=32)
+def simuler_enveloppe_monte_carlo(prof_finale, azimuth_initial, inclinaison_initiale,
+                                  deviation_azimuth, deviation_inclinaison,
+                                  residus_azimuth, residus_inclinaison,
+                                  n_simulations=2000, num_points=100, seed=42):
+    rng = np.random.default_rng(seed)
+
+    # Rééchantillonnage des résidus par paires pour conserver la corrélation azimuth/inclinaison
+    tirages = rng.integers(0, len(residus_azimuth), n_simulations)
+    dev_az = deviation_azimuth + np.asarray(residus_azimuth)[tirages]
+    dev_inc = deviation_inclinaison + np.asarray(residus_inclinaison)[tirages]
+    inclinaison_final = np.clip(inclinaison_initiale + dev_inc, -90, 0)
+
+    # Toutes les simulations sont calculées d'un seul bloc
+    depths, x, y, z = calculer_trajectoires(
+        np.full(n_simulations, prof_finale), azimuth_initial, inclinaison_initiale,
+        azimuth_initial + dev_az, inclinaison_final, num_points
+    )
+
+    # Trajectoire médiane et rayons de l'enveloppe à chaque profondeur
+    centre_x, centre_y, centre_z = np.median(x, axis=0), np.median(y, axis=0), np.median(z, axis=0)
+    distances = np.sqrt((x - centre_x)**2 + (y - centre_y)**2 + (z - centre_z)**2)
+    rayon_p50, rayon_p90 = np.percentile(distances, [50, 90], axis=0)
+
+    # Distribution de l'écart final par rapport à la trajectoire idéale
+    _, x_ideal, y_ideal, z_ideal = calculer_trajectoires(prof_finale, azimuth_initial, inclinaison_initiale,
+                                                         azimuth_initial, inclinaison_initiale, 2)
+    ecarts_finaux = np.sqrt((x[:, -1] - x_ideal[0, -1])**2 + (y[:, -1] - y_ideal[0, -1])**2 + (z[:, -1] - z_ideal[0, -1])**2)
+
+    return {
+        'profondeurs': depths[0],
+        'centre': (centre_x, centre_y, centre_z),
+        'rayon_p50': rayon_p50,
+        'rayon_p90': rayon_p90,
+        'ecart_final_percentiles': dict(zip(['P10', 'P50', 'P90'], np.percentile(ecarts_finaux, [10, 50, 90]))),
+    }
+
+# Fonction pour créer une surface tubulaire (cône d'incertitude) autour d'une trajectoire
+# (chaque anneau est tracé dans le plan perpendiculaire à la direction locale du forage)
+def creer_cone_incertitude(centre, rayons, nom, couleur, n_segments=24):
+    theta = np.linspace(0, 2 * np.pi, n_segments)
+    points = np.column_stack(centre)
+
+    # Direction locale (tangente unitaire de la trajectoire) à chaque station
+    tangentes = np.gradient(points, axis=0)
+    tangentes /= np.maximum(np.linalg.norm(tangentes, axis=1, keepdims=True), 1e-12)
+
+    # Deux vecteurs unitaires orthogonaux à la tangente: horizontal (à défaut l'est pour un forage vertical) et son complément
+    normales_1 = np.cross(tangentes, [0.0, 0.0, 1.0])
+    verticaux = np.linalg.norm(normales_1, axis=1) < 1e-9
+    normales_1[verticaux] = [1.0, 0.0, 0.0]
+    normales_1 /= np.linalg.norm(normales_1, axis=1, keepdims=True)
+    normales_2 = np.cross(tangentes, normales_1)
+
+    anneaux = points[:, None, :] + rayons[:, None, None] * (
+        np.cos(theta)[None, :, None] * normales_1[:, None, :] + np.sin(theta)[None, :, None] * normales_2[:, None, :]
+    )
+
+    return go.Surface(
+        x=anneaux[:, :, 0],
+        y=anneaux[:, :, 1],
+        z=anneaux[:, :, 2],
+        colorscale=[[0, couleur], [1, couleur]],
+        showscale=False,
+        opacity=0.25,
+        name=nom,
+        showlegend=True
+    )
+
+# Cache des figures: les spécifications sont mémoïsées par empreinte du jeu de données et paramètres
+# des widgets (nombre d'entrées borné, les plus anciennes sont évincées)
+TAILLE_CACHE_FIGURES = 64
+
+# Fonction pour construire l'histogramme des lithologies
+@st.cache_data(max_entries=TAILLE_CACHE_FIGURES, show_spinner=False)
+def figure_lithologies(empreinte, _df):
+    fig_litho = px.histogram(_df, x='lithologie', color='lithologie', 
+                            color_discrete_sequence=px.colors.qualitative.Bold,
+                            template="plotly_white")
+    fig_litho.update_layout(
+        xaxis_title="Lithologie",
+        yaxis_title="Nombre de forages",
+        showlegend=False,
+        margin=dict(l=20, r=20, t=40, b=20),
+    )
+    return fig_litho
+
+# Fonction pour construire la matrice de corrélation (retourne aussi la matrice pour l'interprétation)
+@st.cache_data(max_entries=TAILLE_CACHE_FIGURES, show_spinner=False)
+def figure_correlations(empreinte, _df):
+    numeric_cols = _df.select_dtypes(include=np.number).columns
+    corr_matrix = _df[numeric_cols].corr()
+    
+    fig_corr = px.imshow(corr_matrix, 
+                        text_auto=True, 
+                        color_continuous_scale='RdBu_r',
+                        title="Matrice de corrélation",
+                        template="plotly_white")
+    fig_corr.update_layout(
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig_corr, corr_matrix
+
+# Fonction pour construire les boîtes à moustaches d'une déviation par lithologie
+@st.cache_data(max_entries=TAILLE_CACHE_FIGURES, show_spinner=False)
+def figure_boites_lithologie(empreinte, _df, cible, libelle):
+    fig_box = px.box(_df, x='lithologie', y=cible, 
+                    title=f"Déviation d'{libelle} par lithologie", 
+                    color='lithologie',
+                    color_discrete_sequence=px.colors.qualitative.Bold,
+                    template="plotly_white")
+    fig_box.update_layout(
+        xaxis_title="Lithologie",
+        yaxis_title=f"Déviation d'{libelle} (°)",
+        showlegend=False,
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig_box
+
+# Fonction pour construire le nuage de points d'une déviation en fonction d'un paramètre (avec tendance OLS)
+@st.cache_data(max_entries=TAILLE_CACHE_FIGURES, show_spinner=False)
+def figure_dispersion(empreinte, _df, selected_feature, cible, libelle):
+    fig_scatter = px.scatter(_df, x=selected_feature, y=cible, 
+                            color='lithologie', opacity=0.7,
+                            title=f"Déviation d'{libelle} vs {selected_feature}",
+                            color_discrete_sequence=px.colors.qualitative.Bold,
+                            trendline="ols",
+                            template="plotly_white")
+    fig_scatter.update_layout(
+        xaxis_title=selected_feature,
+        yaxis_title=f"Déviation d'{libelle} (°)",
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig_scatter
+
+# Fonction pour construire la distribution d'un paramètre
+@st.cache_data(max_entries=TAILLE_CACHE_FIGURES, show_spinner=False)
+def figure_distribution(empreinte, _df, selected_feature):
+    fig_hist = px.histogram(_df, x=selected_feature, color='lithologie',
+                           title=f"Distribution de {selected_feature}",
+                           color_discrete_sequence=px.colors.qualitative.Bold,
+                           marginal="box",
+                           template="plotly_white")
+    fig_hist.update_layout(
+        xaxis_title=selected_feature,
+        yaxis_title="Nombre de forages",
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig_hist
+
+# Fonction pour générer l'illustration schématique de l'orientation initiale (mise en cache par azimuth/inclinaison)
+@st.cache_data(max_entries=TAILLE_CACHE_FIGURES, show_spinner=False)
+def generate_drill_illustration(azimuth, inclination):
+    fig = go.Figure()
+
+    # Calculer les coordonnées pour une représentation simple
+    depth = 100
+    x = depth * np.cos(np.radians(inclination)) * np.sin(np.radians(azimuth))
+    y = depth * np.cos(np.radians(inclination)) * np.cos(np.radians(azimuth))
+    z = depth * np.sin(np.radians(inclination))
+
+    # Surface (grille)
+    x_surface = np.linspace(-100, 100, 5)
+    y_surface = np.linspace(-100, 100, 5)
+    z_surface = np.zeros((5, 5))
+
+    fig.add_trace(go.Surface(x=x_surface, y=y_surface, z=z_surface, 
+                            colorscale=[[0, 'lightgreen'], [1, 'lightgreen']],
+                            showscale=False, opacity=0.3))
+
+    # Point de départ du forage
+    fig.add_trace(go.Scatter3d(
+        x=[0], y=[0], z=[0],
+        mode='markers',
+        marker=dict(size=10, color='green'),
+        name='Départ'
+    ))
+
+    # Direction initiale
+    fig.add_trace(go.Scatter3d(
+        x=[0, x], y=[0, y], z=[0, z],
+        mode='lines',
+        line=dict(color='blue', width=5),
+        name='Direction initiale'
+    ))
+
+    # Paramètres de visualisation
+    fig.update_layout(
+        title=f"Orientation initiale: Azimuth {azimuth:.1f}°, Inclinaison {inclination:.1f}°",
+        scene = dict(
+            xaxis_title='Est (m)',
+            yaxis_title='Nord (m)',
+            zaxis_title='Profondeur (m)',
+            aspectmode='manual',
+            aspectratio=dict(x=1, y=1, z=1),
+            camera=dict(
+                eye=dict(x=1.5, y=1.5, z=1.2)
+            ),
+        ),
+        margin=dict(l=0, r=0, t=30, b=0),
+        template="plotly_white",
+        height=300
+    )
+
+    return fig
+
+# Fonction pour générer les stations (format long) de plusieurs forages en un seul calcul
+def generer_stations(forages, deviation_azimuth, deviation_inclinaison, num_points=50):
+    deviation_azimuth = np.asarray(deviation_azimuth, dtype=float)
+    deviation_inclinaison = np.asarray(deviation_inclinaison, dtype=float)
+    inclinaison_finale = np.clip(forages['inclinaison_initiale'].to_numpy() + deviation_inclinaison, -90, 0)
+
+    depths, x, y, z = calculer_trajectoires(
+        forages['profondeur_finale'].to_numpy(), forages['azimuth_initial'].to_numpy(),
+        forages['inclinaison_initiale'].to_numpy(),
+        forages['azimuth_initial'].to_numpy() + deviation_azimuth, inclinaison_finale, num_points
+    )
+
+    # Décaler chaque trajectoire à la position de son collet
+    x = x + forages['collet_est'].to_numpy()[:, None]
+    y = y + forages['collet_nord'].to_numpy()[:, None]
+
+    return pd.DataFrame({
+        'id_forage': np.repeat(forages['id_forage'].to_numpy(), num_points),
+        'profondeur': depths.ravel(),
+        'x': x.ravel(),
+        'y': y.ravel(),
+        'z': z.ravel(),
+        'lithologie': np.repeat(forages['lithologie'].to_numpy(), num_points),
+        'deviation': np.repeat(np.sqrt(deviation_azimuth**2 + deviation_inclinaison**2), num_points),
+    })
+
+# Fonction pour préparer une table de levés de déviation (une ligne par station), triée par forage et profondeur
+def preparer_leves(raw_leves, mapping):
+    leves = pd.DataFrame({
+        'id_forage': raw_leves[mapping['id_forage']].astype(str),
+        'profondeur': pd.to_numeric(raw_leves[mapping['profondeur']], errors='coerce'),
+        'azimuth': pd.to_numeric(raw_leves[mapping['azimuth']], errors='coerce'),
+        'inclinaison': pd.to_numeric(raw_leves[mapping['inclinaison']], errors='coerce'),
+    }).dropna()
+
+    # Le tri (forage, profondeur) permet tous les calculs groupés par tranches contiguës
+    return leves.sort_values(['id_forage', 'profondeur'], kind='stable').reset_index(drop=True)
+
+# Fonction pour repérer le début de chaque forage dans une table de stations triée
+def debuts_forages(ids):
+    ids = np.asarray(ids)
+    return np.r_[True, ids[1:] != ids[:-1]] if len(ids) else np.zeros(0, dtype=bool)
+
+# Fonction pour dériver les cibles de déviation par forage à partir des stations (opérations groupées vectorisées)
+def deriver_cibles_par_forage(leves):
+    debut = debuts_forages(leves['id_forage'].to_numpy())
+    premiers = np.flatnonzero(debut)
+    derniers = np.r_[premiers[1:] - 1, len(leves) - 1]
+
+    profondeur = leves['profondeur'].to_numpy()
+    azimuth = leves['azimuth'].to_numpy()
+    inclinaison = leves['inclinaison'].to_numpy()
+
+    # Écart d'azimuth ramené dans [-180, 180[ pour ne pas compter un tour complet
+    deviation_azimuth = (azimuth[derniers] - azimuth[premiers] + 180) % 360 - 180
+
+    return pd.DataFrame({
+        'id_forage': leves['id_forage'].to_numpy()[premiers],
+        'profondeur_finale': profondeur[derniers],
+        'azimuth_initial': azimuth[premiers],
+        'inclinaison_initiale': inclinaison[premiers],
+        'deviation_azimuth': deviation_azimuth,
+        'deviation_inclinaison': inclinaison[derniers] - inclinaison[premiers],
+        'nombre_stations': derniers - premiers + 1,
+        'debut': premiers,
+        'fin': derniers + 1,
+    })
+
+# Fonction pour calculer les vecteurs directeurs (x vers l'est, y vers le nord, z vers le haut)
+def vecteurs_directeurs(azimuth, inclinaison):
+    azimuth_rad = np.radians(azimuth)
+    inclinaison_rad = np.radians(inclinaison)
+    return np.column_stack([
+        np.cos(inclinaison_rad) * np.sin(azimuth_rad),
+        np.cos(inclinaison_rad) * np.cos(azimuth_rad),
+        np.sin(inclinaison_rad),
+    ])
+
+# Fonction pour calculer un pas de désurvey par la méthode de courbure minimale
+def pas_courbure_minimale(longueurs, direction_1, direction_2):
+    produit = np.clip(np.einsum('ij,ij->i', direction_1, direction_2), -1.0, 1.0)
+    dogleg = np.arccos(produit)
+
+    # Facteur de lissage (égal à 1 pour les segments rectilignes)
+    facteur = np.ones_like(dogleg)
+    courbes = dogleg > 1e-9
+    facteur[courbes] = 2 / dogleg[courbes] * np.tan(dogleg[courbes] / 2)
+
+    return (longueurs * facteur / 2)[:, None] * (direction_1 + direction_2), np.degrees(dogleg)
+
+# Fonction pour désurveyer toutes les stations de tous les forages en une passe (courbure minimale)
+def desurvey_leves(leves):
+    debut = debuts_forages(leves['id_forage'].to_numpy())
+    profondeur = leves['profondeur'].to_numpy()
+    directions = vecteurs_directeurs(leves['azimuth'].to_numpy(), leves['inclinaison'].to_numpy())
+
+    # Segment précédent de chaque station; la première station d'un forage est reliée au collet
+    # en supposant une orientation constante depuis la surface
+    precedentes = np.maximum(np.arange(len(leves)) - 1, 0)
+    longueurs = np.where(debut, profondeur, profondeur - profondeur[precedentes])
+    directions_precedentes = np.where(debut[:, None], directions, directions[precedentes])
+    deplacements, dogleg = pas_courbure_minimale(longueurs, directions_precedentes, directions)
+
+    # Somme cumulée remise à zéro au début de chaque forage
+    cumul = np.cumsum(deplacements, axis=0)
+    groupe = np.cumsum(debut) - 1
+    origine = (cumul - deplacements)[np.flatnonzero(debut)]
+    positions = cumul - origine[groupe]
+
+    return leves.assign(
+        x=positions[:, 0],
+        y=positions[:, 1],
+        z=positions[:, 2],
+        dogleg=np.where(debut, 0.0, dogleg),
+    )
+
+# Suivi en direct pendant la foration: levés lus au fil de l'eau dans un fichier local alimenté par les foreuses
+COLONNES_LEVES_DIRECT = ['id_forage', 'profondeur', 'azimuth', 'inclinaison']
+LONGUEUR_DOGLEG = 30.0  # sévérité du dogleg exprimée en degrés par 30 m
+POINTS_TRAJECTOIRE_RESTANTE = 50
+ALERTES_CONSERVEES = 500
+COLONNES_PREVISIONS_DIRECT = ['profondeur_restante', 'azimuth_final_prevu', 'inclinaison_finale_prevue', 'ecart_cible']
+# Seuls les fichiers de ce dossier du serveur peuvent être suivis (le chemin saisi est relatif à ce dossier)
+DOSSIER_LEVES_DIRECT = os.environ.get(
+    'DEVIATION5_DOSSIER_LEVES',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'leves_direct')
+)
+
+# État du suivi en direct: position de lecture dans le fichier et dernière station désurveyée de chaque forage
+class SuiviLevesDirect:
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.position = 0
+        self.reste = b""
+        self.entete = None
+        self.etats = pd.DataFrame(columns=['profondeur', 'azimuth', 'inclinaison', 'x', 'y', 'z', 'stations', 'dls_max'],
+                                  index=pd.Index([], name='id_forage'), dtype=float)
+        self.previsions = pd.DataFrame(columns=COLONNES_PREVISIONS_DIRECT, index=pd.Index([], name='id_forage'), dtype=float)
+        self.stations = {}
+        self.alertes = []
+        self.stations_recues = 0
+        self.latence_ms = None
+
+# Fonction pour lire les stations ajoutées au fichier depuis la dernière lecture (lignes complètes uniquement)
+def lire_nouvelles_stations(suivi):
+    if os.path.getsize(suivi.chemin) < suivi.position:
+        raise ValueError("le fichier de levés a été tronqué ou remplacé; redémarrez le suivi")
+    with open(suivi.chemin, 'rb') as fichier:
+        fichier.seek(suivi.position)
+        donnees = fichier.read()
+    suivi.position += len(donnees)
+
+    # La dernière ligne peut être en cours d'écriture: elle est gardée pour la lecture suivante
+    lignes = (suivi.reste + donnees).split(b"\n")
+    suivi.reste = lignes.pop()
+    if suivi.entete is None and lignes:
+        suivi.entete = lignes.pop(0).strip()
+    lignes = [ligne for ligne in lignes if ligne.strip()]
+    if not lignes:
+        return None
+
+    brut = pd.read_csv(BytesIO(b"\n".join([suivi.entete] + lignes)))
+    colonnes_manquantes = [colonne for colonne in COLONNES_LEVES_DIRECT if colonne not in brut.columns]
+    if colonnes_manquantes:
+        raise ValueError(f"colonnes manquantes dans le fichier de levés: {', '.join(colonnes_manquantes)}")
+    return preparer_leves(brut, {colonne: colonne for colonne in COLONNES_LEVES_DIRECT})
+
+# Fonction pour désurveyer de nouvelles stations à la suite du dernier état connu de chaque forage
+# (même courbure minimale que desurvey_leves, sans recalculer les stations déjà reçues)
+def desurvey_incremental(nouvelles, etats):
+    # Stations renvoyées ou plus courtes que la dernière station connue: ignorées
+    deja_connue = nouvelles['profondeur'].to_numpy() <= etats['profondeur'].reindex(nouvelles['id_forage']).fillna(-np.inf).to_numpy()
+    nouvelles = nouvelles[~deja_connue].drop_duplicates(['id_forage', 'profondeur'], keep='last').reset_index(drop=True)
+    if len(nouvelles) == 0:
+        return None
+
+    debut = debuts_forages(nouvelles['id_forage'].to_numpy())
+    connus = etats.reindex(nouvelles['id_forage'])
+    nouveau_forage = connus['profondeur'].isna().to_numpy()
+    profondeur = nouvelles['profondeur'].to_numpy()
+    directions = vecteurs_directeurs(nouvelles['azimuth'].to_numpy(), nouvelles['inclinaison'].to_numpy())
+    directions_connues = vecteurs_directeurs(connus['azimuth'].to_numpy(dtype=float), connus['inclinaison'].to_numpy(dtype=float))
+
+    # Station précédente: la précédente du lot, sinon le dernier état du forage, sinon le collet (orientation constante)
+    precedentes = np.maximum(np.arange(len(nouvelles)) - 1, 0)
+    profondeur_precedente = np.where(debut, np.where(nouveau_forage, 0.0, connus['profondeur'].to_numpy(dtype=float)),
+                                     profondeur[precedentes])
+    directions_precedentes = np.where(debut[:, None], np.where(nouveau_forage[:, None], directions, directions_connues),
+                                      directions[precedentes])
+    longueurs = profondeur - profondeur_precedente
+    deplacements, dogleg = pas_courbure_minimale(longueurs, directions_precedentes, directions)
+
+    # Somme cumulée par forage, repartant de la dernière position connue
+    cumul = np.cumsum(deplacements, axis=0)
+    groupe = np.cumsum(debut) - 1
+    premiers = np.flatnonzero(debut)
+    origine = (cumul - deplacements)[premiers] - connus[['x', 'y', 'z']].fillna(0.0).to_numpy(dtype=float)[premiers]
+    positions = cumul - origine[groupe]
+    dogleg = np.where(debut & nouveau_forage, 0.0, dogleg)
+
+    return nouvelles.assign(
+        x=positions[:, 0],
+        y=positions[:, 1],
+        z=positions[:, 2],
+        dogleg=dogleg,
+        dls=np.where(longueurs > 0, dogleg / np.maximum(longueurs, 1e-9) * LONGUEUR_DOGLEG, 0.0),
+    )
+
+# Fonction pour re-prédire la fin de trajectoire des forages planifiés depuis leur dernière station mesurée
+# (le modèle est appliqué au tronçon restant comme à un forage partant de la station courante)
+def repredire_fin_forages(etats, planifies, model_azimuth, model_inclinaison):
+    communs = etats.index.intersection(planifies.index)
+    if len(communs) == 0:
+        return pd.DataFrame(columns=COLONNES_PREVISIONS_DIRECT, index=pd.Index([], name='id_forage'), dtype=float)
+    etat, plan = etats.loc[communs], planifies.loc[communs]
+    restant = np.maximum(plan['profondeur_finale'].to_numpy() - etat['profondeur'].to_numpy(dtype=float), 0.0)
+
+    X = pd.DataFrame({
+        'profondeur_finale': np.maximum(restant, 1.0),
+        'azimuth_initial': etat['azimuth'].to_numpy(dtype=float),
+        'inclinaison_initiale': etat['inclinaison'].to_numpy(dtype=float),
+        'lithologie': plan['lithologie'].to_numpy(),
+        'vitesse_rotation': plan['vitesse_rotation'].to_numpy(),
+        'id_forage': communs.to_numpy(),
+        'collet_est': plan['collet_est'].to_numpy(),
+        'collet_nord': plan['collet_nord'].to_numpy(),
+    })
+    with mesurer_etape("Prédiction", jeu="suivi en direct", forages=len(X)):
+        azimuth_final = X['azimuth_initial'].to_numpy() + model_azimuth.predict(X)
+        inclinaison_finale = np.clip(X['inclinaison_initiale'].to_numpy() + model_inclinaison.predict(X), -90, 0)
+
+    # Fin prévue = dernière station + tronçon restant; cible = fin de la trajectoire planifiée rectiligne
+    _, x, y, z = calculer_trajectoires(restant, X['azimuth_initial'], X['inclinaison_initiale'], azimuth_final, inclinaison_finale, 2)
+    fin = etat[['x', 'y', 'z']].to_numpy(dtype=float) + np.column_stack([x[:, -1], y[:, -1], z[:, -1]])
+    _, x_cible, y_cible, z_cible = calculer_trajectoires(plan['profondeur_finale'], plan['azimuth_initial'], plan['inclinaison_initiale'],
+                                                         plan['azimuth_initial'], plan['inclinaison_initiale'], 2)
+    cible = np.column_stack([x_cible[:, -1], y_cible[:, -1], z_cible[:, -1]])
+
+    return pd.DataFrame({
+        'profondeur_restante': restant,
+        'azimuth_final_prevu': azimuth_final,
+        'inclinaison_finale_prevue': inclinaison_finale,
+        'ecart_cible': np.linalg.norm(fin - cible, axis=1),
+    }, index=communs)
+
+# Fonction pour intégrer les stations reçues depuis la dernière lecture (désurvey, re-prédiction, alertes)
+def actualiser_suivi(suivi, planifies, model_azimuth, model_inclinaison, seuil_dls, tolerance_cible):
+    debut = time.perf_counter()
+    nouvelles = lire_nouvelles_stations(suivi)
+    if nouvelles is None:
+        return []
+    stations = desurvey_incremental(nouvelles, suivi.etats)
+    if stations is None:
+        return []
+    for id_forage, stations_forage in stations.groupby('id_forage', sort=False):
+        suivi.stations.setdefault(id_forage, []).append(stations_forage)
+    suivi.stations_recues += len(stations)
+    horodatage = pd.Timestamp.now().strftime('%H:%M:%S')
+
+    # Dernier état de chaque forage touché (les autres forages ne sont pas recalculés)
+    derniers = stations.groupby('id_forage', sort=False).tail(1).set_index('id_forage')
+    resume = stations.groupby('id_forage', sort=False).agg(stations=('profondeur', 'size'), dls_max=('dls', 'max'))
+    anciens = suivi.etats.reindex(derniers.index)
+    derniers = derniers[['profondeur', 'azimuth', 'inclinaison', 'x', 'y', 'z']].assign(
+        stations=anciens['stations'].fillna(0).to_numpy() + resume['stations'].to_numpy(),
+        dls_max=np.fmax(anciens['dls_max'].to_numpy(dtype=float), resume['dls_max'].to_numpy()),
+    )
+    suivi.etats = pd.concat([suivi.etats.drop(derniers.index, errors='ignore'), derniers.astype(float)])
+
+    alertes = [
+        {'heure': horodatage, 'id_forage': station.id_forage, 'type': "Dogleg", 'profondeur': float(station.profondeur),
+         'message': f"{station.dls:.1f}°/{LONGUEUR_DOGLEG:.0f} m au-delà du seuil de {seuil_dls:.1f}°"}
+        for station in stations[stations['dls'] > seuil_dls].itertuples()
+    ]
+
+    # Re-prédiction groupée des forages planifiés touchés; alerte quand l'écart prévu sort de la tolérance
+    if planifies is not None and model_azimuth is not None:
+        previsions = repredire_fin_forages(derniers, planifies.drop_duplicates('id_forage').set_index('id_forage'),
+                                           model_azimuth, model_inclinaison)
+        ecart_precedent = suivi.previsions['ecart_cible'].reindex(previsions.index)
+        sorties = previsions.index[(previsions['ecart_cible'] > tolerance_cible) & ~(ecart_precedent > tolerance_cible)]
+        alertes += [
+            {'heure': horodatage, 'id_forage': id_forage, 'type': "Cible", 'profondeur': float(derniers.at[id_forage, 'profondeur']),
+             'message': f"écart prévu de {previsions.at[id_forage, 'ecart_cible']:.1f} m à la cible (tolérance {tolerance_cible:.0f} m)"}
+            for id_forage in sorties
+        ]
+        if len(previsions):
+            suivi.previsions = pd.concat([suivi.previsions.drop(previsions.index, errors='ignore'), previsions])
+
+    suivi.alertes = (suivi.alertes + alertes)[-ALERTES_CONSERVEES:]
+    suivi.latence_ms = (time.perf_counter() - debut) * 1000
+    return alertes
+
+# Fonction pour convertir des stations désurveyées au format des stations de la vue multi-forages
+def stations_mesurees(leves_desurveyes, forages):
+    infos = forages[['id_forage', 'collet_est', 'collet_nord', 'lithologie', 'deviation_azimuth', 'deviation_inclinaison']]
+    stations = leves_desurveyes[['id_forage', 'profondeur', 'x', 'y', 'z']].merge(infos, on='id_forage', how='inner', sort=False)
+
+    return pd.DataFrame({
+        'id_forage': stations['id_forage'],
+        'profondeur': stations['profondeur'],
+        'x': stations['x'] + stations['collet_est'],
+        'y': stations['y'] + stations['collet_nord'],
+        'z': stations['z'],
+        'lithologie': stations['lithologie'],
+        'deviation': np.sqrt(stations['deviation_azimuth']**2 + stations['deviation_inclinaison']**2),
+    })
+
+# Fonction pour préparer une table d'intervalles de lithologie, triée par forage et profondeur de début
+def preparer_intervalles(raw_intervalles, mapping):
+    intervalles = pd.DataFrame({
+        'id_forage': raw_intervalles[mapping['id_forage']].astype(str),
+        'de': pd.to_numeric(raw_intervalles[mapping['de']], errors='coerce'),
+        'a': pd.to_numeric(raw_intervalles[mapping['a']], errors='coerce'),
+        'lithologie': raw_intervalles[mapping['lithologie']].astype(str),
+    }).dropna()
+
+    intervalles = intervalles[intervalles['a'] > intervalles['de']]
+    return intervalles.sort_values(['id_forage', 'de'], kind='stable').reset_index(drop=True)
+
+# Fonction pour joindre des profondeurs (stations ou milieux de segments) aux intervalles de lithologie
+# via un index trié: une seule recherche dichotomique (searchsorted) sur une clé (forage, profondeur)
+def joindre_intervalles(ids, profondeurs, intervalles, valeur_absente='Inconnu'):
+    ids = np.asarray(ids)
+    profondeurs = np.asarray(profondeurs, dtype=float)
+    if len(intervalles) == 0 or len(ids) == 0:
+        return np.full(len(ids), valeur_absente, dtype=object)
+
+    # Codes de forage communs aux deux tables
+    codes, categories = pd.factorize(np.concatenate([intervalles['id_forage'].to_numpy(), ids]))
+    codes_intervalles, codes_stations = codes[:len(intervalles)], codes[len(intervalles):]
+
+    # Clé composite croissante: chaque forage occupe une plage de profondeurs disjointe
+    debuts = intervalles['de'].to_numpy()
+    fins = intervalles['a'].to_numpy()
+    etendue = max(fins.max(), profondeurs.max(), 0) + 1
+    cles_intervalles = codes_intervalles * etendue + debuts
+    ordre = np.argsort(cles_intervalles, kind='stable')
+    cles_intervalles = cles_intervalles[ordre]
+
+    positions = np.searchsorted(cles_intervalles, codes_stations * etendue + profondeurs, side='right') - 1
+    positions_valides = np.clip(positions, 0, None)
+    trouves = ordre[positions_valides]
+
+    # L'intervalle trouvé doit appartenir au même forage et contenir la profondeur
+    valide = (
+        (positions >= 0)
+        & (codes_intervalles[trouves] == codes_stations)
+        & (profondeurs <= fins[trouves])
+    )
+
+    lithologies = np.full(len(ids), valeur_absente, dtype=object)
+    lithologies[valide] = intervalles['lithologie'].to_numpy()[trouves[valide]]
+    return lithologies
+
+# Fonction pour découper les levés désurveyés en segments et leur associer une lithologie
+def construire_segments(leves_desurveyes, intervalles):
+    ids = leves_desurveyes['id_forage'].to_numpy()
+    debut = debuts_forages(ids)
+
+    # Un segment relie deux stations consécutives d'un même forage
+    fin = np.flatnonzero(~debut)
+    precedente = fin - 1
+
+    profondeur = leves_desurveyes['profondeur'].to_numpy()
+    azimuth = leves_desurveyes['azimuth'].to_numpy()
+    inclinaison = leves_desurveyes['inclinaison'].to_numpy()
+
+    longueur = profondeur[fin] - profondeur[precedente]
+    milieu = (profondeur[fin] + profondeur[precedente]) / 2
+    dogleg = leves_desurveyes['dogleg'].to_numpy()[fin]
+
+    return pd.DataFrame({
+        'id_forage': ids[fin],
+        'de': profondeur[precedente],
+        'a': profondeur[fin],
+        'longueur': longueur,
+        'lithologie': joindre_intervalles(ids[fin], milieu, intervalles),
+        'variation_azimuth': (azimuth[fin] - azimuth[precedente] + 180) % 360 - 180,
+        'variation_inclinaison': inclinaison[fin] - inclinaison[precedente],
+        'dogleg': dogleg,
+        'taux_dogleg': np.where(longueur > 0, dogleg / np.where(longueur > 0, longueur, 1) * 30, 0.0),
+    })
+
+# Fonction pour calculer la lithologie dominante (en longueur traversée) de chaque forage
+def lithologie_dominante(intervalles):
+    longueurs = (intervalles['a'] - intervalles['de']).groupby(
+        [intervalles['id_forage'], intervalles['lithologie']], sort=False
+    ).sum()
+    return longueurs.sort_values(ascending=False).reset_index().drop_duplicates('id_forage').set_index('id_forage')['lithologie']
+
+# Fonction pour obtenir les stations des forages existants (levés mesurés si disponibles, sinon trajectoire interpolée)
+def stations_forages_existants(forages, leves_desurveyes=None, num_points=50):
+    if leves_desurveyes is None:
+        return generer_stations(forages, forages['deviation_azimuth'], forages['deviation_inclinaison'], num_points)
+
+    avec_leves = forages['id_forage'].isin(pd.unique(leves_desurveyes['id_forage']))
+    stations = [stations_mesurees(leves_desurveyes, forages[avec_leves])]
+    if (~avec_leves).any():
+        sans_leves = forages[~avec_leves]
+        stations.append(generer_stations(sans_leves, sans_leves['deviation_azimuth'], sans_leves['deviation_inclinaison'], num_points))
+
+    return pd.concat(stations, ignore_index=True)
+
+# Fonction pour choisir un nombre de stations garantissant un espacement inférieur à la distance de garde
+def points_pour_espacement(profondeur_max, espacement, maximum=2000):
+    return int(min(max(np.ceil(profondeur_max / max(espacement, 1e-6)) + 1, 2), maximum))
+
+# Fonction pour réduire des paires de stations proches à la séparation minimale par paire de forages
+def _resumer_paires(ids_1, ids_2, profondeurs_1, profondeurs_2, distances, type_paire):
+    paires = pd.DataFrame({
+        'forage_1': ids_1,
+        'forage_2': ids_2,
+        'separation_min': distances,
+        'profondeur_1': profondeurs_1,
+        'profondeur_2': profondeurs_2,
+    })
+    if paires.empty:
+        return paires.assign(type=pd.Series(dtype=object))
+
+    # Pour chaque paire de forages, garder la station où la séparation est minimale
+    paires = paires.sort_values('separation_min', kind='stable')
+    paires = paires.drop_duplicates(['forage_1', 'forage_2'], keep='first')
+    return paires.assign(type=type_paire)
+
+# Fonction pour détecter les paires de forages plus proches qu'une distance de garde (index spatial KD-tree)
+def verifier_proximite(stations, distance_garde, stations_existantes=None, profondeur_min=0.0):
+    # Les stations proches du collet sont ignorées (forages partant d'une même plateforme)
+    stations = stations[stations['profondeur'] >= profondeur_min]
+    ids = stations['id_forage'].to_numpy()
+    profondeurs = stations['profondeur'].to_numpy()
+    points = stations[['x', 'y', 'z']].to_numpy()
+    arbre = cKDTree(points)
+
+    resultats = []
+
+    # Forages planifiés entre eux: seules les paires de stations de forages différents comptent
+    paires = arbre.query_pairs(distance_garde, output_type='ndarray')
+    if len(paires):
+        i, j = paires[:, 0], paires[:, 1]
+        differents = ids[i] != ids[j]
+        i, j = i[differents], j[differents]
+
+        # Ordonner chaque paire pour regrouper (A, B) et (B, A)
+        inverser = ids[i] > ids[j]
+        i, j = np.where(inverser, j, i), np.where(inverser, i, j)
+        distances = np.linalg.norm(points[i] - points[j], axis=1)
+        resultats.append(_resumer_paires(ids[i], ids[j], profondeurs[i], profondeurs[j], distances, 'Planifié / Planifié'))
+
+    # Forages planifiés contre forages existants
+    if stations_existantes is not None and len(stations_existantes):
+        stations_existantes = stations_existantes[stations_existantes['profondeur'] >= profondeur_min]
+        arbre_existant = cKDTree(stations_existantes[['x', 'y', 'z']].to_numpy())
+        proches = arbre.sparse_distance_matrix(arbre_existant, distance_garde, output_type='ndarray')
+        if len(proches):
+            i, j = proches['i'], proches['j']
+            resultats.append(_resumer_paires(
+                ids[i], stations_existantes['id_forage'].to_numpy()[j],
+                profondeurs[i], stations_existantes['profondeur'].to_numpy()[j],
+                proches['v'], 'Planifié / Existant'
+            ))
+
+    if not resultats:
+        return _resumer_paires([], [], [], [], [], None)
+
+    return pd.concat(resultats, ignore_index=True).sort_values('separation_min').reset_index(drop=True)
+
+# Fonction pour décimer les stations selon la profondeur afin de respecter un budget de points
+def decimer_stations(stations, budget_points):
+    if len(stations) <= budget_points:
+        return stations
+
+    # Pas de profondeur commun choisi pour que la longueur totale forée tienne dans le budget
+    # (les deux extrémités de chaque forage sont réservées hors budget)
+    longueurs = stations.groupby('id_forage', sort=False)['profondeur'].max()
+    budget_utile = max(budget_points - 2 * len(longueurs), len(longueurs))
+    pas = max(longueurs.sum() / budget_utile, 1e-6)
+    classe = np.floor(stations['profondeur'].to_numpy() / pas)
+
+    # Garder la première station de chaque classe de profondeur ainsi que la dernière de chaque forage
+    meme_forage_avant = stations['id_forage'].eq(stations['id_forage'].shift())
+    meme_forage_apres = stations['id_forage'].eq(stations['id_forage'].shift(-1))
+    nouvelle_classe = ~meme_forage_avant.to_numpy() | (classe != np.roll(classe, 1))
+    garder = nouvelle_classe | ~meme_forage_apres.to_numpy()
+
+    return stations[garder]
+
+# Fonction pour regrouper plusieurs forages dans une seule trace (segments séparés par des NaN)
+def empaqueter_segments(stations, valeurs_couleur=None):
+    ids = stations['id_forage'].to_numpy()
+    n = len(stations)
+
+    # Un séparateur NaN est inséré après chaque forage
+    fin_forage = np.r_[ids[1:] != ids[:-1], True] if n else np.zeros(0, dtype=bool)
+    positions = np.arange(n) + np.r_[0, np.cumsum(fin_forage)[:-1]] if n else np.zeros(0, dtype=int)
+    taille = n + int(fin_forage.sum())
+
+    coordonnees = {}
+    for axe in ['x', 'y', 'z']:
+        valeurs = np.full(taille, np.nan)
+        valeurs[positions] = stations[axe].to_numpy()
+        coordonnees[axe] = valeurs
+
+    couleurs = None
+    if valeurs_couleur is not None:
+        couleurs = np.zeros(taille)
+        couleurs[positions] = np.asarray(valeurs_couleur, dtype=float)
+
+    texte = np.full(taille, '', dtype=object)
+    texte[positions] = ids
+
+    return coordonnees, couleurs, texte
+
+# Fonction pour construire une scène 3D multi-forages avec un nombre de traces réduit
+def construire_scene_multi_forages(stations_reelles, stations_predites=None, couleur_par="Lithologie",
+                                   budget_points=50000):
+    fig = go.Figure()
+
+    # Le budget est partagé entre trajectoires réelles et prédites
+    n_jeux = 1 if stations_predites is None else 2
+    stations_reelles = decimer_stations(stations_reelles, budget_points // n_jeux)
+
+    if couleur_par == "Lithologie":
+        palette = px.colors.qualitative.Bold
+        for i, (lithologie, groupe) in enumerate(stations_reelles.groupby('lithologie', sort=True)):
+            coordonnees, _, texte = empaqueter_segments(groupe)
+            fig.add_trace(go.Scatter3d(
+                x=coordonnees['x'], y=coordonnees['y'], z=coordonnees['z'],
+                mode='lines',
+                line=dict(color=palette[i % len(palette)], width=4),
+                text=texte,
+                hoverinfo='text',
+                name=f"Réel - {lithologie}",
+                connectgaps=False
+            ))
+    else:
+        coordonnees, couleurs, texte = empaqueter_segments(stations_reelles, stations_reelles['deviation'])
+        fig.add_trace(go.Scatter3d(
+            x=coordonnees['x'], y=coordonnees['y'], z=coordonnees['z'],
+            mode='lines',
+            line=dict(color=couleurs, colorscale='Viridis', width=4, showscale=True,
+                      colorbar=dict(title="Déviation (°)")),
+            text=texte,
+            hoverinfo='text',
+            name="Réel",
+            connectgaps=False
+        ))
+
+    if stations_predites is not None:
+        stations_predites = decimer_stations(stations_predites, budget_points // n_jeux)
+        coordonnees, _, texte = empaqueter_segments(stations_predites)
+        fig.add_trace(go.Scatter3d(
+            x=coordonnees['x'], y=coordonnees['y'], z=coordonnees['z'],
+            mode='lines',
+            line=dict(color='rgba(255, 0, 0, 0.6)', width=3, dash='dash'),
+            text=texte,
+            hoverinfo='text',
+            name="Prédit",
+            connectgaps=False
+        ))
+
+    # Surface (grille) couvrant l'emprise des forages affichés
+    x_surface = np.linspace(stations_reelles['x'].min() - 50, stations_reelles['x'].max() + 50, 10)
+    y_surface = np.linspace(stations_reelles['y'].min() - 50, stations_reelles['y'].max() + 50, 10)
+    x_surface_grid, y_surface_grid = np.meshgrid(x_surface, y_surface)
+
+    fig.add_trace(go.Surface(
+        x=x_surface_grid,
+        y=y_surface_grid,
+        z=np.zeros_like(x_surface_grid),
+        colorscale=[[0, 'lightgreen'], [1, 'lightgreen']],
+        showscale=False,
+        opacity=0.3
+    ))
+
+    fig.update_layout(
+        scene=dict(
+            xaxis_title='Est (m)',
+            yaxis_title='Nord (m)',
+            zaxis_title='Profondeur (m)',
+            aspectmode='data'
+        ),
+        template="plotly_white",
+        height=700,
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+
+    return fig
+
+# Champ de déviation en plan: tuiles de TAILLE_TUILE x TAILLE_TUILE cellules alignées sur l'origine,
+# tailles de cellule en puissances de deux (les tuiles d'une résolution sont réutilisées d'une vue à l'autre)
+TAILLE_TUILE = 64
+CELLULES_PAR_VUE = 256
+VOISINS_INTERPOLATION = 16
+VARIABLES_CHAMP = {
+    "Déviation totale": None,
+    "Déviation d'azimuth": 'deviation_azimuth',
+    "Déviation d'inclinaison": 'deviation_inclinaison',
+}
+
+# Fonction pour choisir la taille de cellule d'une vue (puissance de deux, environ CELLULES_PAR_VUE cellules de côté)
+def resolution_vue(etendue):
+    return float(2.0 ** np.ceil(np.log2(max(etendue, 1.0) / CELLULES_PAR_VUE)))
+
+# Fonction pour extraire les valeurs mesurées d'une variable du champ (déviation totale: norme des deux déviations)
+def valeurs_champ(df, variable):
+    colonne = VARIABLES_CHAMP[variable]
+    if colonne is None:
+        return np.hypot(df['deviation_azimuth'].to_numpy(dtype=float), df['deviation_inclinaison'].to_numpy(dtype=float))
+    return df[colonne].to_numpy(dtype=float)
+
+# Fonction pour obtenir l'index spatial des collets mesurés (un par jeu de données)
+@st.cache_resource(max_entries=8, show_spinner=False)
+def index_collets(empreinte, _coordonnees):
+    return cKDTree(_coordonnees)
+
+# Fonction pour interpoler par inverse de la distance (voisins: distances et valeurs, une ligne par cellule)
+def interpoler_idw(distances, valeurs_voisins, puissance):
+    poids = 1.0 / np.maximum(distances, 1e-6) ** puissance
+    return (poids * valeurs_voisins).sum(axis=1) / poids.sum(axis=1)
+
+# Fonction pour interpoler par krigeage simple local (moyenne connue, covariance exponentielle, voisins les plus proches):
+# un système k x k par cellule, résolus en bloc
+def interpoler_krigeage_simple(coordonnees_voisins, distances, valeurs_voisins, moyenne, palier, portee, pepite):
+    def covariance(h):
+        return (palier - pepite) * np.exp(-3.0 * h / portee)
+    
+    ecarts = coordonnees_voisins[:, :, None, :] - coordonnees_voisins[:, None, :, :]
+    matrices = covariance(np.linalg.norm(ecarts, axis=-1))
+    matrices += (pepite + 1e-9 * palier) * np.eye(distances.shape[1])
+    poids = np.linalg.solve(matrices, covariance(distances)[:, :, None])[:, :, 0]
+    return moyenne + (poids * (valeurs_voisins - moyenne)).sum(axis=1)
+
+# Fonction pour calculer une tuile du champ de déviation (bloc vectorisé, mise en cache par résolution et position)
+# (cellules à plus de distance_max du forage mesuré le plus proche laissées vides)
+@st.cache_data(max_entries=4096, show_spinner=False)
+def calculer_tuile(empreinte, variable, methode, parametres, resolution, tuile_est, tuile_nord, _coordonnees, _valeurs):
+    arbre = index_collets(empreinte, _coordonnees)
+    centres = (np.arange(TAILLE_TUILE) + 0.5) * resolution
+    est, nord = np.meshgrid(tuile_est * TAILLE_TUILE * resolution + centres, tuile_nord * TAILLE_TUILE * resolution + centres)
+    cellules = np.column_stack([est.ravel(), nord.ravel()])
+    
+    k = min(VOISINS_INTERPOLATION, arbre.n)
+    distances, indices = arbre.query(cellules, k=k, workers=-1)
+    distances, indices = distances.reshape(-1, k), indices.reshape(-1, k)
+    valeurs_voisins = _valeurs[indices]
+    
+    if methode == "IDW":
+        champ = interpoler_idw(distances, valeurs_voisins, parametres['puissance'])
+    else:
+        champ = interpoler_krigeage_simple(_coordonnees[indices], distances, valeurs_voisins, float(_valeurs.mean()),
+                                           float(_valeurs.var()), parametres['portee'],
+                                           parametres['pepite'] * float(_valeurs.var()))
+    champ[distances[:, 0] > parametres['distance_max']] = np.nan
+    return champ.reshape(TAILLE_TUILE, TAILLE_TUILE).astype(np.float32)
+
+# Fonction pour assembler le champ d'une emprise à partir des tuiles (seules les tuiles absentes du cache sont calculées)
+def assembler_champ(empreinte, variable, methode, parametres, emprise_est, emprise_nord, coordonnees, valeurs):
+    resolution = resolution_vue(max(emprise_est[1] - emprise_est[0], emprise_nord[1] - emprise_nord[0]))
+    cote_tuile = TAILLE_TUILE * resolution
+    tuiles_est = range(int(np.floor(emprise_est[0] / cote_tuile)), int(np.floor(emprise_est[1] / cote_tuile)) + 1)
+    tuiles_nord = range(int(np.floor(emprise_nord[0] / cote_tuile)), int(np.floor(emprise_nord[1] / cote_tuile)) + 1)
+    
+    champ = np.block([
+        [calculer_tuile(empreinte, variable, methode, parametres, resolution, te, tn, coordonnees, valeurs) for te in tuiles_est]
+        for tn in tuiles_nord
+    ])
+    est = tuiles_est[0] * cote_tuile + (np.arange(champ.shape[1]) + 0.5) * resolution
+    nord = tuiles_nord[0] * cote_tuile + (np.arange(champ.shape[0]) + 0.5) * resolution
+    
+    # Rogner à l'emprise demandée
+    colonnes = (est >= emprise_est[0] - resolution) & (est <= emprise_est[1] + resolution)
+    lignes = (nord >= emprise_nord[0] - resolution) & (nord <= emprise_nord[1] + resolution)
+    return est[colonnes], nord[lignes], champ[np.ix_(lignes, colonnes)], resolution, len(tuiles_est) * len(tuiles_nord)
+
+# Fonction pour formuler les recommandations selon l'intensité de la déviation
+def recommandations_deviation(deviation_magnitude):
+    if deviation_magnitude < 5:
+        return """
+            - La déviation prédite est faible et ne devrait pas nécessiter d'ajustements particuliers.
+            - Procéder au forage selon les paramètres planifiés.
+            - Surveiller régulièrement l'orientation pendant l'opération.
+            """
+    elif deviation_magnitude < 15:
+        return """
+            - Une déviation modérée est anticipée, des ajustements préventifs peuvent être envisagés.
+            - Considérer une légère compensation de l'orientation initiale.
+            - Prévoir des mesures de contrôle plus fréquentes pendant le forage.
+            - Réduire la vitesse de rotation dans les zones critiques.
+            """
+    else:
+        return """
+            - Une déviation importante est prévue, des mesures correctives sont nécessaires.
+            - Ajuster significativement l'orientation initiale pour compenser la déviation.
+            - Utiliser des stabilisateurs supplémentaires pour maintenir la trajectoire.
+            - Envisager des techniques de forage dirigé si disponibles.
+            - Effectuer des mesures de contrôle très fréquentes.
+            """
+
+# Fonction pour rédiger le rapport texte d'un forage (conflits: colonnes forage_2, separation_min, profondeur_1)
+def rediger_rapport(forage, deviation_azimuth, deviation_inclinaison, ecart_final, distance_garde, conflits, enveloppe=None):
+    azimuth_final = (forage['azimuth_initial'] + deviation_azimuth) % 360
+    inclinaison_final = max(-90, min(0, forage['inclinaison_initiale'] + deviation_inclinaison))
+    recommendations = recommandations_deviation((deviation_azimuth**2 + deviation_inclinaison**2)**0.5)
+
+    # Ajouter l'incertitude simulée au rapport si disponible
+    texte_incertitude = ""
+    if enveloppe is not None:
+        p = enveloppe['ecart_final_percentiles']
+        texte_incertitude = f"- Écart final simulé (P10 / P50 / P90): {p['P10']:.2f} / {p['P50']:.2f} / {p['P90']:.2f} m\n"
+
+    # Avertissements anti-collision pour le rapport
+    if len(conflits) > 0:
+        texte_collision = "\n".join(
+            f"        - {c.forage_2}: {c.separation_min:.2f} m à {c.profondeur_1:.0f} m de profondeur"
+            for c in conflits.itertuples()
+        )
+    else:
+        texte_collision = "        - Aucun forage existant à moins de la distance de garde"
+
+    return f"""
+        Rapport de prédiction de déviation de forage
+        Date: {pd.Timestamp.now().strftime('%d/%m/%Y')}
+        
+        Paramètres du forage:
+        - Profondeur finale: {forage['profondeur_finale']} m
+        - Azimuth initial: {forage['azimuth_initial']}°
+        - Inclinaison initiale: {forage['inclinaison_initiale']}°
+        - Lithologie: {forage['lithologie']}
+        - Vitesse de rotation: {forage['vitesse_rotation']} tr/min
+        - Collet (Est, Nord): {forage['collet_est']}, {forage['collet_nord']} m
+        
+        Résultats de la prédiction:
+        - Déviation d'azimuth: {deviation_azimuth:.2f}°
+        - Déviation d'inclinaison: {deviation_inclinaison:.2f}°
+        - Azimuth final prévu: {azimuth_final:.2f}°
+        - Inclinaison finale prévue: {inclinaison_final:.2f}°
+        - Écart final estimé: {ecart_final:.2f} m
+        {texte_incertitude}
+        Anti-collision (distance de garde: {distance_garde} m):
+{texte_collision}
+        
+        Recommandations:
+        {recommendations}
+        
+        Rapport généré par l'application "Prédiction de Déviation des Forages Miniers"
+        Auteur: Didier Ouedraogo, P.Geo.
+        """
+
+# Fonction pour tracer la vue en plan et la coupe d'un forage en PNG (API objet de matplotlib, sans pyplot)
+def tracer_trajectoire_png(trajectoire, ideal, titre):
+    fig = Figure(figsize=(10, 4.5), dpi=100)
+    FigureCanvasAgg(fig)
+    ax_plan, ax_coupe = fig.subplots(1, 2)
+
+    # Vue en plan (Est / Nord)
+    ax_plan.plot(ideal['x'], ideal['y'], linestyle='--', color='red', alpha=0.6, label='Trajectoire idéale')
+    ax_plan.plot(trajectoire['x'], trajectoire['y'], color='blue', label='Trajectoire prédite')
+    ax_plan.scatter([0], [0], color='green', zorder=3, label='Départ')
+    ax_plan.set_xlabel('Est (m)')
+    ax_plan.set_ylabel('Nord (m)')
+    ax_plan.set_title('Vue en plan')
+    ax_plan.set_aspect('equal', adjustable='datalim')
+    ax_plan.legend(loc='best', fontsize=8)
+
+    # Coupe (distance horizontale / élévation)
+    ax_coupe.plot(np.hypot(ideal['x'], ideal['y']), ideal['z'], linestyle='--', color='red', alpha=0.6)
+    ax_coupe.plot(np.hypot(trajectoire['x'], trajectoire['y']), trajectoire['z'], color='blue')
+    ax_coupe.set_xlabel('Distance horizontale (m)')
+    ax_coupe.set_ylabel('Profondeur (m)')
+    ax_coupe.set_title('Coupe')
+
+    # Marges fixes: tight_layout impose un rendu supplémentaire de la figure
+    fig.suptitle(titre)
+    fig.subplots_adjust(left=0.08, right=0.98, bottom=0.12, top=0.86, wspace=0.25)
+
+    tampon = BytesIO()
+    fig.savefig(tampon, format='png')
+    return tampon.getvalue()
+
+# Fonction pour produire les fichiers du rapport d'un forage (exécutée dans un processus de rendu)
+def rendre_rapport_forage(tache):
+    dossier = tache['dossier']
+    trajectoire = tache['trajectoire']
+    ecart_final = np.linalg.norm(trajectoire[['x', 'y', 'z']].to_numpy()[-1] - tache['ideal'][['x', 'y', 'z']].to_numpy()[-1])
+
+    rapport = rediger_rapport(tache['forage'], tache['deviation_azimuth'], tache['deviation_inclinaison'],
+                              ecart_final, tache['distance_garde'], tache['conflits'])
+    image = tracer_trajectoire_png(trajectoire, tache['ideal'],
+                                   f"{tache['forage']['id_forage']} (Écart final: {ecart_final:.2f} m)")
+
+    return {
+        f"{dossier}/rapport.txt": rapport.encode('utf-8'),
+        f"{dossier}/trajectoire.csv": trajectoire.round(3).to_csv(index=False).encode('utf-8'),
+        f"{dossier}/trajectoire.png": image,
+    }, ecart_final
+
+# Fonction pour nommer les dossiers des forages dans l'archive (identifiants nettoyés, rendus uniques par le rang
+# du forage s'ils sont en double ou se confondent une fois nettoyés)
+def dossiers_archive(id_forages):
+    dossiers = pd.Series(id_forages, dtype=str).reset_index(drop=True).str.replace(r'[^\w.-]+', '_', regex=True)
+    while dossiers.duplicated().any():
+        doublons = dossiers.duplicated(keep=False)
+        dossiers = dossiers.where(~doublons, dossiers + '_' + dossiers.index.astype(str))
+    return dossiers.tolist()
+
+# Fonction pour générer l'archive ZIP des rapports d'une campagne dans un fichier temporaire
+# (rendu dans des processus joblib/loky: la construction des figures matplotlib détient le GIL, des threads ne
+# l'accélèrent pas; les processus sont lancés sans fork du serveur et sans réexécuter le script)
+def generer_archive_campagne(forages, deviation_azimuth, deviation_inclinaison, conflits, distance_garde,
+                             num_points=50, progression=None):
+    forages = forages.reset_index(drop=True)
+    deviation_azimuth = np.asarray(deviation_azimuth, dtype=float)
+    deviation_inclinaison = np.asarray(deviation_inclinaison, dtype=float)
+    inclinaison_finale = np.clip(forages['inclinaison_initiale'].to_numpy() + deviation_inclinaison, -90, 0)
+
+    # Trajectoires prédites et idéales de tous les forages calculées en bloc (repère local du collet)
+    depths, x, y, z = calculer_trajectoires(
+        forages['profondeur_finale'].to_numpy(), forages['azimuth_initial'].to_numpy(),
+        forages['inclinaison_initiale'].to_numpy(),
+        forages['azimuth_initial'].to_numpy() + deviation_azimuth, inclinaison_finale, num_points
+    )
+    _, x_ideal, y_ideal, z_ideal = calculer_trajectoires(
+        forages['profondeur_finale'].to_numpy(), forages['azimuth_initial'].to_numpy(),
+        forages['inclinaison_initiale'].to_numpy(),
+        forages['azimuth_initial'].to_numpy(), forages['inclinaison_initiale'].to_numpy(), num_points
+    )
+
+    # Conflits vus depuis chaque forage (une paire concerne ses deux forages)
+    conflits_par_forage = pd.concat([
+        conflits[['forage_1', 'forage_2', 'separation_min', 'profondeur_1']],
+        conflits[['forage_2', 'forage_1', 'separation_min', 'profondeur_2']].set_axis(
+            ['forage_1', 'forage_2', 'separation_min', 'profondeur_1'], axis=1),
+    ]).sort_values('separation_min', kind='stable')
+    groupes_conflits = dict(list(conflits_par_forage.groupby('forage_1', sort=False)))
+    aucun_conflit = conflits_par_forage.iloc[:0]
+
+    dossiers = dossiers_archive(forages['id_forage'])
+    taches = [
+        {
+            'forage': forage,
+            'dossier': dossiers[i],
+            'deviation_azimuth': deviation_azimuth[i],
+            'deviation_inclinaison': deviation_inclinaison[i],
+            'trajectoire': pd.DataFrame({'profondeur': depths[i], 'x': x[i], 'y': y[i], 'z': z[i]}),
+            'ideal': pd.DataFrame({'profondeur': depths[i], 'x': x_ideal[i], 'y': y_ideal[i], 'z': z_ideal[i]}),
+            'distance_garde': distance_garde,
+            'conflits': groupes_conflits.get(forage['id_forage'], aucun_conflit),
+        }
+        for i, forage in enumerate(forages.to_dict('records'))
+    ]
+
+    ecarts_finaux = np.zeros(len(taches))
+    descripteur, chemin = tempfile.mkstemp(prefix="deviation5_rapports_", suffix=".zip")
+    os.close(descripteur)
+    try:
+        with zipfile.ZipFile(chemin, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            # Les rapports sont écrits dans l'archive dès qu'ils sont rendus, dans l'ordre des forages
+            rendus = Parallel(n_jobs=-1, backend='loky', return_as='generator')(
+                delayed(rendre_rapport_forage)(tache) for tache in taches
+            )
+            for i, (fichiers, ecart_final) in enumerate(rendus):
+                for nom, contenu in fichiers.items():
+                    zf.writestr(nom, contenu)
+                ecarts_finaux[i] = ecart_final
+                if progression is not None:
+                    progression(i + 1, len(taches))
+
+            # Synthèse de la campagne
+            nombre_conflits = conflits_par_forage.groupby('forage_1').size()
+            separation_min = conflits_par_forage.groupby('forage_1')['separation_min'].min()
+            synthese = forages[['id_forage', 'profondeur_finale', 'azimuth_initial', 'inclinaison_initiale',
+                                'lithologie', 'vitesse_rotation', 'collet_est', 'collet_nord']].assign(
+                deviation_azimuth=deviation_azimuth,
+                deviation_inclinaison=deviation_inclinaison,
+                azimuth_final=(forages['azimuth_initial'].to_numpy() + deviation_azimuth) % 360,
+                inclinaison_finale=inclinaison_finale,
+                ecart_final=ecarts_finaux,
+                nombre_conflits=forages['id_forage'].map(nombre_conflits).fillna(0).astype(int).to_numpy(),
+                separation_min=forages['id_forage'].map(separation_min).to_numpy(),
+            )
+            zf.writestr("synthese.csv", synthese.round(3).to_csv(index=False).encode('utf-8'))
+            zf.writestr("synthese.txt", f"""
+        Synthèse de la campagne de forage
+        Date: {pd.Timestamp.now().strftime('%d/%m/%Y')}
+        
+        - Nombre de forages: {len(synthese)}
+        - Écart final moyen: {synthese['ecart_final'].mean():.2f} m
+        - Écart final maximal: {synthese['ecart_final'].max():.2f} m ({synthese.loc[synthese['ecart_final'].idxmax(), 'id_forage']})
+        - Forages en conflit (distance de garde: {distance_garde} m): {(synthese['nombre_conflits'] > 0).sum()}
+        """.encode('utf-8'))
+    except BaseException:
+        os.remove(chemin)
+        raise
+    return chemin
+
+# Export des trajectoires prédites: les stations sont générées par blocs de forages et écrites au fil de l'eau
+# dans un fichier temporaire, la mémoire ne dépend que de la taille d'un bloc
+FORAGES_PAR_BLOC_EXPORT = 2000
+FORMATS_EXPORT = {
+    "CSV": ('trajectoires.zip', "application/zip"),
+    "Parquet": ('trajectoires.parquet', "application/octet-stream"),
+    "Collar + Survey (CSV)": ('collar_survey.zip', "application/zip"),
+}
+
+# Fonction pour calculer les stations prédites d'un bloc de forages (coordonnées, azimuth et pendage à chaque station)
+def stations_exportees(forages, deviation_azimuth, deviation_inclinaison, num_points):
+    azimuth_initial = forages['azimuth_initial'].to_numpy(dtype=float)
+    inclinaison_initiale = forages['inclinaison_initiale'].to_numpy(dtype=float)
+    inclinaison_finale = np.clip(inclinaison_initiale + deviation_inclinaison, -90, 0)
+    depths, x, y, z = calculer_trajectoires(
+        forages['profondeur_finale'].to_numpy(), azimuth_initial, inclinaison_initiale,
+        azimuth_initial + deviation_azimuth, inclinaison_finale, num_points
+    )
+    
+    # Mêmes angles interpolés que les trajectoires affichées
+    t = np.linspace(0, 1, num_points)[None, :]
+    azimuth = (azimuth_initial[:, None] + deviation_azimuth[:, None] * t) % 360
+    pendage = inclinaison_initiale[:, None] + (inclinaison_finale - inclinaison_initiale)[:, None] * t
+    
+    return pd.DataFrame({
+        'hole_id': np.repeat(forages['id_forage'].astype(str).to_numpy(), num_points),
+        'depth': depths.ravel(),
+        'x': (x + forages['collet_est'].to_numpy(dtype=float)[:, None]).ravel(),
+        'y': (y + forages['collet_nord'].to_numpy(dtype=float)[:, None]).ravel(),
+        'z': z.ravel(),
+        'azimuth': azimuth.ravel(),
+        'dip': pendage.ravel(),
+    })
+
+# Fonction pour générer les stations prédites bloc par bloc
+def blocs_stations_export(forages, deviation_azimuth, deviation_inclinaison, num_points,
+                          forages_par_bloc=FORAGES_PAR_BLOC_EXPORT):
+    deviation_azimuth = np.asarray(deviation_azimuth, dtype=float)
+    deviation_inclinaison = np.asarray(deviation_inclinaison, dtype=float)
+    for debut in range(0, len(forages), forages_par_bloc):
+        fin = debut + forages_par_bloc
+        yield fin, stations_exportees(forages.iloc[debut:fin], deviation_azimuth[debut:fin],
+                                      deviation_inclinaison[debut:fin], num_points)
+
+# Fonction pour écrire un tableau CSV bloc par bloc dans une archive ZIP (en-tête écrit une seule fois)
+def ecrire_csv_zip(archive, nom, blocs):
+    with archive.open(nom, 'w', force_zip64=True) as flux_binaire, \
+            TextIOWrapper(flux_binaire, encoding='utf-8', newline='') as flux:
+        for i, bloc in enumerate(blocs):
+            bloc.to_csv(flux, header=i == 0, index=False, float_format='%.3f')
+
+# Fonction pour exporter les trajectoires prédites de nombreux forages vers un fichier temporaire
+# (CSV zippé, Parquet par groupes de lignes, ou tables collar/survey des logiciels miniers)
+def exporter_trajectoires(forages, deviation_azimuth, deviation_inclinaison, num_points, format_export, progression=None):
+    forages = forages.reset_index(drop=True)
+    nom_fichier, _ = FORMATS_EXPORT[format_export]
+    descripteur, chemin = tempfile.mkstemp(prefix="deviation5_export_", suffix=os.path.splitext(nom_fichier)[1])
+    os.close(descripteur)
+    
+    def blocs(colonnes=None):
+        for fin, bloc in blocs_stations_export(forages, deviation_azimuth, deviation_inclinaison, num_points):
+            if progression is not None:
+                progression(min(fin, len(forages)), len(forages))
+            yield bloc if colonnes is None else bloc[colonnes]
+    
+    try:
+        if format_export == "Parquet":
+            ecrivain = None
+            for bloc in blocs():
+                table = pa.Table.from_pandas(bloc, preserve_index=False)
+                ecrivain = ecrivain or pq.ParquetWriter(chemin, table.schema, compression='zstd')
+                ecrivain.write_table(table)
+            if ecrivain is not None:
+                ecrivain.close()
+        elif format_export == "CSV":
+            with zipfile.ZipFile(chemin, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                ecrire_csv_zip(archive, 'trajectoires.csv', blocs())
+        else:
+            # Collar: une ligne par forage (z relatif au collet); Survey: azimuth et pendage à chaque station
+            collar = pd.DataFrame({
+                'hole_id': forages['id_forage'].astype(str), 'x': forages['collet_est'], 'y': forages['collet_nord'],
+                'z': 0.0, 'max_depth': forages['profondeur_finale'],
+            })
+            with zipfile.ZipFile(chemin, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                ecrire_csv_zip(archive, 'collar.csv', [collar])
+                ecrire_csv_zip(archive, 'survey.csv', blocs(['hole_id', 'depth', 'azimuth', 'dip']))
+    except BaseException:
+        os.remove(chemin)
+        raise
+    return chemin
+
+# Fonction pour lire un fichier généré (export, archive des rapports) au moment du téléchargement
+def lire_fichier_export(chemin):
+    with open(chemin, 'rb') as fichier:
+        return fichier.read()
+
+# Base de projets embarquée (SQLite): campagnes, forages, levés, modèles entraînés et historique des prédictions
+CHEMIN_BASE_PROJETS = os.environ.get(
+    'DEVIATION5_BASE_PROJETS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deviation5_projets.sqlite')
+)
+
+COLONNES_FORAGES_PROJET = ['id_forage', 'profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'lithologie',
+                           'vitesse_rotation', 'deviation_azimuth', 'deviation_inclinaison', 'collet_est', 'collet_nord']
+
+SCHEMA_BASE_PROJETS = """
+CREATE TABLE IF NOT EXISTS campagnes (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL UNIQUE,
+    date_creation TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS forages (
+    campagne_id INTEGER NOT NULL REFERENCES campagnes(id) ON DELETE CASCADE,
+    id_forage TEXT NOT NULL,
+    profondeur_finale REAL,
+    azimuth_initial REAL,
+    inclinaison_initiale REAL,
+    lithologie TEXT,
+    vitesse_rotation REAL,
+    deviation_azimuth REAL,
+    deviation_inclinaison REAL,
+    collet_est REAL,
+    collet_nord REAL,
+    date_import TEXT NOT NULL,
+    PRIMARY KEY (campagne_id, id_forage)
+);
+CREATE INDEX IF NOT EXISTS idx_forages_id_forage ON forages (id_forage);
+CREATE INDEX IF NOT EXISTS idx_forages_lithologie ON forages (campagne_id, lithologie);
+CREATE INDEX IF NOT EXISTS idx_forages_date_import ON forages (campagne_id, date_import);
+
+CREATE TABLE IF NOT EXISTS leves (
+    campagne_id INTEGER NOT NULL REFERENCES campagnes(id) ON DELETE CASCADE,
+    id_forage TEXT NOT NULL,
+    profondeur REAL NOT NULL,
+    azimuth REAL NOT NULL,
+    inclinaison REAL NOT NULL,
+    PRIMARY KEY (campagne_id, id_forage, profondeur)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS modeles (
+    id INTEGER PRIMARY KEY,
+    campagne_id INTEGER NOT NULL REFERENCES campagnes(id) ON DELETE CASCADE,
+    type_modele TEXT NOT NULL,
+    date TEXT NOT NULL,
+    empreinte TEXT NOT NULL,
+    nombre_forages INTEGER NOT NULL,
+    metriques TEXT NOT NULL,
+    pipelines BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_modeles_campagne_date ON modeles (campagne_id, date);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    campagne_id INTEGER NOT NULL REFERENCES campagnes(id) ON DELETE CASCADE,
+    modele_id INTEGER REFERENCES modeles(id) ON DELETE SET NULL,
+    date TEXT NOT NULL,
+    profondeur_finale REAL,
+    azimuth_initial REAL,
+    inclinaison_initiale REAL,
+    lithologie TEXT,
+    vitesse_rotation REAL,
+    collet_est REAL,
+    collet_nord REAL,
+    deviation_azimuth REAL,
+    deviation_inclinaison REAL,
+    ecart_final REAL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_campagne_date ON predictions (campagne_id, date);
+CREATE INDEX IF NOT EXISTS idx_predictions_lithologie ON predictions (campagne_id, lithologie);
+"""
+
+# Fonction pour ouvrir une connexion à la base de projets (une connexion par opération, dans une transaction)
+@contextmanager
+def connexion_projets(chemin):
+    connexion = sqlite3.connect(chemin, timeout=30)
+    try:
+        connexion.execute("PRAGMA foreign_keys = ON")
+        with connexion:
+            yield connexion
+    finally:
+        connexion.close()
+
+# Fonction pour créer le schéma de la base de projets (une seule fois par processus)
+@st.cache_resource
+def initialiser_base_projets(chemin):
+    with connexion_projets(chemin) as connexion:
+        # WAL: les lectures d'une session ne bloquent pas l'enregistrement d'une autre
+        connexion.execute("PRAGMA journal_mode = WAL")
+        connexion.executescript(SCHEMA_BASE_PROJETS)
+    return chemin
+
+# Fonction pour enregistrer (ou compléter) une campagne avec ses forages et ses levés
+def enregistrer_campagne(chemin, nom, forages, leves=None):
+    date_import = pd.Timestamp.now().isoformat(timespec='seconds')
+    with connexion_projets(chemin) as connexion:
+        connexion.execute("INSERT INTO campagnes (nom, date_creation) VALUES (?, ?) ON CONFLICT (nom) DO NOTHING",
+                          (nom, date_import))
+        campagne_id = connexion.execute("SELECT id FROM campagnes WHERE nom = ?", (nom,)).fetchone()[0]
+
+        # Insertion groupée: les forages déjà présents dans la campagne sont remplacés
+        lignes = forages[COLONNES_FORAGES_PROJET].assign(campagne_id=campagne_id, date_import=date_import)
+        colonnes = ', '.join(lignes.columns)
+        connexion.executemany(
+            f"INSERT OR REPLACE INTO forages ({colonnes}) VALUES ({', '.join('?' * len(lignes.columns))})",
+            lignes.itertuples(index=False, name=None)
+        )
+
+        if leves is not None and len(leves) > 0:
+            connexion.executemany(
+                "INSERT OR REPLACE INTO leves (campagne_id, id_forage, profondeur, azimuth, inclinaison) VALUES (?, ?, ?, ?, ?)",
+                leves[['id_forage', 'profondeur', 'azimuth', 'inclinaison']].assign(campagne_id=campagne_id)[
+                    ['campagne_id', 'id_forage', 'profondeur', 'azimuth', 'inclinaison']
+                ].itertuples(index=False, name=None)
+            )
+    return campagne_id
+
+# Fonction pour lister les campagnes enregistrées
+def lister_campagnes(chemin):
+    with connexion_projets(chemin) as connexion:
+        return pd.read_sql_query("""
+            SELECT c.id, c.nom, c.date_creation,
+                   (SELECT COUNT(*) FROM forages f WHERE f.campagne_id = c.id) AS nombre_forages,
+                   (SELECT MIN(date_import) FROM forages f WHERE f.campagne_id = c.id) AS premier_import,
+                   (SELECT MAX(date_import) FROM forages f WHERE f.campagne_id = c.id) AS dernier_import
+            FROM campagnes c
+            ORDER BY c.nom
+        """, connexion)
+
+# Fonction pour lister les lithologies d'une campagne (parcours de l'index campagne/lithologie)
+def lithologies_campagne(chemin, campagne_id):
+    with connexion_projets(chemin) as connexion:
+        lignes = connexion.execute("SELECT DISTINCT lithologie FROM forages WHERE campagne_id = ? ORDER BY lithologie",
+                                   (campagne_id,)).fetchall()
+    return [ligne[0] for ligne in lignes]
+
+# Fonction pour construire le filtre SQL d'un sous-ensemble de forages (résolu par les index)
+def _filtre_forages(campagne_id, lithologies=None, date_min=None, date_max=None, id_forages=None):
+    conditions, parametres = ["f.campagne_id = ?"], [campagne_id]
+    if lithologies:
+        conditions.append(f"f.lithologie IN ({', '.join('?' * len(lithologies))})")
+        parametres += list(lithologies)
+    if date_min is not None:
+        conditions.append("f.date_import >= ?")
+        parametres.append(pd.Timestamp(date_min).isoformat(timespec='seconds'))
+    if date_max is not None:
+        # Borne de fin incluse: tout ce qui précède le lendemain
+        conditions.append("f.date_import < ?")
+        parametres.append((pd.Timestamp(date_max).normalize() + pd.Timedelta(days=1)).isoformat(timespec='seconds'))
+    if id_forages:
+        conditions.append(f"f.id_forage IN ({', '.join('?' * len(id_forages))})")
+        parametres += list(id_forages)
+    return ' AND '.join(conditions), parametres
+
+# Fonction pour charger un sous-ensemble de forages et leurs levés depuis la base de projets
+def charger_projet(chemin, campagne_id, lithologies=None, date_min=None, date_max=None, id_forages=None):
+    filtre, parametres = _filtre_forages(campagne_id, lithologies, date_min, date_max, id_forages)
+    with connexion_projets(chemin) as connexion:
+        forages = pd.read_sql_query(
+            f"SELECT {', '.join('f.' + colonne for colonne in COLONNES_FORAGES_PROJET)} FROM forages f WHERE {filtre} ORDER BY f.id_forage",
+            connexion, params=parametres
+        )
+        # Les levés suivent la clé primaire (campagne, forage, profondeur): déjà triés pour le désurvey
+        leves = pd.read_sql_query(f"""
+            SELECT l.id_forage, l.profondeur, l.azimuth, l.inclinaison
+            FROM forages f JOIN leves l ON l.campagne_id = f.campagne_id AND l.id_forage = f.id_forage
+            WHERE {filtre}
+            ORDER BY l.id_forage, l.profondeur
+        """, connexion, params=parametres)
+    return forages, leves
+
+# Fonction pour enregistrer un modèle entraîné (métadonnées et pipelines sérialisés)
+def enregistrer_modele(chemin, campagne_id, type_modele, empreinte, nombre_forages, metriques, pipelines):
+    tampon = BytesIO()
+    joblib.dump(pipelines, tampon)
+    with connexion_projets(chemin) as connexion:
+        curseur = connexion.execute(
+            "INSERT INTO modeles (campagne_id, type_modele, date, empreinte, nombre_forages, metriques, pipelines) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (campagne_id, type_modele, pd.Timestamp.now().isoformat(timespec='seconds'), empreinte, nombre_forages,
+             json.dumps(metriques), tampon.getvalue())
+        )
+    return curseur.lastrowid
+
+# Fonction pour trouver le dernier modèle entraîné d'une campagne (index campagne/date)
+def dernier_modele_id(chemin, campagne_id):
+    with connexion_projets(chemin) as connexion:
+        ligne = connexion.execute("SELECT id FROM modeles WHERE campagne_id = ? ORDER BY date DESC, id DESC LIMIT 1",
+                                  (campagne_id,)).fetchone()
+    return None if ligne is None else ligne[0]
+
+# Fonction pour charger un modèle enregistré (métadonnées et pipelines)
+def charger_modele(chemin, modele_id):
+    with connexion_projets(chemin) as connexion:
+        modele_id, type_modele, date, metriques, pipelines = connexion.execute(
+            "SELECT id, type_modele, date, metriques, pipelines FROM modeles WHERE id = ?", (modele_id,)
+        ).fetchone()
+    return {
+        'id': modele_id,
+        'type_modele': type_modele,
+        'date': date,
+        'metriques': json.loads(metriques),
+        'pipelines': joblib.load(BytesIO(pipelines)),
+    }
+
+# Fonction pour ajouter une prédiction à l'historique d'une campagne
+def enregistrer_prediction(chemin, campagne_id, modele_id, forage, deviation_azimuth, deviation_inclinaison, ecart_final):
+    with connexion_projets(chemin) as connexion:
+        connexion.execute("""
+            INSERT INTO predictions (campagne_id, modele_id, date, profondeur_finale, azimuth_initial, inclinaison_initiale,
+                                     lithologie, vitesse_rotation, collet_est, collet_nord,
+                                     deviation_azimuth, deviation_inclinaison, ecart_final)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (campagne_id, modele_id, pd.Timestamp.now().isoformat(timespec='seconds'),
+              float(forage['profondeur_finale']), float(forage['azimuth_initial']), float(forage['inclinaison_initiale']),
+              str(forage['lithologie']), float(forage['vitesse_rotation']),
+              float(forage['collet_est']), float(forage['collet_nord']),
+              float(deviation_azimuth), float(deviation_inclinaison), float(ecart_final)))
+
+# Fonction pour lire l'historique des prédictions d'une campagne (les plus récentes d'abord)
+def historique_predictions(chemin, campagne_id, lithologie=None, limite=100):
+    filtre, parametres = "p.campagne_id = ?", [campagne_id]
+    if lithologie is not None:
+        filtre += " AND p.lithologie = ?"
+        parametres.append(lithologie)
+    with connexion_projets(chemin) as connexion:
+        return pd.read_sql_query(f"""
+            SELECT p.date, m.type_modele, p.profondeur_finale, p.azimuth_initial, p.inclinaison_initiale, p.lithologie,
+                   p.vitesse_rotation, p.collet_est, p.collet_nord, p.deviation_azimuth, p.deviation_inclinaison, p.ecart_final
+            FROM predictions p LEFT JOIN modeles m ON m.id = p.modele_id
+            WHERE {filtre}
+            ORDER BY p.date DESC, p.id DESC
+            LIMIT ?
+        """, connexion, params=parametres + [limite])
+
+# Sidebar pour les options
+# Base de projets: indisponible si son emplacement n'est pas accessible en écriture
+try:
+    chemin_projets = initialiser_base_projets(CHEMIN_BASE_PROJETS)
+except sqlite3.Error as erreur:
+    journal.warning(f"Base de projets indisponible ({CHEMIN_BASE_PROJETS}): {erreur}")
+    chemin_projets = None
+
+# Intégrer un entraînement en arrière-plan terminé, quelle que soit la section affichée
+tache_entrainement = st.session_state.tache_entrainement
+if tache_entrainement is not None and tache_entrainement.terminee and not tache_entrainement.recuperee:
+    recuperer_entrainement(tache_entrainement)
+if st.session_state.comparaison_modeles is not None:
+    recuperer_comparaison(st.session_state.comparaison_modeles)
+
+with st.sidebar:
+    st.markdown(f"""
+    <div style="display: flex; align-items: center; margin-bottom: 1rem;">
+        <h3 style="margin: 0; color: white;">Configuration</h3>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Statut du modèle
+    model_status = "trained" if st.session_state.model_trained else "untrained"
+    columns_status = "mapped" if st.session_state.columns_mapped else "unmapped"
+    
+    st.markdown(f"""
+    <div style="display: flex; align-items: center; margin-bottom: 1.5rem; background-color: #2D3748; padding: 0.8rem; border-radius: 6px;">
+        <span class="status-indicator status-{model_status}"></span>
+        <span style="color: white; font-size: 0.9rem;">Statut du modèle: {'Entraîné' if st.session_state.model_trained else 'Non entraîné'}</span>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Option pour uploader les données ou utiliser des données de démonstration
+    st.markdown('<p style="color: #E2E8F0; font-weight: 600; margin-bottom: 0.5rem;">Source des données</p>', unsafe_allow_html=True)
+    data_option = st.radio(
+        "",
+        ["Charger mes données", "Utiliser données démo"] + (["Projet enregistré"] if chemin_projets else []),
+        label_visibility="collapsed"
+    )
+    
+    if data_option == "Charger mes données":
+        uploaded_file = st.file_uploader("Choisir un fichier CSV", type="csv")
+        
+        if uploaded_file is not None and st.session_state.raw_df is None:
+            # Charger les données brutes
+            with mesurer_etape("Ingestion", fichier="principal"):
+                raw_df = load_data(uploaded_file)
+                st.session_state.raw_df = partager('raw_df', empreinte_dataframe(raw_df), lambda: raw_df)
+            st.session_state.columns_mapped = False
+        
+        # Levés de déviation station par station (format long, facultatif)
+        fichier_leves = st.file_uploader("Levés de déviation (facultatif)", type="csv",
+                                         help="Une ligne par station: identifiant du forage, profondeur, azimuth, inclinaison.")
+        
+        if fichier_leves is not None and st.session_state.raw_leves is None:
+            with mesurer_etape("Ingestion", fichier="levés"):
+                raw_leves = load_data(fichier_leves)
+                st.session_state.raw_leves = partager('raw_leves', empreinte_dataframe(raw_leves), lambda: raw_leves)
+            st.session_state.leves_mapped = False
+        
+        # Intervalles de lithologie (de, à) par forage (facultatif)
+        fichier_intervalles = st.file_uploader("Intervalles de lithologie (facultatif)", type="csv",
+                                               help="Une ligne par intervalle: identifiant du forage, profondeur de début, profondeur de fin, lithologie.")
+        
+        if fichier_intervalles is not None and st.session_state.raw_intervalles is None:
+            with mesurer_etape("Ingestion", fichier="intervalles"):
+                st.session_state.raw_intervalles = load_data(fichier_intervalles)
+            st.session_state.intervalles = None
+    
+    elif data_option == "Projet enregistré":
+        campagnes = lister_campagnes(chemin_projets)
+        
+        if campagnes.empty:
+            st.info("Aucune campagne enregistrée. Chargez des données puis enregistrez-les comme projet.")
+        else:
+            campagne_choisie = st.selectbox(
+                "Campagne", campagnes['id'].tolist(),
+                format_func=lambda i: f"{campagnes.set_index('id').at[i, 'nom']} ({campagnes.set_index('id').at[i, 'nombre_forages']} forages)"
+            )
+            infos_campagne = campagnes.set_index('id').loc[campagne_choisie]
+            
+            # Filtres appliqués dans la requête (index par lithologie, date d'import et identifiant)
+            lithologies_choisies = st.multiselect("Lithologies", lithologies_campagne(chemin_projets, campagne_choisie),
+                                                  help="Toutes les lithologies si aucune n'est sélectionnée.")
+            periode = ()
+            if pd.notna(infos_campagne['premier_import']):
+                premier, dernier = pd.Timestamp(infos_campagne['premier_import']).date(), pd.Timestamp(infos_campagne['dernier_import']).date()
+                periode = st.date_input("Importés entre", value=(premier, dernier), min_value=premier, max_value=dernier)
+            ids_texte = st.text_input("Identifiants de forages (facultatif)", help="Séparés par des virgules.")
+            restaurer_modele = st.checkbox("Restaurer le dernier modèle de la campagne", value=True)
+            
+            if st.button("Charger le projet"):
+                with mesurer_etape("Projet", operation="chargement"):
+                    forages_projet, leves_projet = charger_projet(
+                        chemin_projets, campagne_choisie, lithologies_choisies,
+                        periode[0] if len(periode) > 0 else None, periode[1] if len(periode) > 1 else None,
+                        [i.strip() for i in ids_texte.split(',') if i.strip()]
+                    )
+                    if len(leves_projet):
+                        empreinte_leves = empreinte_dataframe(leves_projet)
+                        st.session_state.leves_desurveyes = partager('leves_desurveyes', f"desurvey:{empreinte_leves}",
+                                                                     lambda: desurvey_leves(leves_projet))
+                        st.session_state.cibles_leves = partager('cibles_leves', f"cibles:{empreinte_leves}",
+                                                                 lambda: deriver_cibles_par_forage(leves_projet))
+                    else:
+                        st.session_state.leves_desurveyes = None
+                        st.session_state.cibles_leves = None
+                
+                if forages_projet.empty:
+                    st.warning("⚠️ Aucun forage ne correspond aux filtres.")
+                    st.session_state.projet_df = None
+                else:
+                    st.session_state.projet_df = partager('projet_df', empreinte_dataframe(forages_projet), lambda: forages_projet)
+                    st.session_state.campagne_active = campagne_choisie
+                    st.session_state.nom_campagne_active = infos_campagne['nom']
+                    
+                    # Restaurer le dernier modèle entraîné de la campagne, avec ses résidus (une instance pour toutes les sessions)
+                    modele_id = dernier_modele_id(chemin_projets, campagne_choisie) if restaurer_modele else None
+                    if modele_id is not None:
+                        modele = partager('modele_projet', f"modele_projet:{chemin_projets}:{modele_id}",
+                                          lambda: charger_modele(chemin_projets, modele_id))
+                        st.session_state.model_azimuth = modele['pipelines']['azimuth']
+                        st.session_state.model_inclinaison = modele['pipelines']['inclinaison']
+                        st.session_state.residus = modele['pipelines']['residus']
+                        st.session_state.reference_distribution = modele['pipelines'].get('reference')
+                        st.session_state.model_trained = True
+                        st.session_state.version_modele += 1
+                        st.session_state.modele_actif_id = modele['id']
+                    st.success(f"✅ {len(forages_projet)} forages et {len(leves_projet)} stations chargés.")
+    
+    # Séparateur visuel
+    st.markdown('<hr style="margin: 1.5rem 0; border-color: #4A5568;">', unsafe_allow_html=True)
+    
+    # Sélection du modèle
+    st.markdown('<p style="color: #E2E8F0; font-weight: 600; margin-bottom: 0.5rem;">Modèle de machine learning</p>', unsafe_allow_html=True)
+    model_option = st.selectbox(
+        "",
+        MODELES_DISPONIBLES,
+        label_visibility="collapsed"
+    )
+    
+    # Variables de voisinage calculées à partir des collets (ignorées si les collets ne sont pas renseignés)
+    st.checkbox("Variables de voisinage (forages proches)", value=True, key="variables_voisinage",
+                help=f"Ajoute la déviation moyenne des {K_VOISINS} forages d'entraînement les plus proches du collet, "
+                     "pondérée par l'inverse de la distance. Le forage lui-même est toujours exclu.")
+    
+    # Bouton d'entraînement
+    train_button = st.button("Entraîner le modèle")
+    
+    # Comparaison: toutes les familles entraînées en parallèle sur le même découpage
+    compare_button = st.button("Comparer tous les modèles")
+    
+    # Entraînement en flux pour les sources trop volumineuses pour la mémoire
+    with st.expander("🌊 Entraînement en flux"):
+        st.caption("La source est relue par blocs (statistiques, époques, évaluation): la mémoire utilisée ne dépend "
+                   "que de la taille des blocs. 20% des forages, choisis par hachage de leur identifiant, servent au test.")
+        sources_flux = ["Fichier CSV du dossier de données"]
+        if st.session_state.campagne_active is not None and chemin_projets:
+            sources_flux.append(f"Campagne {st.session_state.nom_campagne_active}")
+        source_flux_choisie = st.radio("Source", sources_flux, key="source_flux")
+        if source_flux_choisie == sources_flux[0]:
+            chemin_flux = st.text_input("Fichier CSV", key="chemin_flux",
+                                        help=f"Chemin relatif au dossier de données du serveur ({DOSSIER_DONNEES_FLUX}, "
+                                             "variable DEVIATION5_DOSSIER_DONNEES). Colonnes de l'application ou "
+                                             "mêmes colonnes que le fichier mappé.")
+        modele_flux = st.selectbox("Modèle incrémental", MODELES_INCREMENTAUX, key="modele_flux")
+        taille_bloc_flux = st.number_input("Lignes par bloc", min_value=1_000, max_value=1_000_000,
+                                           value=TAILLE_BLOC_FLUX, step=10_000, key="taille_bloc_flux")
+        flux_button = st.button("Entraîner en flux", key="entrainer_flux")
+    
+    if flux_button:
+        if source_flux_choisie == sources_flux[0]:
+            source_flux = {'type': 'csv', 'chemin': resoudre_chemin_autorise(DOSSIER_DONNEES_FLUX, chemin_flux.strip()),
+                           'mapping': st.session_state.mapping_colonnes}
+        else:
+            source_flux = {'type': 'projet', 'chemin': chemin_projets, 'campagne_id': st.session_state.campagne_active}
+        source_flux['taille_bloc'] = int(taille_bloc_flux)
+        
+        if source_flux['type'] == 'csv' and source_flux['chemin'] is None:
+            st.error("❌ Fichier introuvable dans le dossier de données du serveur.")
+        else:
+            tache_precedente = st.session_state.tache_entrainement
+            if tache_precedente is not None and not tache_precedente.terminee:
+                tache_precedente.annuler()
+            st.session_state.tache_entrainement = soumettre_entrainement_flux(modele_flux, source_flux)
+
+# Initialisation des données
+df = None
+
+if data_option == "Charger mes données" and st.session_state.raw_df is not None and not st.session_state.columns_mapped:
+    st.markdown("## Mappage des colonnes")
+    st.markdown("""
+    <div class="info-box">
+        <b>Mappage requis</b>: Veuillez associer les colonnes de votre fichier CSV aux colonnes attendues par l'application.
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Afficher un aperçu des données brutes
+    st.markdown("### Aperçu de vos données")
+    st.dataframe(st.session_state.raw_df.head(), use_container_width=True)
+    
+    # Colonnes requises par l'application
+    required_columns = {
+        'profondeur_finale': 'Profondeur finale du forage (mètres)',
+        'azimuth_initial': 'Azimuth initial du forage (degrés)',
+        'inclinaison_initiale': 'Inclinaison initiale du forage (degrés)',
+        'lithologie': 'Type de roche traversée',
+        'vitesse_rotation': 'Vitesse de rotation de la tige (tr/min)',
+        'deviation_azimuth': 'Déviation mesurée en azimuth (degrés)',
+        'deviation_inclinaison': 'Déviation mesurée en inclinaison (degrés)',
+        'id_forage': 'Identifiant du forage (facultatif)',
+        'collet_est': 'Coordonnée Est du collet (m, facultatif)',
+        'collet_nord': 'Coordonnée Nord du collet (m, facultatif)'
+    }
+    
+    # Colonnes facultatives (des valeurs par défaut sont générées si elles ne sont pas mappées)
+    optional_columns = ['lithologie', 'id_forage', 'collet_est', 'collet_nord']
+    
+    st.markdown("### Associer les colonnes")
+    st.markdown("""
+    <p>Pour chaque paramètre requis, sélectionnez la colonne correspondante dans votre fichier CSV.</p>
+    """, unsafe_allow_html=True)
+    
+    # Créer un dictionnaire pour stocker les mappages
+    column_mapping = {}
+    
+    # Créer une liste des colonnes disponibles dans le CSV
+    available_columns = st.session_state.raw_df.columns.tolist()
+    
+    # Ajouter une option "Non disponible" pour les colonnes facultatives
+    available_columns_with_na = ['Non disponible'] + available_columns
+    
+    # Créer des sélecteurs pour chaque colonne requise
+    col1, col2 = st.columns(2)
+    moitie = (len(required_columns) + 1) // 2
+    
+    with col1:
+        for i, (required_col, description) in enumerate(list(required_columns.items())[:moitie]):
+            # Suggérer une correspondance basée sur des mots-clés
+            suggested_index = 0  # Par défaut "Non disponible"
+            for j, col in enumerate(available_columns):
+                if required_col.lower() in col.lower() or any(word in col.lower() for word in required_col.split('_')):
+                    suggested_index = j + 1  # +1 car nous avons ajouté "Non disponible" en première position
+                    break
+            
+            column_mapping[required_col] = st.selectbox(
+                f"{description}",
+                available_columns_with_na,
+                index=suggested_index,
+                help=f"Sélectionnez la colonne de votre CSV qui correspond à '{required_col}'"
+            )
+    
+    with col2:
+        for i, (required_col, description) in enumerate(list(required_columns.items())[moitie:]):
+            # Suggérer une correspondance basée sur des mots-clés
+            suggested_index = 0  # Par défaut "Non disponible"
+            for j, col in enumerate(available_columns):
+                if required_col.lower() in col.lower() or any(word in col.lower() for word in required_col.split('_')):
+                    suggested_index = j + 1  # +1 car nous avons ajouté "Non disponible" en première position
+                    break
+            
+            column_mapping[required_col] = st.selectbox(
+                f"{description}",
+                available_columns_with_na,
+                index=suggested_index,
+                help=f"Sélectionnez la colonne de votre CSV qui correspond à '{required_col}'"
+            )
+    
+    # Vérifier si toutes les colonnes obligatoires sont mappées
+    missing_required = [col for col, mapped in column_mapping.items() 
+                       if mapped == 'Non disponible' and col not in optional_columns]
+    
+    if len(missing_required) > 0:
+        st.warning(f"⚠️ Certaines colonnes obligatoires n'ont pas été mappées: {', '.join(missing_required)}")
+        can_proceed = False
+    else:
+        can_proceed = True
+    
+    # Bouton pour valider le mappage
+    mapping_col1, mapping_col2, mapping_col3 = st.columns([1, 2, 1])
+    with mapping_col2:
+        if st.button("Valider le mappage", disabled=not can_proceed, use_container_width=True):
+            with mesurer_etape("Mappage", fichier="principal"):
+                # Créer un nouveau DataFrame avec les colonnes mappées
+                mapped_df = pd.DataFrame()
+            
+                for required_col, source_col in column_mapping.items():
+                    if source_col != 'Non disponible':
+                        mapped_df[required_col] = st.session_state.raw_df[source_col]
+                    else:
+                        # Si la colonne est facultative, on peut générer des valeurs par défaut
+                        if required_col == 'lithologie':
+                            mapped_df[required_col] = 'Inconnu'  # Valeur par défaut pour la lithologie
+                        elif required_col == 'id_forage':
+                            mapped_df[required_col] = [f"F{i + 1:05d}" for i in range(len(mapped_df))]
+                        elif required_col in ['collet_est', 'collet_nord']:
+                            mapped_df[required_col] = 0.0  # Tous les forages partent de l'origine
+            
+                # Les identifiants sont toujours traités comme du texte
+                mapped_df['id_forage'] = mapped_df['id_forage'].astype(str)
+            
+                # Stocker le DataFrame mappé dans la session (et le mappage, réutilisé par l'entraînement en flux)
+                st.session_state.df = partager('df', empreinte_dataframe(mapped_df), lambda: mapped_df)
+                st.session_state.mapping_colonnes = column_mapping
+                st.session_state.columns_mapped = True
+            st.success("✅ Mappage validé! Vous pouvez maintenant explorer et modéliser vos données.")
+            st.rerun()
+
+elif data_option == "Charger mes données" and st.session_state.columns_mapped:
+    # Utiliser le DataFrame déjà mappé
+    df = st.session_state.df
+
+elif data_option == "Projet enregistré":
+    # Sous-ensemble de la campagne chargé depuis la base de projets
+    df = st.session_state.projet_df
+    
+elif data_option == "Utiliser données démo":
+    # Données de démonstration
+    st.markdown("""
+    <div class="info-box">
+        <b>Mode démo</b>: Utilisation de données synthétiques pour illustrer le fonctionnement de l'application.
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Créer des données synthétiques pour la démonstration
+    np.random.seed(42)
+    n_samples = 1000
+    
+    prof_finale = np.random.uniform(100, 1000, n_samples)
+    azimuth_initial = np.random.uniform(0, 360, n_samples)
+    inclinaison_initiale = np.random.uniform(-90, 0, n_samples)
+    vitesse_rotation = np.random.uniform(50, 200, n_samples)
+    
+    # Lithologies possibles
+    lithologies = ['Granite', 'Schiste', 'Gneiss', 'Calcaire', 'Basalte']
+    lithologie = np.random.choice(lithologies, n_samples)
+    
+    # Créer une relation entre les entrées et les déviations (simplifiée)
+    azimuth_deviation = (
+        0.05 * prof_finale 
+        + 0.02 * azimuth_initial 
+        + 0.1 * inclinaison_initiale 
+        + 0.03 * vitesse_rotation 
+        + np.random.normal(0, 10, n_samples)
+    )
+    
+    inclinaison_deviation = (
+        0.03 * prof_finale 
+        - 0.01 * azimuth_initial 
+        + 0.05 * inclinaison_initiale 
+        + 0.02 * vitesse_rotation 
+        + np.random.normal(0, 5, n_samples)
+    )
+    
+    # Ajouter un effet de la lithologie (différent pour chaque type)
+    lithology_effect = {
+        'Granite': (2.0, 1.0),
+        'Schiste': (-1.5, 3.0),
+        'Gneiss': (0.5, -2.0),
+        'Calcaire': (-1.0, -1.5),
+        'Basalte': (3.0, 2.5)
+    }
+    
+    for i, lith in enumerate(lithologie):
+        effect_az, effect_inc = lithology_effect[lith]
+        azimuth_deviation[i] += effect_az
+        inclinaison_deviation[i] += effect_inc
+    
+    # Positions des collets réparties sur une propriété de 5 km x 5 km
+    collet_est = np.random.uniform(0, 5000, n_samples)
+    collet_nord = np.random.uniform(0, 5000, n_samples)
+    
+    # Créer le DataFrame
+    df = pd.DataFrame({
+        'profondeur_finale': prof_finale,
+        'azimuth_initial': azimuth_initial,
+        'inclinaison_initiale': inclinaison_initiale,
+        'lithologie': lithologie,
+        'vitesse_rotation': vitesse_rotation,
+        'deviation_azimuth': azimuth_deviation,
+        'deviation_inclinaison': inclinaison_deviation,
+        'id_forage': [f"DEMO-{i + 1:04d}" for i in range(n_samples)],
+        'collet_est': collet_est,
+        'collet_nord': collet_nord
+    })
+    
+    # Stocker dans la session state (instance partagée par toutes les sessions en mode démo)
+    df = partager('df', empreinte_dataframe(df), lambda: df)
+    st.session_state.df = df
+    st.session_state.columns_mapped = True
+
+# Mappage des levés de déviation (stations)
+if data_option == "Charger mes données" and st.session_state.raw_leves is not None and not st.session_state.leves_mapped:
+    st.markdown("## Mappage des levés de déviation")
+    st.dataframe(st.session_state.raw_leves.head(), use_container_width=True)
+    
+    colonnes_leves = {
+        'id_forage': 'Identifiant du forage',
+        'profondeur': 'Profondeur de la station (mètres)',
+        'azimuth': 'Azimuth mesuré (degrés)',
+        'inclinaison': 'Inclinaison mesurée (degrés)'
+    }
+    
+    mapping_leves = {}
+    colonnes_disponibles = st.session_state.raw_leves.columns.tolist()
+    
+    leve_cols = st.columns(len(colonnes_leves))
+    for leve_col, (colonne, description) in zip(leve_cols, colonnes_leves.items()):
+        # Suggérer une correspondance basée sur des mots-clés
+        suggested_index = 0
+        for j, col in enumerate(colonnes_disponibles):
+            if any(word in col.lower() for word in colonne.split('_')):
+                suggested_index = j
+                break
+        
+        with leve_col:
+            mapping_leves[colonne] = st.selectbox(description, colonnes_disponibles, index=suggested_index,
+                                                  key=f"mapping_leves_{colonne}")
+    
+    if st.button("Valider le mappage des levés"):
+        with mesurer_etape("Mappage", fichier="levés"):
+            leves = preparer_leves(st.session_state.raw_leves, mapping_leves)
+        
+            if len(leves) == 0:
+                st.warning("⚠️ Aucune station valide: vérifiez que la profondeur, l'azimuth et l'inclinaison sont numériques.")
+            else:
+                # Désurvey et cibles par forage calculés une seule fois, en opérations groupées
+                empreinte_leves = empreinte_dataframe(leves)
+                st.session_state.leves_desurveyes = partager('leves_desurveyes', f"desurvey:{empreinte_leves}",
+                                                             lambda: desurvey_leves(leves))
+                st.session_state.cibles_leves = partager('cibles_leves', f"cibles:{empreinte_leves}",
+                                                         lambda: deriver_cibles_par_forage(leves))
+                st.session_state.leves_mapped = True
+                st.session_state.segments = None
+                st.success(f"✅ {len(leves)} stations chargées pour {len(st.session_state.cibles_leves)} forages.")
+
+# Mappage des intervalles de lithologie
+if data_option == "Charger mes données" and st.session_state.raw_intervalles is not None and st.session_state.intervalles is None:
+    st.markdown("## Mappage des intervalles de lithologie")
+    st.dataframe(st.session_state.raw_intervalles.head(), use_container_width=True)
+    
+    colonnes_intervalles = {
+        'id_forage': 'Identifiant du forage',
+        'de': 'Profondeur de début (mètres)',
+        'a': 'Profondeur de fin (mètres)',
+        'lithologie': 'Lithologie'
+    }
+    
+    mapping_intervalles = {}
+    colonnes_disponibles = st.session_state.raw_intervalles.columns.tolist()
+    
+    intervalle_cols = st.columns(len(colonnes_intervalles))
+    for intervalle_col, (colonne, description) in zip(intervalle_cols, colonnes_intervalles.items()):
+        with intervalle_col:
+            mapping_intervalles[colonne] = st.selectbox(description, colonnes_disponibles,
+                                                        index=min(list(colonnes_intervalles).index(colonne), len(colonnes_disponibles) - 1),
+                                                        key=f"mapping_intervalles_{colonne}")
+    
+    if st.button("Valider le mappage des intervalles"):
+        with mesurer_etape("Mappage", fichier="intervalles"):
+            st.session_state.intervalles = preparer_intervalles(st.session_state.raw_intervalles, mapping_intervalles)
+            st.session_state.segments = None
+        st.success(f"✅ {len(st.session_state.intervalles)} intervalles de lithologie chargés.")
+
+# Segments de levés (station à station) associés à leur lithologie par index d'intervalles trié
+if st.session_state.intervalles is not None and st.session_state.leves_desurveyes is not None and st.session_state.segments is None:
+    with mesurer_etape("Segments de lithologie"):
+        st.session_state.segments = construire_segments(st.session_state.leves_desurveyes, st.session_state.intervalles)
+
+# La lithologie dominante des intervalles complète les forages sans lithologie connue
+if df is not None and data_option == "Charger mes données" and st.session_state.intervalles is not None:
+    dominantes = lithologie_dominante(st.session_state.intervalles)
+    inconnues = df['lithologie'].eq('Inconnu')
+    if inconnues.any():
+        df = df.copy()
+        df.loc[inconnues, 'lithologie'] = df.loc[inconnues, 'id_forage'].map(dominantes).fillna('Inconnu')
+
+# Les déviations mesurées par levés remplacent celles du fichier principal pour les forages correspondants
+if df is not None and data_option == "Charger mes données" and st.session_state.cibles_leves is not None:
+    cibles = st.session_state.cibles_leves.set_index('id_forage')
+    df = df.copy()
+    for colonne in ['deviation_azimuth', 'deviation_inclinaison']:
+        df[colonne] = df['id_forage'].map(cibles[colonne]).fillna(df[colonne])
+
+# Contrôle qualité après mappage: masques par règle, corrections et exclusions optionnelles
+# (fournit aussi l'empreinte du jeu corrigé, utilisée comme clé des caches)
+masques_qualite, rapport_qualite, df_avant_controle = None, None, df
+if df is not None:
+    with st.sidebar:
+        with st.expander("🧪 Contrôle qualité"):
+            corriger_donnees = st.checkbox("Appliquer les corrections automatiques", value=True, key="corriger_donnees",
+                                           help="Azimuths ramenés dans [0, 360[, inclinaisons positives inversées, lignes invalides et doublons exclus.")
+            exclure_aberrants = st.checkbox("Exclure les déviations aberrantes", value=False, key="exclure_aberrants",
+                                            help="Écart à la médiane de la lithologie supérieur à 3,5 fois la MAD normalisée.")
+    
+    with mesurer_etape("Contrôle qualité", lignes=len(df)):
+        df, masques_qualite, rapport_qualite, empreinte_df = partager(
+            'qualite', f"qualite:{empreinte_dataframe(df)}:{corriger_donnees}:{exclure_aberrants}",
+            lambda: controler_qualite(df, corriger_donnees, exclure_aberrants)
+        )
+    
+    if len(df) == 0:
+        st.error("❌ Aucune ligne valide après le contrôle qualité. Vérifiez le mappage des colonnes.")
+        df = None
+
+# Enregistrement du jeu de données courant (et des levés chargés) dans la base de projets
+if df is not None and chemin_projets:
+    with st.sidebar:
+        with st.expander("💾 Projet"):
+            if st.session_state.campagne_active is not None:
+                st.caption(f"Campagne active: {st.session_state.nom_campagne_active}. Les modèles entraînés et les prédictions y sont enregistrés.")
+            nom_campagne = st.text_input("Nom de la campagne", key="nom_campagne")
+            if st.button("Enregistrer le projet", disabled=not nom_campagne.strip()):
+                leves_a_enregistrer = st.session_state.leves_desurveyes if data_option != "Utiliser données démo" else None
+                with mesurer_etape("Projet", operation="enregistrement", forages=len(df)):
+                    st.session_state.campagne_active = enregistrer_campagne(chemin_projets, nom_campagne.strip(), df, leves_a_enregistrer)
+                st.session_state.nom_campagne_active = nom_campagne.strip()
+                st.success(f"✅ {len(df)} forages enregistrés dans la campagne « {nom_campagne.strip()} ».")
+
+# Section Exploration des données
+def afficher_exploration(df, empreinte_df):
+    st.markdown("## Exploration des données")
+    
+    # Affichage des données en deux colonnes
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.markdown("### Aperçu des données")
+        st.dataframe(df.head(), use_container_width=True)
+    
+    with col2:
+        st.markdown("### Statistiques descriptives")
+        with mesurer_etape("Statistiques", section="descriptives"):
+            st.dataframe(df.describe().style.highlight_max(axis=0), use_container_width=True)
+    
+    # Distribution des lithologies et métriques globales
+    col1, col2 = st.columns([3, 2])
+    
+    with col1:
+        st.markdown("### Distribution des lithologies")
+        with mesurer_etape("Figure", figure="fig_litho"):
+            fig_litho = figure_lithologies(empreinte_df, df)
+            st.plotly_chart(fig_litho, use_container_width=True)
+        
+    with col2:
+        st.markdown("### Métriques globales")
+        
+        # Calculer des métriques intéressantes
+        mean_az_dev = df['deviation_azimuth'].abs().mean()
+        max_az_dev = df['deviation_azimuth'].abs().max()
+        mean_inc_dev = df['deviation_inclinaison'].abs().mean()
+        max_inc_dev = df['deviation_inclinaison'].abs().max()
+        
+        # Afficher les métriques
+        c1, c2 = st.columns(2)
+        c1.metric("Déviation moyenne d'azimuth", f"{mean_az_dev:.2f}°")
+        c2.metric("Déviation max. d'azimuth", f"{max_az_dev:.2f}°")
+        
+        c1, c2 = st.columns(2)
+        c1.metric("Déviation moyenne d'inclinaison", f"{mean_inc_dev:.2f}°")
+        c2.metric("Déviation max. d'inclinaison", f"{max_inc_dev:.2f}°")
+        
+        # Calculer la lithologie avec la déviation la plus importante
+        with mesurer_etape("Statistiques", section="déviation par lithologie"):
+            lithology_deviation = df.groupby('lithologie')[['deviation_azimuth', 'deviation_inclinaison']].apply(
+                lambda x: (x['deviation_azimuth']**2 + x['deviation_inclinaison']**2).mean()**0.5
+            ).sort_values(ascending=False)
+        
+        most_deviated = lithology_deviation.index[0]
+        deviation_value = lithology_deviation.iloc[0]
+        
+        # Définir la couleur pour la lithologie la plus déviée
+        lithology_colors = {
+            'Granite': '#FF6B6B', 
+            'Schiste': '#4ECDC4', 
+            'Gneiss': '#45B7D1', 
+            'Calcaire': '#FFBE0B', 
+            'Basalte': '#9F84BD'
+        }
+        color = lithology_colors.get(most_deviated, '#4F8BF9')
+        
+        st.markdown(f"""
+        <div style="margin-top: 1rem; background-color: #F8F9FA; padding: 1rem; border-radius: 6px; border-left: 4px solid {color};">
+            <p style="margin: 0; font-size: 0.9rem;">Lithologie avec le plus de déviation :</p>
+            <p style="margin: 0; font-weight: 600; font-size: 1.1rem;">{most_deviated} ({deviation_value:.2f}°)</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Résumé des levés de déviation station par station
+    if data_option == "Charger mes données" and st.session_state.cibles_leves is not None:
+        st.markdown("### Levés de déviation")
+        cibles = st.session_state.cibles_leves
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Forages levés", f"{len(cibles)}")
+        c2.metric("Stations", f"{int(cibles['nombre_stations'].sum())}")
+        c3.metric("Stations par forage", f"{cibles['nombre_stations'].mean():.1f}")
+        c4.metric("Dogleg max.", f"{st.session_state.leves_desurveyes['dogleg'].max():.2f}°")
+        st.dataframe(cibles.drop(columns=['debut', 'fin']).head(), use_container_width=True)
+    
+    # Déviation par segment de levé selon la lithologie traversée
+    if data_option == "Charger mes données" and st.session_state.segments is not None:
+        st.markdown("### Déviation par segment et lithologie traversée")
+        segments = st.session_state.segments
+        
+        col1, col2 = st.columns([3, 2])
+        
+        with col1:
+            with mesurer_etape("Figure", figure="fig_segments"):
+                fig_segments = px.box(segments, x='lithologie', y='taux_dogleg',
+                                      title="Taux de dogleg par lithologie (°/30 m)",
+                                      color='lithologie',
+                                      color_discrete_sequence=px.colors.qualitative.Bold,
+                                      template="plotly_white")
+                fig_segments.update_layout(
+                    xaxis_title="Lithologie",
+                    yaxis_title="Dogleg (°/30 m)",
+                    showlegend=False,
+                    margin=dict(l=20, r=20, t=50, b=20),
+                )
+                st.plotly_chart(fig_segments, use_container_width=True)
+        
+        with col2:
+            resume_segments = segments.groupby('lithologie').agg(
+                longueur_totale=('longueur', 'sum'),
+                segments=('longueur', 'size'),
+                taux_dogleg_moyen=('taux_dogleg', 'mean'),
+                variation_azimuth_moy=('variation_azimuth', 'mean'),
+                variation_inclinaison_moy=('variation_inclinaison', 'mean')
+            ).round(2)
+            st.dataframe(resume_segments, use_container_width=True)
+            
+            st.download_button(
+                label="📥 Télécharger les segments",
+                data=segments.to_csv(index=False),
+                file_name="segments_lithologie.csv",
+                mime="text/csv"
+            )
+    
+    # Analyse exploratoire détaillée
+    st.markdown("### Analyse exploratoire approfondie")
+    afficher_analyse_approfondie(df, empreinte_df)
+
+# Analyse exploratoire approfondie (fragment: ses widgets ne relancent que cette partie)
+@st.fragment
+def afficher_analyse_approfondie(df, empreinte_df):
+    sous_section = st.radio(
+        "Analyse",
+        ["Corrélations", "Déviations par lithologie", "Relations"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="sous_section_exploration"
+    )
+    
+    if sous_section == "Corrélations":
+        # Matrice de corrélation
+        with mesurer_etape("Figure", figure="fig_corr"):
+            fig_corr, corr_matrix = figure_correlations(empreinte_df, df)
+            st.plotly_chart(fig_corr, use_container_width=True)
+        
+        # Interprétation automatique des corrélations
+        strong_correlations = []
+        
+        for i in range(len(corr_matrix.columns)):
+            for j in range(i):
+                if abs(corr_matrix.iloc[i, j]) > 0.3:  # Seuil de corrélation
+                    strong_correlations.append({
+                        'var1': corr_matrix.columns[i],
+                        'var2': corr_matrix.columns[j],
+                        'corr': corr_matrix.iloc[i, j]
+                    })
+        
+        if strong_correlations:
+            st.markdown("#### Corrélations significatives")
+            for corr in sorted(strong_correlations, key=lambda x: abs(x['corr']), reverse=True):
+                relation = "positive" if corr['corr'] > 0 else "négative"
+                strength = "forte" if abs(corr['corr']) > 0.7 else "modérée"
+                st.markdown(f"- Corrélation {strength} {relation} ({corr['corr']:.2f}) entre **{corr['var1']}** et **{corr['var2']}**")
+    
+    elif sous_section == "Déviations par lithologie":
+        # Déviations par lithologie
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            with mesurer_etape("Figure", figure="fig_box1"):
+                fig_box1 = figure_boites_lithologie(empreinte_df, df, 'deviation_azimuth', "azimuth")
+                st.plotly_chart(fig_box1, use_container_width=True)
+        
+        with col2:
+            with mesurer_etape("Figure", figure="fig_box2"):
+                fig_box2 = figure_boites_lithologie(empreinte_df, df, 'deviation_inclinaison', "inclinaison")
+                st.plotly_chart(fig_box2, use_container_width=True)
+        
+        # Résumé statistique par lithologie
+        st.markdown("#### Résumé statistique par lithologie")
+        
+        with mesurer_etape("Statistiques", section="résumé par lithologie"):
+            litho_stats = df.groupby('lithologie')[['deviation_azimuth', 'deviation_inclinaison']].agg(
+                ['mean', 'std', 'min', 'max']
+            ).round(2)
+        
+            litho_stats.columns = ['Azimuth Moy', 'Azimuth Std', 'Azimuth Min', 'Azimuth Max', 
+                                   'Inclinaison Moy', 'Inclinaison Std', 'Inclinaison Min', 'Inclinaison Max']
+        
+        st.dataframe(litho_stats, use_container_width=True)
+    
+    else:  # Relations
+        # Relations entre paramètres et déviations
+        features = ['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'vitesse_rotation']
+        
+        selected_feature = st.selectbox(
+            "Sélectionner un paramètre pour explorer sa relation avec les déviations",
+            features
+        )
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            with mesurer_etape("Figure", figure="fig_scatter1"):
+                fig_scatter1 = figure_dispersion(empreinte_df, df, selected_feature, 'deviation_azimuth', "azimuth")
+                st.plotly_chart(fig_scatter1, use_container_width=True)
+        
+        with col2:
+            with mesurer_etape("Figure", figure="fig_scatter2"):
+                fig_scatter2 = figure_dispersion(empreinte_df, df, selected_feature, 'deviation_inclinaison', "inclinaison")
+                st.plotly_chart(fig_scatter2, use_container_width=True)
+        
+        # Distribution du paramètre sélectionné
+        with mesurer_etape("Figure", figure="fig_hist"):
+            fig_hist = figure_distribution(empreinte_df, df, selected_feature)
+            st.plotly_chart(fig_hist, use_container_width=True)
+
+# Section Modélisation
+def afficher_modelisation(df, empreinte_df, model_option, train_button, compare_button):
+    st.markdown("## Modélisation des déviations")
+    
+    # Découpage et prétraitement mis en cache par empreinte du jeu de données, graine et encodage:
+    # changer de modèle ne refait ni le découpage ni l'ajustement du préprocesseur
+    voisinage = st.session_state.variables_voisinage and voisinage_disponible(df)
+    with mesurer_etape("Prétraitement", voisinage=voisinage):
+        donnees_modele = preparer_donnees_modele(empreinte_df, 42, df, encodage_modele(model_option), voisinage)
+    
+    # Description du modèle sélectionné
+    model_descriptions = {
+        "Random Forest": """
+            **Random Forest** est un algorithme d'ensemble qui utilise plusieurs arbres de décision pour améliorer 
+            la précision et réduire le surapprentissage. Il est efficace pour capturer les relations non linéaires 
+            dans les données.
+            
+            **Avantages**:
+            - Bonne performance sur les données complexes
+            - Gère bien les valeurs manquantes
+            - Fournit des mesures d'importance des variables
+            
+            **Complexité du modèle**: Moyenne à élevée
+        """,
+        "Gradient Boosting": """
+            **Gradient Boosting (histogrammes)** construit des arbres successifs, chacun corrigeant les erreurs des 
+            précédents, sur des variables discrétisées en histogrammes. La lithologie est traitée nativement comme 
+            une variable catégorielle, sans encodage one-hot.
+            
+            **Avantages**:
+            - Entraînement rapide sur de très grands jeux de données (plusieurs cœurs)
+            - Arrêt anticipé lorsque la validation ne s'améliore plus
+            - Souvent plus précis qu'une forêt aléatoire
+            
+            **Complexité du modèle**: Moyenne à élevée
+        """,
+        "SVM": """
+            **Support Vector Machine (SVM)** est un algorithme qui trouve un hyperplan optimal pour séparer les données.
+            Dans sa version régression (SVR), il cherche à trouver une fonction qui s'écarte le moins possible des points.
+            
+            **Avantages**:
+            - Efficace dans les espaces de grande dimension
+            - Polyvalent grâce aux différents noyaux
+            - Bonne capacité de généralisation
+            
+            Au-delà d'un seuil de lignes d'entraînement, le noyau est approché (Nyström) pour que l'entraînement 
+            reste praticable; l'écart avec le SVR exact est mesuré sur un sous-échantillon.
+            
+            **Complexité du modèle**: Moyenne
+        """,
+        "Régression Linéaire": """
+            **Régression Linéaire** est un modèle simple qui établit une relation linéaire entre les variables 
+            d'entrée et la sortie. Il est facile à interpréter mais limité pour capturer des relations complexes.
+            
+            **Avantages**:
+            - Simple et interprétable
+            - Rapide à entraîner
+            - Faible variance
+            
+            **Complexité du modèle**: Faible
+        """,
+        "Réseau de Neurones": """
+            **Réseau de Neurones** est un modèle inspiré du cerveau humain, composé de couches de neurones artificiels.
+            Il peut modéliser des relations très complexes et non linéaires.
+            
+            **Avantages**:
+            - Capacité à modéliser des relations très complexes
+            - Peut apprendre des représentations hiérarchiques
+            - Très flexible
+            
+            **Complexité du modèle**: Élevée
+        """
+    }
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.markdown(f"### Modèle sélectionné: {model_option}")
+        st.markdown(model_descriptions[model_option])
+    
+    with col2:
+        st.markdown("### Configuration")
+        st.markdown(f"""
+        <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; margin-bottom: 1rem;">
+            <p style="margin: 0; font-weight: 600;">Répartition des données</p>
+            <p style="margin: 0;">80% Entraînement / 20% Test</p>
+        </div>
+        
+        <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px;">
+            <p style="margin: 0; font-weight: 600;">Variables d'entrée</p>
+            <p style="margin: 0;">- Profondeur finale</p>
+            <p style="margin: 0;">- Azimuth initial</p>
+            <p style="margin: 0;">- Inclinaison initiale</p>
+            <p style="margin: 0;">- Lithologie</p>
+            <p style="margin: 0;">- Vitesse de rotation</p>
+            {'<p style="margin: 0;">- Déviations des ' + str(K_VOISINS) + ' forages voisins (collets)</p>' if voisinage else ''}
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Soumettre l'entraînement à la file en arrière-plan: la session reste interactive pendant l'ajustement
+    if train_button:
+        tache_precedente = st.session_state.tache_entrainement
+        if tache_precedente is not None and not tache_precedente.terminee:
+            tache_precedente.annuler()
+        
+        tache = soumettre_entrainement(model_option, empreinte_df, donnees_modele, len(df))
+        st.session_state.tache_entrainement = tache
+        if tache.terminee:
+            recuperer_entrainement(tache)
+        else:
+            st.info("⏳ Entraînement lancé en arrière-plan. La progression est affichée dans la barre latérale; "
+                    "les résultats apparaîtront ici dès qu'il sera terminé.")
+    
+    # Comparaison: chaque famille est une tâche de la file, toutes sur le découpage mis en cache
+    if compare_button:
+        for tache_precedente in (st.session_state.comparaison_modeles or {}).values():
+            if not tache_precedente.terminee:
+                tache_precedente.annuler()
+        
+        st.session_state.evaluations_comparaison = {}
+        st.session_state.comparaison_modeles = soumettre_comparaison(empreinte_df, df, voisinage)
+        recuperer_comparaison(st.session_state.comparaison_modeles)
+        if entrainements_en_cours():
+            st.info(f"⏳ Comparaison de {len(MODELES_DISPONIBLES)} modèles lancée en arrière-plan. "
+                    "Le classement se complète au fur et à mesure des entraînements.")
+    
+    # Classement des modèles comparés et promotion du meilleur comme modèle actif
+    evaluations = st.session_state.evaluations_comparaison
+    if st.session_state.comparaison_modeles is not None:
+        st.markdown("### Comparaison des modèles")
+        
+        classement = classement_modeles(evaluations)
+        restants = [model for model in st.session_state.comparaison_modeles if model not in evaluations]
+        if restants:
+            st.caption(f"En cours: {', '.join(restants)}")
+        
+        if not classement.empty:
+            st.dataframe(
+                classement.style.format(precision=4, na_rep="—").highlight_max(subset=['R² moyen'], color='#D1FAE5')
+                if 'R² moyen' in classement.columns else classement,
+                use_container_width=True, hide_index=True
+            )
+            st.caption("Classement par R² moyen (azimuth et inclinaison). Ajustement: durée cumulée des deux cibles, "
+                       "« — » si le modèle a été réutilisé depuis une autre session. Latence: prédiction d'un forage "
+                       "sur données brutes (médiane de 5 appels). Les ajustements concurrents partagent les cœurs: "
+                       "les durées sont indicatives.")
+            
+            termines = [model for model in classement['Modèle'] if 'erreur' not in evaluations[model]]
+            if termines:
+                with mesurer_etape("Figure", figure="fig_comparaison"):
+                    rmse_long = classement[classement['Modèle'].isin(termines)].melt(
+                        id_vars='Modèle', value_vars=['RMSE azimuth (°)', 'RMSE inclinaison (°)'],
+                        var_name='Cible', value_name='RMSE (°)'
+                    )
+                    fig_comparaison = px.bar(rmse_long, x='Modèle', y='RMSE (°)', color='Cible', barmode='group',
+                                             title="RMSE de test par modèle", template="plotly_white")
+                    fig_comparaison.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+                    st.plotly_chart(fig_comparaison, use_container_width=True)
+                
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    modele_promu = st.selectbox("Modèle à promouvoir", termines, index=0, key="modele_a_promouvoir")
+                with col2:
+                    st.markdown('<div style="height: 1.75rem;"></div>', unsafe_allow_html=True)
+                    if st.button("⭐ Promouvoir comme modèle actif", key="promouvoir_modele"):
+                        activer_modele(evaluations[modele_promu])
+                        st.success(f"✅ {modele_promu} est maintenant le modèle actif pour les prédictions.")
+    
+    # Résultats du dernier entraînement terminé
+    resultats = st.session_state.resultats_entrainement
+    if resultats is not None:
+        azimuth_rmse, azimuth_r2 = resultats['azimuth_rmse'], resultats['azimuth_r2']
+        inclinaison_rmse, inclinaison_r2 = resultats['inclinaison_rmse'], resultats['inclinaison_r2']
+        y_azimuth_test, y_azimuth_pred = resultats['y_azimuth_test'], resultats['y_azimuth_pred']
+        y_inclinaison_test, y_inclinaison_pred = resultats['y_inclinaison_test'], resultats['y_inclinaison_pred']
+        model_azimuth, model_inclinaison = st.session_state.model_azimuth, st.session_state.model_inclinaison
+        
+        # Affichage des résultats
+        st.markdown(f"### Résultats de l'entraînement · {resultats['model_option']}")
+        
+        # Entraînement en flux: métriques sur tout le test haché, graphiques sur un échantillon
+        flux = resultats.get('flux')
+        if flux:
+            st.info(f"ℹ️ Entraînement en flux par blocs de {flux['taille_bloc']} lignes: {flux['n_train']} lignes "
+                    f"d'entraînement, {flux['n_test']} lignes de test. Les graphiques et les résidus Monte Carlo "
+                    f"portent sur un échantillon de {len(y_azimuth_test)} lignes de test.")
+        
+        # SVR approché: précision relative au SVR exact, mesurée sur un sous-échantillon
+        controle_svr = resultats.get('controle_svr')
+        if controle_svr:
+            ecarts = " · ".join(
+                f"{cible}: RMSE {controle['rmse_approche']:.3f}° contre {controle['rmse_exact']:.3f}° "
+                f"({(controle['rapport'] - 1) * 100:+.1f}%)"
+                for cible, controle in controle_svr.items()
+            )
+            lignes_controle = next(iter(controle_svr.values()))['lignes']
+            st.info(f"ℹ️ Au-delà de {SEUIL_SVR_APPROCHE} lignes, le SVM utilise un noyau approché "
+                    f"(Nyström, {COMPOSANTES_NYSTROEM} composantes). Écart avec le SVR exact sur un sous-échantillon "
+                    f"de {lignes_controle} lignes: {ecarts}.")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### Déviation d'azimuth")
+            
+            # Métrique avec évaluation de la performance
+            r2_color = '#0CCE6B' if azimuth_r2 > 0.7 else ('#FFA500' if azimuth_r2 > 0.5 else '#FF4B4B')
+            
+            st.markdown(f"""
+            <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
+                <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
+                    <p style="margin: 0; font-size: 0.9rem;">RMSE</p>
+                    <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: #4F8BF9;">{azimuth_rmse:.4f}°</p>
+                </div>
+                <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
+                    <p style="margin: 0; font-size: 0.9rem;">R²</p>
+                    <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: {r2_color};">{azimuth_r2:.4f}</p>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Graphique des prédictions vs réelles
+            with mesurer_etape("Figure", figure="fig_pred_az"):
+                fig_pred_az = px.scatter(x=y_azimuth_test, y=y_azimuth_pred, 
+                                        labels={'x': 'Valeurs réelles (°)', 'y': 'Prédictions (°)'},
+                                        title="Prédictions vs Réelles - Déviation d'azimuth",
+                                        template="plotly_white")
+                fig_pred_az.add_shape(type='line', line=dict(dash='dash', color='rgba(0,0,0,0.3)'),
+                                    x0=y_azimuth_test.min(), y0=y_azimuth_test.min(),
+                                    x1=y_azimuth_test.max(), y1=y_azimuth_test.max())
+                fig_pred_az.update_layout(
+                    margin=dict(l=20, r=20, t=50, b=20),
+                )
+                st.plotly_chart(fig_pred_az, use_container_width=True)
+        
+        with col2:
+            st.markdown("#### Déviation d'inclinaison")
+            
+            # Métrique avec évaluation de la performance
+            r2_color = '#0CCE6B' if inclinaison_r2 > 0.7 else ('#FFA500' if inclinaison_r2 > 0.5 else '#FF4B4B')
+            
+            st.markdown(f"""
+            <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
+                <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
+                    <p style="margin: 0; font-size: 0.9rem;">RMSE</p>
+                    <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: #4F8BF9;">{inclinaison_rmse:.4f}°</p>
+                </div>
+                <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; width: 48%;">
+                    <p style="margin: 0; font-size: 0.9rem;">R²</p>
+                    <p style="margin: 0; font-weight: 600; font-size: 1.5rem; color: {r2_color};">{inclinaison_r2:.4f}</p>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Graphique des prédictions vs réelles
+            with mesurer_etape("Figure", figure="fig_pred_inc"):
+                fig_pred_inc = px.scatter(x=y_inclinaison_test, y=y_inclinaison_pred, 
+                                        labels={'x': 'Valeurs réelles (°)', 'y': 'Prédictions (°)'},
+                                        title="Prédictions vs Réelles - Déviation d'inclinaison",
+                                        template="plotly_white")
+                fig_pred_inc.add_shape(type='line', line=dict(dash='dash', color='rgba(0,0,0,0.3)'),
+                                    x0=y_inclinaison_test.min(), y0=y_inclinaison_test.min(),
+                                    x1=y_inclinaison_test.max(), y1=y_inclinaison_test.max())
+                fig_pred_inc.update_layout(
+                    margin=dict(l=20, r=20, t=50, b=20),
+                )
+                st.plotly_chart(fig_pred_inc, use_container_width=True)
+        
+        # Interprétation des résultats
+        st.markdown("### Interprétation des résultats")
+        
+        # Calculer la performance moyenne
+        avg_r2 = (azimuth_r2 + inclinaison_r2) / 2
+        
+        if avg_r2 > 0.8:
+            performance_text = "excellente"
+            performance_detail = """
+                Le modèle capture très bien les facteurs influençant les déviations. Vous pouvez utiliser ces prédictions 
+                avec un haut niveau de confiance pour la planification des forages.
+            """
+        elif avg_r2 > 0.7:
+            performance_text = "bonne"
+            performance_detail = """
+                Le modèle capture bien les tendances principales des déviations. Les prédictions sont fiables pour
+                la plupart des conditions de forage.
+            """
+        elif avg_r2 > 0.5:
+            performance_text = "modérée"
+            performance_detail = """
+                Le modèle capture les tendances générales mais manque de précision dans certains cas. Utilisez les 
+                prédictions comme indicateurs mais prévoyez des marges de sécurité.
+            """
+        else:
+            performance_text = "limitée"
+            performance_detail = """
+                Le modèle a du mal à capturer la complexité des facteurs influençant les déviations. Les prédictions
+                doivent être utilisées avec prudence et des facteurs supplémentaires pourraient être nécessaires.
+            """
+        
+        st.markdown(f"""
+        <div style="background-color: #F8F9FA; padding: 1.5rem; border-radius: 8px; margin: 1rem 0;">
+            <h4 style="margin-top: 0;">Performance globale: {performance_text.capitalize()}</h4>
+            <p>{performance_detail}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Importance et dépendance partielle pour toutes les familles (mises en cache par modèle dans la session)
+        st.markdown("### Importance des caractéristiques")
+        
+        # Seule l'explication du modèle actif est conservée (clé: numéro du modèle actif)
+        explication = None
+        if st.session_state.explication_modele is not None and st.session_state.explication_modele[0] == st.session_state.version_modele:
+            explication = st.session_state.explication_modele[1]
+        if explication is None:
+            st.caption("Importance par permutation (hausse de la RMSE quand une variable est mélangée) et dépendance partielle, "
+                       f"calculées sur au plus {ECHANTILLON_EXPLICATION} forages de test.")
+            if st.button("🔍 Calculer l'importance des caractéristiques", key="expliquer_modele"):
+                with st.spinner("Calcul des explications..."), mesurer_etape("Explications", modele=resultats['model_option']):
+                    explication = expliquer_modele(
+                        {'azimuth': model_azimuth, 'inclinaison': model_inclinaison}, resultats['X_test'],
+                        {'azimuth': y_azimuth_test, 'inclinaison': y_inclinaison_test}
+                    )
+                st.session_state.explication_modele = (st.session_state.version_modele, explication)
+        
+        if explication is not None:
+            importance_df = explication['importance']
+            col1, col2 = st.columns(2)
+            
+            for colonne, cible, titre in [(col1, 'azimuth', "azimuth"), (col2, 'inclinaison', "inclinaison")]:
+                with colonne:
+                    with mesurer_etape("Figure", figure=f"fig_imp_{cible}"):
+                        fig_imp = px.bar(
+                            importance_df[importance_df['cible'] == cible].sort_values('hausse_rmse'),
+                            y='variable', x='hausse_rmse', error_x='ecart_type', orientation='h',
+                            title=f"Importance des facteurs - Déviation d'{titre}",
+                            template="plotly_white"
+                        )
+                        fig_imp.update_layout(
+                            yaxis_title="",
+                            xaxis_title="Hausse de la RMSE après permutation (°)",
+                            margin=dict(l=20, r=20, t=50, b=20),
+                        )
+                        st.plotly_chart(fig_imp, use_container_width=True)
+            
+            st.markdown("#### Dépendance partielle")
+            dependance = explication['dependance']
+            variable_dependance = st.selectbox("Variable", input_features, key="variable_dependance")
+            courbe = dependance[dependance['variable'] == variable_dependance]
+            
+            col1, col2 = st.columns(2)
+            for colonne, cible, titre in [(col1, 'azimuth', "azimuth"), (col2, 'inclinaison', "inclinaison")]:
+                with colonne:
+                    with mesurer_etape("Figure", figure=f"fig_dep_{cible}"):
+                        if variable_dependance in categorical_features:
+                            fig_dep = px.bar(courbe, x='valeur', y=cible, template="plotly_white",
+                                             title=f"Déviation d'{titre} moyenne prédite")
+                        else:
+                            fig_dep = px.line(courbe.astype({'valeur': float}), x='valeur', y=cible, markers=True,
+                                              template="plotly_white", title=f"Déviation d'{titre} moyenne prédite")
+                        fig_dep.update_layout(
+                            xaxis_title=variable_dependance,
+                            yaxis_title="Déviation prédite (°)",
+                            margin=dict(l=20, r=20, t=50, b=20),
+                        )
+                        st.plotly_chart(fig_dep, use_container_width=True)
+
+# Fonction pour lister les tâches d'entraînement de la session pas encore intégrées (unitaire et comparaison)
+def entrainements_en_cours():
+    taches = [st.session_state.tache_entrainement] + list((st.session_state.comparaison_modeles or {}).values())
+    return [tache for tache in taches if tache is not None and not tache.recuperee]
+
+# Suivi de l'entraînement en arrière-plan (fragment relancé chaque seconde tant que la tâche est active)
+@st.fragment(run_every=1.0)
+def suivre_entrainement():
+    debuter_mesures_fragment()
+    taches = entrainements_en_cours()
+    if not taches:
+        return
+    
+    # Tâche terminée: relancer toute l'application pour intégrer et afficher les résultats
+    if any(tache.terminee for tache in taches):
+        st.rerun()
+    
+    for tache in taches:
+        st.markdown(f"**Entraînement {tache.model_option}**  \n{tache.etape}")
+        st.progress(min(tache.progression, 1.0), text=tache.detail or None)
+    st.caption(f"Temps écoulé: {time.perf_counter() - min(tache.debut for tache in taches):.0f} s")
+    if all(tache.annulation.is_set() for tache in taches):
+        st.caption("Annulation en cours...")
+    elif st.button("Annuler l'entraînement", key="annuler_entrainement"):
+        for tache in taches:
+            tache.annuler()
+
+# Section Prédiction (fragment: les paramètres du formulaire ne relancent que cette section)
+@st.fragment
+def afficher_prediction(df, empreinte_df):
+    st.markdown("## Prédiction pour un nouveau forage")
+    
+    # Dérive du jeu de données courant (nouveau lot de levés, autre campagne) par rapport à l'entraînement du modèle actif
+    reference = st.session_state.reference_distribution
+    if st.session_state.model_trained and reference is not None and reference['empreinte'] != empreinte_df:
+        rapport = rapport_derive_lot(empreinte_df, reference, df)
+        with st.expander(f"📉 Dérive des données chargées ({(rapport['statut'] != 'stable').sum()} variable(s) signalée(s))",
+                         expanded=(rapport['statut'] == "forte").any()):
+            afficher_rapport_derive(rapport)
+    
+    # Vérification si un modèle est entraîné
+    if not st.session_state.model_trained:
+        st.markdown("""
+        <div style="background-color: #FEF2F2; border-left: 4px solid #FF4B4B; padding: 1rem; border-radius: 4px; margin-bottom: 1.5rem;">
+            <p style="margin: 0; color: #7F1D1D; font-weight: 600;">Modèle non entraîné</p>
+            <p style="margin: 0; color: #7F1D1D;">Veuillez d'abord entraîner un modèle depuis l'onglet "Modélisation" ou la barre latérale.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Formulaire de prédiction
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("### Paramètres du forage")
+        
+        prof_finale_input = st.number_input("Profondeur finale (m)", min_value=50.0, max_value=2000.0, value=500.0, step=50.0)
+        azimuth_initial_input = st.number_input("Azimuth initial (degrés)", min_value=0.0, max_value=360.0, value=90.0, step=5.0)
+        inclinaison_initiale_input = st.number_input("Inclinaison initiale (degrés)", min_value=-90.0, max_value=0.0, value=-45.0, step=5.0)
+        
+        lithologies_uniques = df['lithologie'].unique().tolist()
+        lithologie_input = st.selectbox("Lithologie", lithologies_uniques)
+        
+        vitesse_rotation_input = st.number_input("Vitesse de rotation (tr/min)", min_value=20.0, max_value=300.0, value=120.0, step=10.0)
+        
+        # Position du collet et distance de garde pour la vérification anti-collision
+        c1, c2, c3 = st.columns(3)
+        collet_est_input = c1.number_input("Collet Est (m)", value=0.0, step=10.0)
+        collet_nord_input = c2.number_input("Collet Nord (m)", value=0.0, step=10.0)
+        distance_garde_input = c3.number_input("Distance de garde (m)", min_value=1.0, max_value=500.0, value=25.0, step=5.0)
+
+        # Option de simulation de l'incertitude
+        simulation_active = st.checkbox(
+            "Simuler l'incertitude (Monte Carlo)",
+            help="Échantillonne les résidus du modèle par lithologie pour tracer une enveloppe d'incertitude autour de la trajectoire."
+        )
+        n_simulations = st.slider("Nombre de simulations", min_value=500, max_value=10000, value=2000, step=500,
+                                  disabled=not simulation_active)
+
+    with col2:
+        st.markdown("### Illustration schématique")
+        
+        with mesurer_etape("Figure", figure="drill_fig"):
+            drill_fig = generate_drill_illustration(azimuth_initial_input, inclinaison_initiale_input)
+            st.plotly_chart(drill_fig, use_container_width=True)
+        
+        # Informations supplémentaires sur la lithologie
+        lithology_info = {
+            'Granite': "Roche ignée à grains grossiers, abrasive et résistante.",
+            'Schiste': "Roche métamorphique feuilletée de dureté moyenne.",
+            'Gneiss': "Roche métamorphique à bandes alternées, dure et résistante.",
+            'Calcaire': "Roche sédimentaire tendre à moyennement dure.",
+            'Basalte': "Roche volcanique dense, dure et abrasive."
+        }
+        
+        st.markdown(f"""
+        <div style="background-color: #F8F9FA; padding: 1rem; border-radius: 6px; margin-top: 1rem;">
+            <p style="margin: 0; font-weight: 600;">Lithologie sélectionnée: {lithologie_input}</p>
+            <p style="margin: 0;">{lithology_info.get(lithologie_input, "")}</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Bouton de prédiction
+    predict_col1, predict_col2, predict_col3 = st.columns([1, 2, 1])
+    
+    with predict_col2:
+        predict_button = st.button("⚡ Prédire les déviations", use_container_width=True, type="primary", disabled=not st.session_state.model_trained)
+    
+    # Faire la prédiction
+    if predict_button and st.session_state.model_trained:
+        # Créer un dataframe avec les données d'entrée
+        input_data = pd.DataFrame({
+            'profondeur_finale': [prof_finale_input],
+            'azimuth_initial': [azimuth_initial_input],
+            'inclinaison_initiale': [inclinaison_initiale_input],
+            'lithologie': [lithologie_input],
+            'vitesse_rotation': [vitesse_rotation_input],
+            'collet_est': [collet_est_input],
+            'collet_nord': [collet_nord_input]
+        })
+        
+        # Faire les prédictions avec les modèles stockés dans session_state
+        with mesurer_etape("Prédiction", jeu="nouveau forage"):
+            predicted_azimuth = st.session_state.model_azimuth.predict(input_data)[0]
+            predicted_inclinaison = st.session_state.model_inclinaison.predict(input_data)[0]
+        
+        # Signaler un forage hors du domaine couvert par l'entraînement
+        alerte_distribution = ""
+        if st.session_state.reference_distribution is not None:
+            alerte_distribution = signaler_hors_distribution(st.session_state.reference_distribution, input_data).iloc[0]
+        
+        # Calculer les valeurs finales
+        azimuth_final = azimuth_initial_input + predicted_azimuth
+        inclinaison_final = inclinaison_initiale_input + predicted_inclinaison
+        
+        # Normalization pour azimuth (0-360°)
+        azimuth_final = azimuth_final % 360
+        
+        # Contraindre l'inclinaison entre -90 et 0
+        inclinaison_final = max(-90, min(0, inclinaison_final))
+        
+        # Afficher les résultats
+        st.markdown("### Résultats de la prédiction")
+        if alerte_distribution:
+            st.warning(f"⚠️ Forage hors du domaine d'entraînement ({alerte_distribution}): la prédiction est une extrapolation.")
+        
+        # Créer un cadre moderne pour les résultats
+        st.markdown("""
+        <div style="background-color: white; border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.05); padding: 1.5rem; margin: 1.5rem 0;">
+            <h4 style="margin-top: 0; text-align: center; margin-bottom: 1.5rem;">Déviations prédites</h4>
+        """, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.metric("Déviation d'azimuth", f"{predicted_azimuth:.2f}°")
+            st.metric("Azimuth final", f"{azimuth_final:.2f}°")
+        
+        with col2:
+            st.metric("Déviation d'inclinaison", f"{predicted_inclinaison:.2f}°")
+            st.metric("Inclinaison finale", f"{inclinaison_final:.2f}°")
+        
+        # Calcul de l'intensité de la déviation pour le texte d'interprétation
+        deviation_magnitude = (predicted_azimuth**2 + predicted_inclinaison**2)**0.5
+        
+        if deviation_magnitude < 5:
+            deviation_text = "faible"
+            deviation_impact = "minime"
+        elif deviation_magnitude < 15:
+            deviation_text = "modérée"
+            deviation_impact = "à considérer"
+        else:
+            deviation_text = "importante"
+            deviation_impact = "significatif"
+        
+        st.markdown(f"""
+            <p style="text-align: center; margin: 1rem 0; padding-top: 1rem; border-top: 1px solid #f0f0f0;">
+                La déviation prédite est <strong>{deviation_text}</strong>, avec un impact <strong>{deviation_impact}</strong> sur la position finale du forage.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        # Visualisation 3D de la trajectoire du forage
+        st.markdown("### Visualisation de la trajectoire")
+        
+        # Calculer plusieurs points le long de la trajectoire (azimuth non normalisé pour
+        # éviter un détour par 180° lorsque l'azimuth final franchit 0/360°)
+        num_points = 100
+        with mesurer_etape("Trajectoire"):
+            _, x_coords, y_coords, z_coords = calculer_trajectoires(
+                prof_finale_input, azimuth_initial_input, inclinaison_initiale_input,
+                azimuth_initial_input + predicted_azimuth, inclinaison_final, num_points
+            )
+            x_coords, y_coords, z_coords = x_coords[0], y_coords[0], z_coords[0]
+
+        # Surface (grille)
+        x_surface = np.linspace(min(x_coords)-50, max(x_coords)+50, 10)
+        y_surface = np.linspace(min(y_coords)-50, max(y_coords)+50, 10)
+        x_surface_grid, y_surface_grid = np.meshgrid(x_surface, y_surface)
+        z_surface_grid = np.zeros_like(x_surface_grid)
+        
+        with mesurer_etape("Figure", figure="fig_trajectoire"):
+            # Créer la visualisation 3D
+            fig = go.Figure()
+        
+            # Ajouter la surface
+            fig.add_trace(go.Surface(
+                x=x_surface_grid,
+                y=y_surface_grid,
+                z=z_surface_grid,
+                colorscale=[[0, 'lightgreen'], [1, 'lightgreen']],
+                showscale=False,
+                opacity=0.3
+            ))
+        
+            # Ajouter la trajectoire
+            fig.add_trace(go.Scatter3d(
+                x=x_coords,
+                y=y_coords,
+                z=z_coords,
+                mode='lines',
+                line=dict(
+                    color='blue',
+                    width=6
+                ),
+                name='Trajectoire prédite'
+            ))
+        
+            # Ajouter la position de départ
+            fig.add_trace(go.Scatter3d(
+                x=[0],
+                y=[0],
+                z=[0],
+                mode='markers',
+                marker=dict(
+                    size=8,
+                    color='green'
+                ),
+                name='Départ'
+            ))
+        
+            # Ajouter la position finale
+            fig.add_trace(go.Scatter3d(
+                x=[x_coords[-1]],
+                y=[y_coords[-1]],
+                z=[z_coords[-1]],
+                mode='markers',
+                marker=dict(
+                    size=8,
+                    color='red'
+                ),
+                name='Arrivée'
+            ))
+        
+            # Ajouter la trajectoire idéale (ligne droite) avec une meilleure visibilité
+            _, x_ideal, y_ideal, z_ideal = calculer_trajectoires(
+                prof_finale_input, azimuth_initial_input, inclinaison_initiale_input,
+                azimuth_initial_input, inclinaison_initiale_input, 2
+            )
+            x_ideal, y_ideal, z_ideal = x_ideal[0, -1], y_ideal[0, -1], z_ideal[0, -1]
+
+            fig.add_trace(go.Scatter3d(
+                x=[0, x_ideal],
+                y=[0, y_ideal],
+                z=[0, z_ideal],
+                mode='lines',
+                line=dict(
+                    color='rgba(255, 0, 0, 0.6)',  # Rouge plus visible
+                    width=4,                        # Ligne plus épaisse
+                    dash='dash'                     # Conserver le style tiret
+                ),
+                name='Trajectoire idéale'
+            ))
+        
+            # Calculer l'écart final en mètres
+            final_deviation = ((x_coords[-1] - x_ideal)**2 + (y_coords[-1] - y_ideal)**2 + (z_coords[-1] - z_ideal)**2)**0.5
+
+            # Vérification anti-collision avec les forages existants (trajectoires mesurées)
+            # (le forage prévu est échantillonné au même pas que les forages existants: demi-distance de garde)
+            with mesurer_etape("Anti-collision", forages=len(df)):
+                profondeurs_prevues, x_prevus, y_prevus, z_prevus = calculer_trajectoires(
+                    prof_finale_input, azimuth_initial_input, inclinaison_initiale_input,
+                    azimuth_initial_input + predicted_azimuth, inclinaison_final,
+                    points_pour_espacement(prof_finale_input, distance_garde_input / 2)
+                )
+                stations_prevues = pd.DataFrame({
+                    'id_forage': 'Nouveau forage',
+                    'profondeur': profondeurs_prevues[0],
+                    'x': x_prevus[0] + collet_est_input,
+                    'y': y_prevus[0] + collet_nord_input,
+                    'z': z_prevus[0]
+                })
+                points_existants = points_pour_espacement(df['profondeur_finale'].max(), distance_garde_input / 2)
+                stations_existantes = stations_forages_existants(df, st.session_state.leves_desurveyes, points_existants)
+                conflits = verifier_proximite(stations_prevues, distance_garde_input, stations_existantes)
+        
+            # Enveloppe d'incertitude Monte Carlo
+            enveloppe = None
+            if simulation_active and st.session_state.residus is not None:
+                residus = st.session_state.residus
+                residus_litho = residus[residus['lithologie'] == lithologie_input]
+
+                # Utiliser tous les résidus si la lithologie est trop peu représentée
+                if len(residus_litho) < 10:
+                    residus_litho = residus
+
+                with mesurer_etape("Simulation Monte Carlo", simulations=n_simulations):
+                    enveloppe = simuler_enveloppe_monte_carlo(
+                        float(prof_finale_input), float(azimuth_initial_input), float(inclinaison_initiale_input),
+                        float(predicted_azimuth), float(predicted_inclinaison),
+                        residus_litho['residu_azimuth'].to_numpy(), residus_litho['residu_inclinaison'].to_numpy(),
+                        n_simulations=n_simulations, num_points=num_points
+                    )
+
+                    fig.add_trace(creer_cone_incertitude(enveloppe['centre'], enveloppe['rayon_p90'],
+                                                         'Enveloppe P90', 'orange'))
+                    fig.add_trace(creer_cone_incertitude(enveloppe['centre'], enveloppe['rayon_p50'],
+                                                         'Enveloppe P50', 'royalblue'))
+            elif simulation_active:
+                st.info("Les résidus du modèle ne sont pas disponibles. Veuillez réentraîner le modèle pour activer la simulation.")
+
+            fig.update_layout(
+                title=f"Trajectoire du forage (Écart final: {final_deviation:.2f} m)",
+                scene=dict(
+                    xaxis_title='Est (m)',
+                    yaxis_title='Nord (m)',
+                    zaxis_title='Profondeur (m)',
+                    aspectmode='data'
+                ),
+                template="plotly_white",
+                height=700,
+                margin=dict(l=0, r=0, t=50, b=0)
+            )
+        
+            st.plotly_chart(fig, use_container_width=True)
+
+        if len(conflits) > 0:
+            st.warning(f"⚠️ Risque de collision: {len(conflits)} forage(s) existant(s) à moins de {distance_garde_input:.0f} m de la trajectoire prédite.")
+            st.dataframe(
+                conflits[['forage_2', 'separation_min', 'profondeur_1', 'profondeur_2']].rename(columns={
+                    'forage_2': 'Forage existant',
+                    'separation_min': 'Séparation min. (m)',
+                    'profondeur_1': 'Profondeur nouveau forage (m)',
+                    'profondeur_2': 'Profondeur forage existant (m)'
+                }).round(2),
+                use_container_width=True
+            )
+        else:
+            st.success(f"✅ Aucun forage existant à moins de {distance_garde_input:.0f} m de la trajectoire prédite.")
+
+        if enveloppe is not None:
+            st.markdown(f"#### Incertitude sur l'écart final ({n_simulations} simulations)")
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Écart final P10", f"{enveloppe['ecart_final_percentiles']['P10']:.2f} m")
+            c2.metric("Écart final P50", f"{enveloppe['ecart_final_percentiles']['P50']:.2f} m")
+            c3.metric("Écart final P90", f"{enveloppe['ecart_final_percentiles']['P90']:.2f} m")
+        
+        # Ajouter une section d'interprétation et de recommandation
+        st.markdown("### Interprétation et recommandations")
+        
+        # Déterminer les recommandations basées sur la déviation
+        recommendations = recommandations_deviation(deviation_magnitude)
+        
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.markdown(f"""
+            <div style="background-color: white; border-radius: 10px; box-shadow: 0 4px 12px rgba(0,0,0,0.05); padding: 1.5rem; height: 100%;">
+                <h4 style="margin-top: 0;">Recommandations</h4>
+                <p>{recommendations}</p>
+                <p style="margin-top: 1rem; font-style: italic;">Note: Ces recommandations sont basées sur les prédictions du modèle et doivent être adaptées aux conditions spécifiques du site.</p>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            # Créer une jauge pour visualiser l'intensité de la déviation
+            with mesurer_etape("Figure", figure="gauge_fig"):
+                gauge_fig = go.Figure(go.Indicator(
+                    mode="gauge+number",
+                    value=deviation_magnitude,
+                    title={'text': "Intensité de la déviation (°)"},
+                    gauge={
+                        'axis': {'range': [None, 30], 'tickwidth': 1},
+                        'bar': {'color': "rgba(0,0,0,0)"},
+                        'steps': [
+                            {'range': [0, 5], 'color': "lightgreen"},
+                            {'range': [5, 15], 'color': "orange"},
+                            {'range': [15, 30], 'color': "salmon"}
+                        ],
+                        'threshold': {
+                            'line': {'color': "red", 'width': 4},
+                            'thickness': 0.75,
+                            'value': deviation_magnitude
+                        }
+                    }
+                ))
+            
+                gauge_fig.update_layout(
+                    height=300,
+                    margin=dict(l=20, r=20, t=50, b=20),
+                    template="plotly_white"
+                )
+            
+                st.plotly_chart(gauge_fig, use_container_width=True)
+        
+        # Ajouter une option pour télécharger le rapport
+        st.markdown("### Télécharger le rapport")
+        
+        # Rédiger le rapport (texte formaté, partagé avec l'export de campagne)
+        forage_rapport = {
+            'profondeur_finale': prof_finale_input,
+            'azimuth_initial': azimuth_initial_input,
+            'inclinaison_initiale': inclinaison_initiale_input,
+            'lithologie': lithologie_input,
+            'vitesse_rotation': vitesse_rotation_input,
+            'collet_est': collet_est_input,
+            'collet_nord': collet_nord_input,
+        }
+        report_text = rediger_rapport(forage_rapport, predicted_azimuth, predicted_inclinaison, final_deviation,
+                                      distance_garde_input, conflits, enveloppe)
+        
+        # Ajouter la prédiction à l'historique de la campagne active
+        if st.session_state.campagne_active is not None and chemin_projets:
+            enregistrer_prediction(chemin_projets, st.session_state.campagne_active, st.session_state.modele_actif_id,
+                                   forage_rapport, predicted_azimuth, predicted_inclinaison, final_deviation)
+        
+        # Créer un bouton de téléchargement
+        st.download_button(
+            label="📄 Télécharger le rapport",
+            data=report_text,
+            file_name=f"rapport_deviation_forage_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.txt",
+            mime="text/plain"
+        )
+    
+    # Historique des prédictions de la campagne active (index campagne/date)
+    if st.session_state.campagne_active is not None and chemin_projets:
+        with st.expander(f"🗂️ Historique des prédictions · {st.session_state.nom_campagne_active}"):
+            st.dataframe(historique_predictions(chemin_projets, st.session_state.campagne_active).round(2),
+                         use_container_width=True)
+
+# Analyse de sensibilité (fragment: déplacer un curseur relit la grille sans relancer le modèle ni la page)
+@st.fragment
+def afficher_sensibilite(df):
+    st.markdown("## Analyse de sensibilité")
+
+    if not st.session_state.model_trained:
+        st.info("Entraînez un modèle pour explorer la sensibilité des déviations aux paramètres de forage.")
+        return
+
+    st.markdown("""
+    <div class="info-box">
+        Les déviations sont prédites une fois sur une grille (vitesse de rotation × profondeur × inclinaison, pour chaque
+        lithologie), puis lues par interpolation: les curseurs répondent sans nouvel appel au modèle.
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Paramètres fixes de la grille (un changement déclenche un nouveau calcul, mis en cache par modèle)
+    c1, c2, c3, c4 = st.columns(4)
+    lithologies = sorted(df['lithologie'].unique())
+    lithologie = c1.selectbox("Lithologie", lithologies, key="lithologie_sensibilite")
+    azimuth_initial = c2.number_input("Azimuth initial (degrés)", min_value=0.0, max_value=360.0, value=90.0, step=5.0,
+                                      key="azimuth_sensibilite")
+    collet_est = c3.number_input("Collet Est (m)", value=0.0, step=10.0, key="collet_est_sensibilite")
+    collet_nord = c4.number_input("Collet Nord (m)", value=0.0, step=10.0, key="collet_nord_sensibilite")
+
+    bornes = bornes_sensibilite(df, st.session_state.reference_distribution)
+    fixes = {'azimuth_initial': azimuth_initial, 'id_forage': "sensibilite", 'collet_est': collet_est, 'collet_nord': collet_nord}
+    cle_grille = (st.session_state.version_modele, tuple(lithologies),
+                  tuple(bornes.values()), tuple(fixes.values()))
+    grille = st.session_state.grilles_sensibilite.get(cle_grille)
+    if grille is None:
+        with st.spinner("Calcul de la grille de sensibilité..."), mesurer_etape("Sensibilité", lithologies=len(lithologies)):
+            grille = calculer_grille_sensibilite(
+                {'azimuth': st.session_state.model_azimuth, 'inclinaison': st.session_state.model_inclinaison},
+                lithologies, bornes, fixes
+            )
+        st.session_state.grilles_sensibilite = {cle_grille: grille}
+
+    # Curseurs lus par interpolation dans la grille
+    libelles = {'vitesse_rotation': "Vitesse de rotation (tr/min)", 'profondeur_finale': "Profondeur finale (m)",
+                'inclinaison_initiale': "Inclinaison initiale (degrés)"}
+    c1, c2, c3 = st.columns(3)
+    point = {}
+    for colonne, variable in zip([c1, c2, c3], VARIABLES_SENSIBILITE):
+        minimum, maximum = bornes[variable]
+        point[variable] = colonne.slider(libelles[variable], min_value=float(minimum), max_value=float(maximum),
+                                         value=float((minimum + maximum) / 2), key=f"{variable}_sensibilite")
+    point_grille = np.array([[point[variable] for variable in VARIABLES_SENSIBILITE]])
+
+    c1, c2 = st.columns(2)
+    for colonne, cible, libelle in [(c1, 'azimuth', "Déviation d'azimuth"), (c2, 'inclinaison', "Déviation d'inclinaison")]:
+        colonne.metric(libelle, f"{interpoler_sensibilite(grille, cible, lithologie, point_grille)[0]:.2f}°")
+
+    # Réponse 1-D: une variable parcourt son axe, les deux autres restent aux valeurs des curseurs
+    st.markdown("### Réponse à une variable")
+    variable_1d = st.selectbox("Variable", VARIABLES_SENSIBILITE, format_func=libelles.get, key="variable_sensibilite_1d")
+    indice_1d = VARIABLES_SENSIBILITE.index(variable_1d)
+    axe_1d = np.linspace(*bornes[variable_1d], 200)
+    points_1d = np.repeat(point_grille, len(axe_1d), axis=0)
+    points_1d[:, indice_1d] = axe_1d
+
+    c1, c2 = st.columns(2)
+    for colonne, cible, libelle in [(c1, 'azimuth', "Déviation d'azimuth"), (c2, 'inclinaison', "Déviation d'inclinaison")]:
+        with colonne, mesurer_etape("Figure", figure=f"fig_sensibilite_{cible}"):
+            courbes = pd.concat([
+                pd.DataFrame({variable_1d: axe_1d, 'deviation': interpoler_sensibilite(grille, cible, nom, points_1d),
+                              'lithologie': nom})
+                for nom in lithologies
+            ])
+            fig_1d = px.line(courbes, x=variable_1d, y='deviation', color='lithologie', template="plotly_white",
+                             title=f"{libelle} prédite")
+            fig_1d.add_vline(x=point[variable_1d], line_dash="dash", line_color="rgba(0,0,0,0.4)")
+            fig_1d.update_layout(
+                xaxis_title=libelles[variable_1d],
+                yaxis_title="Déviation prédite (°)",
+                margin=dict(l=20, r=20, t=50, b=20),
+            )
+            st.plotly_chart(fig_1d, use_container_width=True)
+
+    # Surface 2-D: deux variables croisées pour la lithologie choisie, la troisième au curseur
+    st.markdown("### Surface de réponse")
+    c1, c2, c3 = st.columns(3)
+    variable_x = c1.selectbox("Axe horizontal", VARIABLES_SENSIBILITE, index=0, format_func=libelles.get, key="axe_x_sensibilite")
+    variable_y = c2.selectbox("Axe vertical", [v for v in VARIABLES_SENSIBILITE if v != variable_x], format_func=libelles.get,
+                              key="axe_y_sensibilite")
+    cible_surface = c3.selectbox("Déviation", ['azimuth', 'inclinaison'], key="cible_sensibilite")
+
+    axe_x, axe_y = np.linspace(*bornes[variable_x], RESOLUTION_SURFACE), np.linspace(*bornes[variable_y], RESOLUTION_SURFACE)
+    grille_x, grille_y = np.meshgrid(axe_x, axe_y)
+    points_2d = np.repeat(point_grille, grille_x.size, axis=0)
+    points_2d[:, VARIABLES_SENSIBILITE.index(variable_x)] = grille_x.ravel()
+    points_2d[:, VARIABLES_SENSIBILITE.index(variable_y)] = grille_y.ravel()
+    surface = interpoler_sensibilite(grille, cible_surface, lithologie, points_2d).reshape(grille_x.shape)
+
+    with mesurer_etape("Figure", figure="fig_surface_sensibilite"):
+        fig_2d = go.Figure(go.Contour(x=axe_x, y=axe_y, z=surface, colorscale="RdBu_r",
+                                      colorbar=dict(title="Déviation (°)")))
+        fig_2d.add_trace(go.Scatter(x=[point[variable_x]], y=[point[variable_y]], mode='markers',
+                                    marker=dict(color='black', size=10, symbol='x'), name="Curseurs"))
+        fig_2d.update_layout(
+            title=f"Déviation d'{cible_surface} prédite · {lithologie}",
+            xaxis_title=libelles[variable_x],
+            yaxis_title=libelles[variable_y],
+            template="plotly_white",
+            margin=dict(l=20, r=20, t=50, b=20),
+        )
+        st.plotly_chart(fig_2d, use_container_width=True)
+
+# Section Campagne
+def afficher_campagne(df, empreinte_df):
+    st.markdown("## Vue de campagne")
+    afficher_vue_multi_forages(df)
+    afficher_champ_deviation(df, empreinte_df)
+    afficher_forages_planifies(df)
+    afficher_suivi_direct()
+
+# Suivi en direct des levés pendant la foration (démarrage, arrêt et seuils d'alerte)
+def afficher_suivi_direct():
+    st.markdown("### Suivi en direct des levés")
+    st.markdown("""
+    <div class="info-box">
+        Indiquez un fichier CSV du dossier de levés du serveur, complété au fil de la foration (colonnes <b>id_forage</b>, <b>profondeur</b>,
+        <b>azimuth</b> et <b>inclinaison</b>). Les nouvelles stations sont désurveyées à la suite des précédentes et,
+        pour les forages planifiés de même identifiant, la fin de trajectoire est re-prédite depuis la dernière station.
+    </div>
+    """, unsafe_allow_html=True)
+
+    c1, c2, c3 = st.columns([2, 1, 1])
+    chemin = c1.text_input("Fichier de levés en direct", key="chemin_leves_direct",
+                           help=f"Chemin relatif au dossier de levés du serveur ({DOSSIER_LEVES_DIRECT}, "
+                                "variable DEVIATION5_DOSSIER_LEVES).")
+    seuil_dls = c2.number_input("Seuil de dogleg (°/30 m)", min_value=0.5, max_value=30.0, value=3.0, step=0.5,
+                                key="seuil_dls_direct")
+    tolerance_cible = c3.number_input("Tolérance sur la cible (m)", min_value=1.0, max_value=500.0, value=25.0, step=5.0,
+                                      key="tolerance_cible_direct")
+
+    if st.session_state.suivi_direct is None:
+        if st.button("▶️ Démarrer le suivi", key="demarrer_suivi_direct", disabled=not chemin):
+            chemin_autorise = resoudre_chemin_autorise(DOSSIER_LEVES_DIRECT, chemin.strip())
+            if chemin_autorise is not None:
+                st.session_state.suivi_direct = SuiviLevesDirect(chemin_autorise)
+            else:
+                st.warning(f"⚠️ Fichier introuvable dans le dossier de levés: {chemin}")
+    elif st.button("⏹️ Arrêter le suivi", key="arreter_suivi_direct"):
+        st.session_state.suivi_direct = None
+
+    if st.session_state.suivi_direct is not None:
+        suivre_leves_direct(seuil_dls, tolerance_cible)
+
+# Lecture des nouvelles stations (fragment relancé chaque seconde tant que le suivi est actif)
+@st.fragment(run_every=1.0)
+def suivre_leves_direct(seuil_dls, tolerance_cible):
+    debuter_mesures_fragment()
+    suivi = st.session_state.suivi_direct
+    if suivi is None:
+        return
+
+    try:
+        with mesurer_etape("Suivi en direct"):
+            alertes = actualiser_suivi(
+                suivi, st.session_state.forages_planifies,
+                st.session_state.model_azimuth if st.session_state.model_trained else None,
+                st.session_state.model_inclinaison, seuil_dls, tolerance_cible
+            )
+    except (OSError, ValueError) as erreur:
+        st.error(f"❌ Suivi en direct interrompu: {erreur}")
+        return
+    for alerte in alertes[:5]:
+        st.toast(f"⚠️ {alerte['id_forage']} à {alerte['profondeur']:.0f} m: {alerte['type'].lower()}, {alerte['message']}")
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Forages suivis", len(suivi.etats))
+    c2.metric("Stations reçues", suivi.stations_recues)
+    c3.metric("Alertes", len(suivi.alertes))
+    c4.metric("Dernière mise à jour", "-" if suivi.latence_ms is None else f"{suivi.latence_ms:.0f} ms")
+
+    if len(suivi.etats) == 0:
+        st.info("En attente des premières stations...")
+        return
+
+    # Un tableau par forage: dernière station mesurée et fin de trajectoire re-prédite
+    tableau = suivi.etats.join(suivi.previsions, how='left')
+    st.dataframe(
+        tableau.drop(columns=['x', 'y', 'z']).rename(columns={
+            'profondeur': 'Profondeur mesurée (m)', 'azimuth': 'Azimuth (°)', 'inclinaison': 'Inclinaison (°)',
+            'stations': 'Stations', 'dls_max': f'Dogleg max (°/{LONGUEUR_DOGLEG:.0f} m)',
+            'profondeur_restante': 'Reste à forer (m)', 'azimuth_final_prevu': 'Azimuth final prévu (°)',
+            'inclinaison_finale_prevue': 'Inclinaison finale prévue (°)', 'ecart_cible': 'Écart prévu à la cible (m)'
+        }).round(2),
+        use_container_width=True
+    )
+
+    # Trajectoire d'un forage: stations mesurées, tronçon restant re-prédit et trajectoire planifiée
+    id_forage = st.selectbox("Forage", tableau.index.tolist(), key="forage_suivi_direct")
+    mesures = pd.concat(suivi.stations[id_forage])
+    fig_direct = go.Figure(go.Scatter3d(x=mesures['x'], y=mesures['y'], z=mesures['z'], mode='lines+markers',
+                                        name="Stations mesurées", line=dict(color='#4F8BF9', width=5), marker=dict(size=3)))
+    planifies = st.session_state.forages_planifies
+    if id_forage in suivi.previsions.index and planifies is not None:
+        prevision, etat = suivi.previsions.loc[id_forage], suivi.etats.loc[id_forage]
+        _, x, y, z = calculer_trajectoires(prevision['profondeur_restante'], etat['azimuth'], etat['inclinaison'],
+                                           prevision['azimuth_final_prevu'], prevision['inclinaison_finale_prevue'],
+                                           POINTS_TRAJECTOIRE_RESTANTE)
+        fig_direct.add_trace(go.Scatter3d(x=etat['x'] + x[0], y=etat['y'] + y[0], z=etat['z'] + z[0], mode='lines',
+                                          name="Reste re-prédit", line=dict(color='#FF4B4B', width=5, dash='dash')))
+        plan = planifies[planifies['id_forage'] == id_forage].iloc[0]
+        _, x, y, z = calculer_trajectoires(plan['profondeur_finale'], plan['azimuth_initial'], plan['inclinaison_initiale'],
+                                           plan['azimuth_initial'], plan['inclinaison_initiale'], 2)
+        fig_direct.add_trace(go.Scatter3d(x=x[0], y=y[0], z=z[0], mode='lines', name="Trajectoire planifiée",
+                                          line=dict(color='rgba(0,0,0,0.4)', width=3)))
+    fig_direct.update_layout(
+        scene=dict(xaxis_title="Est (m)", yaxis_title="Nord (m)", zaxis_title="Élévation (m)", aspectmode='data'),
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=500,
+    )
+    st.plotly_chart(fig_direct, use_container_width=True)
+
+    if suivi.alertes:
+        st.markdown("#### Alertes")
+        st.dataframe(pd.DataFrame(suivi.alertes[::-1]).rename(columns={
+            'heure': 'Heure', 'id_forage': 'Forage', 'type': 'Type', 'profondeur': 'Profondeur (m)', 'message': 'Détail'
+        }), use_container_width=True)
+
+# Carte du champ de déviation interpolé en plan (fragment)
+@st.fragment
+def afficher_champ_deviation(df, empreinte_df):
+    st.markdown("### Champ de déviation en plan")
+    
+    if not voisinage_disponible(df):
+        st.info("Renseignez les coordonnées des collets (collet_est, collet_nord) pour interpoler un champ de déviation.")
+        return
+    
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        variable = st.selectbox("Variable", list(VARIABLES_CHAMP), key="variable_champ")
+        methode = st.radio("Interpolation", ["IDW", "Krigeage simple"], horizontal=True, key="methode_champ")
+        
+        est_min, est_max = float(df['collet_est'].min()), float(df['collet_est'].max())
+        nord_min, nord_max = float(df['collet_nord'].min()), float(df['collet_nord'].max())
+        etendue = max(est_max - est_min, nord_max - nord_min, 1.0)
+        
+        distance_max = st.number_input("Distance maximale au forage le plus proche (m)", min_value=1.0,
+                                       value=float(round(etendue / 10)), step=10.0, key="distance_max_champ",
+                                       help="Les cellules plus éloignées de tout forage mesuré restent vides.")
+        if methode == "IDW":
+            parametres = {'puissance': st.slider("Puissance", 1.0, 4.0, 2.0, 0.5, key="puissance_idw")}
+        else:
+            parametres = {
+                'portee': st.number_input("Portée (m)", min_value=1.0, value=float(round(etendue / 5)), step=10.0,
+                                          key="portee_krigeage", help="Portée pratique de la covariance exponentielle."),
+                'pepite': st.slider("Effet de pépite (% du palier)", 0, 90, 10, 5, key="pepite_krigeage") / 100,
+            }
+        parametres['distance_max'] = distance_max
+        
+        # Emprise affichée: déplacer ou rétrécir l'emprise ne calcule que les tuiles manquantes
+        emprise_est = st.slider("Emprise Est (m)", min_value=est_min, max_value=max(est_max, est_min + 1.0),
+                                value=(est_min, max(est_max, est_min + 1.0)), key="emprise_est_champ")
+        emprise_nord = st.slider("Emprise Nord (m)", min_value=nord_min, max_value=max(nord_max, nord_min + 1.0),
+                                 value=(nord_min, max(nord_max, nord_min + 1.0)), key="emprise_nord_champ")
+    
+    with col2:
+        forages = df.dropna(subset=['collet_est', 'collet_nord', 'deviation_azimuth', 'deviation_inclinaison'])
+        coordonnees = forages[['collet_est', 'collet_nord']].to_numpy(dtype=float)
+        valeurs = valeurs_champ(forages, variable)
+        
+        with mesurer_etape("Champ de déviation", methode=methode):
+            est, nord, champ, resolution, nombre_tuiles = assembler_champ(
+                empreinte_df, variable, methode, parametres, emprise_est, emprise_nord, coordonnees, valeurs
+            )
+        
+        fig_champ = go.Figure(go.Heatmap(x=est, y=nord, z=champ, colorscale='Viridis', colorbar=dict(title="°"),
+                                         hovertemplate="Est %{x:.0f} m<br>Nord %{y:.0f} m<br>%{z:.2f}°<extra></extra>"))
+        visibles = forages['collet_est'].between(*emprise_est) & forages['collet_nord'].between(*emprise_nord)
+        fig_champ.add_trace(go.Scattergl(
+            x=forages.loc[visibles, 'collet_est'], y=forages.loc[visibles, 'collet_nord'], mode='markers',
+            marker=dict(size=4, color='white', line=dict(width=0.5, color='black')),
+            text=forages.loc[visibles, 'id_forage'], hovertemplate="%{text}<extra></extra>", name="Forages mesurés"
+        ))
+        fig_champ.update_layout(
+            title=f"{variable} · {methode}",
+            xaxis_title="Est (m)", yaxis_title="Nord (m)",
+            yaxis=dict(scaleanchor='x', scaleratio=1),
+            height=600, showlegend=False,
+            margin=dict(l=20, r=20, t=50, b=20),
+            template="plotly_white"
+        )
+        st.plotly_chart(fig_champ, use_container_width=True)
+        st.caption(f"Cellules de {resolution:g} m, {nombre_tuiles} tuile(s) de {TAILLE_TUILE}×{TAILLE_TUILE} cellules, "
+                   f"{VOISINS_INTERPOLATION} forages voisins par cellule.")
+
+# Vue 3D multi-forages (fragment)
+@st.fragment
+def afficher_vue_multi_forages(df):
+    st.markdown("### Visualisation 3D multi-forages")
+
+    col1, col2 = st.columns([1, 3])
+
+    with col1:
+        couleur_par = st.radio("Colorer les trajectoires par", ["Lithologie", "Déviation totale"])
+        afficher_predites = st.checkbox(
+            "Afficher les trajectoires prédites",
+            value=st.session_state.model_trained,
+            disabled=not st.session_state.model_trained
+        )
+        budget_points = st.slider("Budget de points", min_value=5000, max_value=200000, value=50000, step=5000,
+                                  help="Nombre maximal de points envoyés au navigateur. Les stations sont décimées selon la profondeur au-delà de ce budget.")
+
+        # Filtre spatial sur la position des collets
+        est_min, est_max = float(df['collet_est'].min()), float(df['collet_est'].max())
+        nord_min, nord_max = float(df['collet_nord'].min()), float(df['collet_nord'].max())
+        filtre_est = st.slider("Étendue Est (m)", min_value=est_min, max_value=max(est_max, est_min + 1.0),
+                               value=(est_min, max(est_max, est_min + 1.0)))
+        filtre_nord = st.slider("Étendue Nord (m)", min_value=nord_min, max_value=max(nord_max, nord_min + 1.0),
+                                value=(nord_min, max(nord_max, nord_min + 1.0)))
+
+    with col2:
+        forages_visibles = df[
+            df['collet_est'].between(*filtre_est) & df['collet_nord'].between(*filtre_nord)
+        ]
+
+        if len(forages_visibles) == 0:
+            st.info("Aucun forage dans l'emprise sélectionnée.")
+        else:
+            with mesurer_etape("Figure", figure="fig_campagne", forages=len(forages_visibles)):
+                stations_reelles = stations_forages_existants(forages_visibles, st.session_state.leves_desurveyes)
+
+                stations_predites = None
+                if afficher_predites and st.session_state.model_trained:
+                    # Une seule prédiction groupée pour tous les forages visibles
+                    # Identifiants et collets transmis pour le voisinage (un forage existant n'est pas son propre voisin)
+                    X_visibles = forages_visibles[input_features + COLONNES_COLLETS]
+                    stations_predites = generer_stations(
+                        forages_visibles,
+                        st.session_state.model_azimuth.predict(X_visibles),
+                        st.session_state.model_inclinaison.predict(X_visibles)
+                    )
+
+                fig_campagne = construire_scene_multi_forages(stations_reelles, stations_predites, couleur_par, budget_points)
+                fig_campagne.update_layout(title=f"{len(forages_visibles)} forages affichés")
+                st.plotly_chart(fig_campagne, use_container_width=True)
+
+# Forages planifiés et anti-collision (fragment)
+@st.fragment
+def afficher_forages_planifies(df):
+    # Forages planifiés de la campagne
+    st.markdown("### Forages planifiés")
+    st.markdown("""
+    <div class="info-box">
+        Chargez un fichier CSV de forages planifiés avec les colonnes <b>profondeur_finale</b>, <b>azimuth_initial</b>,
+        <b>inclinaison_initiale</b>, <b>lithologie</b> et <b>vitesse_rotation</b>. Les colonnes <b>id_forage</b>,
+        <b>collet_est</b> et <b>collet_nord</b> sont facultatives.
+    </div>
+    """, unsafe_allow_html=True)
+
+    fichier_planifies = st.file_uploader("Choisir un fichier CSV de forages planifiés", type="csv", key="fichier_planifies")
+    if fichier_planifies is not None:
+        with mesurer_etape("Ingestion", fichier="forages planifiés"):
+            planifies = load_data(fichier_planifies)
+        colonnes_manquantes = [col for col in ['profondeur_finale', 'azimuth_initial', 'inclinaison_initiale', 'lithologie', 'vitesse_rotation']
+                               if col not in planifies.columns]
+        if colonnes_manquantes:
+            st.warning(f"⚠️ Colonnes manquantes dans le fichier de forages planifiés: {', '.join(colonnes_manquantes)}")
+        else:
+            if 'id_forage' not in planifies.columns:
+                planifies['id_forage'] = [f"P{i + 1:04d}" for i in range(len(planifies))]
+            for colonne in ['collet_est', 'collet_nord']:
+                if colonne not in planifies.columns:
+                    planifies[colonne] = 0.0
+            planifies['id_forage'] = planifies['id_forage'].astype(str)
+            st.session_state.forages_planifies = planifies
+
+    forages_planifies = st.session_state.forages_planifies
+    reference = st.session_state.reference_distribution
+    if forages_planifies is not None and st.session_state.model_trained and reference is not None:
+        # Forages planifiés hors du domaine d'entraînement, signalés ligne par ligne
+        alertes = signaler_hors_distribution(reference, forages_planifies)
+        st.dataframe(forages_planifies.assign(alerte_distribution=alertes).head(), use_container_width=True)
+        signales = alertes != ""
+        with st.expander(f"📉 Dérive par rapport à l'entraînement ({signales.sum()} forage(s) hors domaine)",
+                         expanded=bool(signales.any())):
+            afficher_rapport_derive(rapport_derive_lot(empreinte_dataframe(forages_planifies), reference, forages_planifies))
+            if signales.any():
+                st.dataframe(forages_planifies.loc[signales, ['id_forage'] + input_features].assign(alerte_distribution=alertes[signales]),
+                             use_container_width=True)
+    elif forages_planifies is not None:
+        st.dataframe(forages_planifies.head(), use_container_width=True)
+
+    # Vérification anti-collision entre trajectoires prédites
+    st.markdown("### Anti-collision")
+
+    if forages_planifies is None or not st.session_state.model_trained:
+        st.info("Chargez des forages planifiés et entraînez un modèle pour vérifier les distances entre trajectoires prédites.")
+    else:
+        c1, c2, c3 = st.columns(3)
+        distance_garde = c1.number_input("Distance de garde (m)", min_value=1.0, max_value=500.0, value=25.0, step=5.0,
+                                         key="distance_garde_campagne")
+        profondeur_min = c2.number_input("Ignorer les premiers (m)", min_value=0.0, max_value=500.0, value=20.0, step=5.0,
+                                         help="Les stations proches du collet sont ignorées (forages d'une même plateforme).")
+        inclure_existants = c3.checkbox("Inclure les forages existants", value=True)
+
+        # Prédictions groupées pour tous les forages planifiés
+        with mesurer_etape("Anti-collision", forages=len(forages_planifies)):
+            X_planifies = forages_planifies[input_features + COLONNES_COLLETS]
+            deviations_azimuth = st.session_state.model_azimuth.predict(X_planifies)
+            deviations_inclinaison = st.session_state.model_inclinaison.predict(X_planifies)
+            points_par_forage = points_pour_espacement(forages_planifies['profondeur_finale'].max(), distance_garde / 2)
+            stations_planifiees = generer_stations(forages_planifies, deviations_azimuth, deviations_inclinaison, points_par_forage)
+
+            stations_existantes = None
+            if inclure_existants:
+                stations_existantes = stations_forages_existants(
+                    df, st.session_state.leves_desurveyes,
+                    points_pour_espacement(df['profondeur_finale'].max(), distance_garde / 2)
+                )
+
+            conflits_campagne = verifier_proximite(stations_planifiees, distance_garde, stations_existantes, profondeur_min)
+
+        if len(conflits_campagne) > 0:
+            st.warning(f"⚠️ {len(conflits_campagne)} paire(s) de forages à moins de {distance_garde:.0f} m.")
+            st.dataframe(
+                conflits_campagne.rename(columns={
+                    'forage_1': 'Forage planifié',
+                    'forage_2': 'Autre forage',
+                    'separation_min': 'Séparation min. (m)',
+                    'profondeur_1': 'Profondeur 1 (m)',
+                    'profondeur_2': 'Profondeur 2 (m)',
+                    'type': 'Type'
+                }).round(2),
+                use_container_width=True
+            )
+        else:
+            st.success(f"✅ Aucune paire de forages à moins de {distance_garde:.0f} m.")
+
+        # Rapports de campagne: un dossier par forage planifié et une synthèse, regroupés dans une archive ZIP
+        st.markdown("### Rapports de campagne")
+        cle_archive = (empreinte_dataframe(forages_planifies), st.session_state.version_modele,
+                       distance_garde, profondeur_min, inclure_existants)
+
+        if st.button("📦 Générer les rapports de campagne", key="generer_rapports_campagne"):
+            barre = st.progress(0.0, text="Rendu des rapports...")
+            with mesurer_etape("Rapports de campagne", forages=len(forages_planifies)):
+                chemin_archive = generer_archive_campagne(
+                    forages_planifies, deviations_azimuth, deviations_inclinaison, conflits_campagne, distance_garde,
+                    progression=lambda fait, total: barre.progress(fait / total, text=f"Rendu des rapports: {fait}/{total}")
+                )
+            barre.empty()
+            # L'archive précédente n'est plus proposée: la supprimer
+            if st.session_state.archive_campagne is not None:
+                ancien_chemin = st.session_state.archive_campagne[1]
+                if os.path.exists(ancien_chemin):
+                    os.remove(ancien_chemin)
+            st.session_state.archive_campagne = (cle_archive, chemin_archive)
+
+        archive = st.session_state.archive_campagne
+        if archive is not None and archive[0] == cle_archive and os.path.exists(archive[1]):
+            st.download_button(
+                label=f"📥 Télécharger les rapports ({len(forages_planifies)} forages, ZIP, "
+                      f"{os.path.getsize(archive[1]) / 1e6:.1f} Mo)",
+                # Le fichier n'est lu qu'au clic
+                data=lambda chemin=archive[1]: lire_fichier_export(chemin),
+                file_name=f"rapports_campagne_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                mime="application/zip",
+                on_click="ignore"
+            )
+
+        # Export des trajectoires prédites, station par station, pour les logiciels de planification et de modélisation
+        st.markdown("### Export des trajectoires prédites")
+        c1, c2 = st.columns(2)
+        format_export = c1.selectbox("Format", list(FORMATS_EXPORT), key="format_export")
+        espacement_export = c2.number_input("Espacement des stations (m)", min_value=1.0, max_value=100.0, value=10.0,
+                                            step=1.0, key="espacement_export")
+        num_points_export = points_pour_espacement(forages_planifies['profondeur_finale'].max(), espacement_export)
+        cle_export = (empreinte_dataframe(forages_planifies), st.session_state.version_modele, format_export,
+                      num_points_export)
+
+        if st.button("🗂️ Exporter les trajectoires", key="exporter_trajectoires"):
+            barre = st.progress(0.0, text="Écriture des stations...")
+            with mesurer_etape("Export des trajectoires", forages=len(forages_planifies), format=format_export):
+                chemin_export = exporter_trajectoires(
+                    forages_planifies, deviations_azimuth, deviations_inclinaison, num_points_export, format_export,
+                    progression=lambda fait, total: barre.progress(fait / total, text=f"Écriture des stations: {fait}/{total} forages")
+                )
+            barre.empty()
+            # Le fichier de l'export précédent n'est plus proposé: le supprimer
+            if st.session_state.export_trajectoires is not None:
+                ancien_chemin = st.session_state.export_trajectoires[1]
+                if os.path.exists(ancien_chemin):
+                    os.remove(ancien_chemin)
+            st.session_state.export_trajectoires = (cle_export, chemin_export)
+
+        export = st.session_state.export_trajectoires
+        if export is not None and export[0] == cle_export and os.path.exists(export[1]):
+            nom_fichier, type_mime = FORMATS_EXPORT[format_export]
+            st.download_button(
+                label=f"📥 Télécharger les trajectoires ({len(forages_planifies) * num_points_export} stations, "
+                      f"{os.path.getsize(export[1]) / 1e6:.1f} Mo)",
+                # Le fichier n'est lu qu'au clic
+                data=lambda chemin=export[1]: lire_fichier_export(chemin),
+                file_name=nom_fichier,
+                mime=type_mime,
+                on_click="ignore"
+            )
+
+# Si des données sont disponibles, afficher l'application principale
+if df is not None:
+    # Rapport de qualité des données (lignes signalées par au moins une règle)
+    lignes_signalees = masques_qualite.any(axis=1)
+    if lignes_signalees.any():
+        with st.expander(f"🧪 Qualité des données: {int(lignes_signalees.sum())} ligne(s) signalée(s), "
+                         f"{len(df_avant_controle) - len(df)} exclue(s)"):
+            st.dataframe(rapport_qualite[rapport_qualite['Lignes concernées'] > 0], use_container_width=True, hide_index=True)
+            st.download_button(
+                label="📥 Télécharger les lignes signalées (CSV)",
+                # Le CSV n'est produit qu'au clic (fonction appelée à la demande)
+                data=lambda: df_avant_controle[lignes_signalees.to_numpy()].join(masques_qualite[lignes_signalees]).to_csv(index=False),
+                file_name="lignes_signalees.csv",
+                mime="text/csv",
+                on_click="ignore"
+            )
+    
+    # Navigation entre les sections: contrairement à st.tabs, seule la section active est exécutée
+    sections = ["📊 Exploration", "🧠 Modélisation", "🔮 Prédiction", "🗺️ Campagne"]
+    
+    # L'entraînement lancé depuis la barre latérale affiche la section Modélisation
+    if train_button or compare_button or flux_button:
+        st.session_state.section_active = sections[1]
+    
+    section_active = st.radio("Section", sections, horizontal=True, label_visibility="collapsed", key="section_active")
+    
+    if section_active == sections[0]:
+        afficher_exploration(df, empreinte_df)
+    elif section_active == sections[1]:
+        afficher_modelisation(df, empreinte_df, model_option, train_button, compare_button)
+    elif section_active == sections[2]:
+        afficher_prediction(df, empreinte_df)
+        afficher_sensibilite(df)
+    else:
+        afficher_campagne(df, empreinte_df)
+
+else:
+    # Message pour guider l'utilisateur si aucune donnée n'est encore chargée
+    if data_option == "Charger mes données" and not st.session_state.columns_mapped and st.session_state.raw_df is None:
+        st.markdown("""
+        <div style="display: flex; flex-direction: column; justify-content: center; align-items: center; height: 70vh; text-align: center;">
+            <div style="font-size: 3rem; margin-bottom: 1rem; color: #E2E8F0;">
+                📊
+            </div>
+            <h2>Bienvenue dans l'application de prédiction de déviation des forages miniers</h2>
+            <p style="max-width: 600px; margin: 1rem auto;">
+                Veuillez charger un fichier CSV depuis la barre latérale pour commencer l'analyse et la modélisation.
+            </p>
+            <div style="background-color: #EBF5FF; padding: 1rem; border-radius: 6px; max-width: 600px; margin-top: 1rem;">
+                <p style="margin: 0; color: #1A56DB;">
+                    <strong>Format attendu</strong>: Un fichier CSV contenant des données sur les paramètres de forage et les déviations mesurées.
+                    Vous pourrez mapper vos colonnes aux données requises par l'application après le chargement.
+                </p>
+            </div>
+            <p style="margin-top: 2rem; color: #718096;">
+                ou sélectionnez "Utiliser données démo" pour explorer l'application avec des données synthétiques.
+            </p>
+        </div>
+        """, unsafe_allow_html=True)
+
+# Suivi de l'entraînement en arrière-plan, visible depuis toutes les sections
+if entrainements_en_cours():
+    with st.sidebar:
+        suivre_entrainement()
+
+# Panneau de profilage de l'exécution courante
+duree_execution = time.perf_counter() - debut_execution
+journal.info(json.dumps({
+    'execution': st.session_state.id_execution,
+    'etape': "Exécution complète",
+    'duree_ms': round(duree_execution * 1000, 2)
+}, ensure_ascii=False))
+
+with st.expander("⏱️ Profilage de l'exécution"):
+    st.caption(f"Suivi mémoire (tracemalloc) {'activé' if SUIVI_MEMOIRE else 'désactivé'} pour tout le serveur "
+               "(activation: variable d'environnement DEVIATION5_SUIVI_MEMOIRE=1). Les pics sont ceux du processus: "
+               "ils incluent l'activité simultanée des autres sessions.")
+    
+    st.markdown(f"Durée totale de l'exécution: **{duree_execution * 1000:.0f} ms**")
+    
+    # Objets partagés entre toutes les sessions du serveur
+    statistiques_magasin = magasin_partage().statistiques()
+    st.markdown(f"Magasin partagé: **{len(statistiques_magasin)}** objet(s), "
+                f"**{statistiques_magasin['taille_mo'].sum():.1f} Mo**, "
+                f"**{int(statistiques_magasin['references'].sum())}** référence(s) de sessions")
+    
+    mesures = pd.DataFrame(st.session_state.mesures_etapes)
+    if not mesures.empty:
+        # Libellé lisible combinant l'étape et son contexte (figure, cible, fichier...)
+        colonnes_contexte = [col for col in mesures.columns if col not in ['execution', 'etape', 'duree_ms', 'memoire_pic_mo']]
+        mesures['libelle'] = mesures['etape'] + mesures[colonnes_contexte].apply(
+            lambda ligne: ''.join(f" · {valeur:g}" if isinstance(valeur, float) else f" · {valeur}" for valeur in ligne.dropna()), axis=1
+        ) if colonnes_contexte else mesures['etape']
+        
+        fig_profilage = px.bar(mesures.sort_values('duree_ms'), x='duree_ms', y='libelle', orientation='h',
+                               title="Durée par étape", template="plotly_white")
+        fig_profilage.update_layout(
+            xaxis_title="Durée (ms)",
+            yaxis_title="",
+            height=max(300, 25 * len(mesures)),
+            margin=dict(l=20, r=20, t=50, b=20),
+        )
+        st.plotly_chart(fig_profilage, use_container_width=True)
+        
+        colonnes_affichees = ['libelle', 'duree_ms'] + (['memoire_pic_mo'] if 'memoire_pic_mo' in mesures.columns else [])
+        st.dataframe(mesures[colonnes_affichees], use_container_width=True)
+        
+        st.download_button(
+            label="📥 Télécharger les mesures (JSON)",
+            data=mesures.drop(columns='libelle').to_json(orient='records', force_ascii=False),
+            file_name=f"profilage_{st.session_state.id_execution}.json",
+            mime="application/json"
+        )